@@ -0,0 +1,211 @@
+import json
+import threading
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+
+import sys
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.paths import DATA_CACHE_DIR
+
+CHECKPOINT_DIR = Path(DATA_CACHE_DIR)
+
+
+def get_monthly_chunks(from_date: datetime, to_date: datetime) -> List[Tuple[datetime, datetime]]:
+    """
+    Splits `[from_date, to_date)` into consecutive chunks that never cross a
+    month boundary, so each chunk maps to one raw data file.
+    """
+    chunks = []
+    chunk_start = pd.Timestamp(from_date)
+    to_date = pd.Timestamp(to_date)
+    while chunk_start < to_date:
+        next_month = chunk_start.replace(day=1, hour=0, minute=0, second=0, microsecond=0) \
+            + relativedelta(months=1)
+        chunk_end = min(next_month, to_date)
+        chunks.append((chunk_start, chunk_end))
+        chunk_start = chunk_end
+    return chunks
+
+
+def _chunk_key(chunk: Tuple[datetime, datetime]) -> str:
+    return f'{chunk[0].isoformat()}/{chunk[1].isoformat()}'
+
+
+def compute_chunk(chunk_start: datetime, chunk_end: datetime) -> pd.DataFrame:
+    """
+    Builds the hourly time-series rows of the feature group for
+    `[chunk_start, chunk_end)`, from the cached hourly aggregate of the month
+    (see `src.hourly_cache`).
+    """
+    from src.hourly_cache import load_hourly_time_series
+
+    ts_data = load_hourly_time_series(chunk_start, chunk_end)
+    if ts_data.empty:
+        return pd.DataFrame()
+
+    # event time del feature group, en milisegundos
+    ts_data['pickup_hour'] = pd.to_datetime(ts_data['pickup_hour'], utc=True)
+    ts_data['pickup_ts'] = ts_data['pickup_hour'].astype('int64') // 10**6
+    return ts_data
+
+
+class BackfillCheckpoint:
+    """
+    Local record of the chunks already inserted in one feature group, stored
+    as a JSON file. Writes are atomic (temporary file + rename), so a crash
+    never leaves a corrupt checkpoint. With `path=None` it is only kept in
+    memory.
+    """
+    def __init__(self, path: Optional[Path]):
+        self.path = None if path is None else Path(path)
+        self._lock = threading.Lock()
+        self._done = set(json.loads(self.path.read_text())) \
+            if self.path is not None and self.path.exists() else set()
+
+    def is_done(self, chunk: Tuple[datetime, datetime]) -> bool:
+        return _chunk_key(chunk) in self._done
+
+    def mark_done(self, chunk: Tuple[datetime, datetime]):
+        with self._lock:
+            self._done.add(_chunk_key(chunk))
+            if self.path is None:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix('.tmp')
+            tmp_path.write_text(json.dumps(sorted(self._done), indent=2))
+            tmp_path.replace(self.path)
+
+
+class InMemoryFeatureGroup:
+    """
+    Local stand-in for a Hopsworks feature group, to run and test the backfill
+    without a feature store. Like Hopsworks, inserts upsert on the primary key.
+    """
+    def __init__(self, primary_key: List[str]):
+        self.primary_key = primary_key
+        self.n_inserts = 0
+        self._data = pd.DataFrame()
+        self._lock = threading.Lock()
+
+    def insert(self, df: pd.DataFrame, write_options: Optional[dict] = None):
+        with self._lock:
+            self.n_inserts += 1
+            self._data = pd.concat([self._data, df], ignore_index=True) \
+                .drop_duplicates(subset=self.primary_key, keep='last', ignore_index=True)
+
+    def read(self) -> pd.DataFrame:
+        return self._data.copy()
+
+
+def default_checkpoint(feature_group) -> BackfillCheckpoint:
+    """
+    Checkpoint of `feature_group`: one file per feature group class (Hopsworks
+    or local store), name and version, so chunks done in one feature group
+    are never skipped in another. The one of an `InMemoryFeatureGroup` is not
+    persisted, as its data does not outlive the process.
+    """
+    if isinstance(feature_group, InMemoryFeatureGroup):
+        return BackfillCheckpoint(path=None)
+    key = f'{type(feature_group).__name__}_{feature_group.name}_v{feature_group.version}'
+    return BackfillCheckpoint(CHECKPOINT_DIR / f'backfill_checkpoint_{key}.json')
+
+
+def _insert_in_batches(feature_group, df: pd.DataFrame, batch_size: int, executor: ThreadPoolExecutor):
+    futures = [
+        executor.submit(
+            feature_group.insert,
+            df.iloc[start:start + batch_size],
+            write_options={'wait_for_job': True},
+        )
+        for start in range(0, len(df), batch_size)
+    ]
+    for future in futures:
+        future.result()
+
+
+def backfill_feature_group(
+    from_date: datetime,
+    to_date: datetime,
+    feature_group=None,
+    checkpoint: Optional[BackfillCheckpoint] = None,
+    compute_fn: Callable[[datetime, datetime], pd.DataFrame] = compute_chunk,
+    n_workers: int = 4,
+    batch_size: int = 500_000,
+    max_concurrent_inserts: int = 2,
+) -> List[Tuple[datetime, datetime]]:
+    """
+    Backfills the hourly time-series feature group for `[from_date, to_date)`.
+
+    - The range is split into monthly chunks.
+    - Chunks are computed in a pool of `n_workers` processes.
+    - Each computed chunk is inserted in batches of at most `batch_size` rows,
+      with at most `max_concurrent_inserts` inserts in flight.
+    - Completed chunks are recorded in `checkpoint`, and skipped on reruns.
+
+    Inserts upsert on the primary key, so re-inserting a chunk that was only
+    partially written before a crash is safe.
+
+    Args:
+        feature_group: where to insert. Defaults to `FEATURE_GROUP_METADATA`
+            through `get_or_create_feature_group`; an `InMemoryFeatureGroup`
+            can be passed to run locally
+        checkpoint (BackfillCheckpoint, optional): defaults to
+            `default_checkpoint(feature_group)`
+        compute_fn: picklable function `(chunk_start, chunk_end) -> DataFrame`
+
+    Returns:
+        List: chunks inserted in this run
+    """
+    if feature_group is None:
+        from src.config import FEATURE_GROUP_METADATA
+        from src.feature_store_api import get_or_create_feature_group
+        feature_group = get_or_create_feature_group(FEATURE_GROUP_METADATA)
+
+    checkpoint = checkpoint or default_checkpoint(feature_group)
+
+    chunks = get_monthly_chunks(from_date, to_date)
+    pending = [chunk for chunk in chunks if not checkpoint.is_done(chunk)]
+    print(f'{len(chunks)} chunks, {len(chunks) - len(pending)} already done, {len(pending)} pending')
+
+    inserted = []
+    with ProcessPoolExecutor(max_workers=n_workers, mp_context=mp.get_context('spawn')) as pool, \
+            ThreadPoolExecutor(max_workers=max_concurrent_inserts) as insert_executor:
+
+        futures = {pool.submit(compute_fn, *chunk): chunk for chunk in pending}
+        for future in as_completed(futures):
+            chunk = futures[future]
+            df = future.result()
+
+            if not df.empty:
+                _insert_in_batches(feature_group, df, batch_size, insert_executor)
+            checkpoint.mark_done(chunk)
+            inserted.append(chunk)
+            print(f'Chunk {_chunk_key(chunk)}: {len(df)} rows inserted')
+
+    return sorted(inserted)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Backfill the hourly time-series feature group')
+    parser.add_argument('from_date', type=datetime.fromisoformat, help='YYYY-MM-DD')
+    parser.add_argument('to_date', type=datetime.fromisoformat, help='YYYY-MM-DD (exclusive)')
+    parser.add_argument('--n-workers', type=int, default=4)
+    parser.add_argument('--batch-size', type=int, default=500_000)
+    parser.add_argument('--max-concurrent-inserts', type=int, default=2)
+    args = parser.parse_args()
+
+    backfill_feature_group(
+        args.from_date, args.to_date,
+        n_workers=args.n_workers,
+        batch_size=args.batch_size,
+        max_concurrent_inserts=args.max_concurrent_inserts,
+    )
@@ -0,0 +1,143 @@
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+import joblib
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import sys
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.feature_matrix import FEATURE_FORMATS, load_features
+from src.model import set_n_jobs
+
+# estado de cada worker: el modelo se hereda del proceso padre con fork
+# (o se carga en el initializer con spawn) y la matriz npy se lee con mmap,
+# así que a los workers solo se les envía cada lote o su rango de filas
+_MODEL = None
+_FEATURES_DIR = None
+
+
+def _init_worker(model_path: str, features_dir: str):
+    global _MODEL, _FEATURES_DIR
+    if _MODEL is None:
+        _MODEL = joblib.load(model_path)
+    # un hilo de LightGBM por worker: el paralelismo lo dan los procesos
+    set_n_jobs(_MODEL, 1)
+    _FEATURES_DIR = features_dir
+
+
+def _npy_rows(features_dir: str, start: int, stop: int):
+    # se abre el mmap en cada lote: al soltarlo se desmapea, y las páginas
+    # leídas no se acumulan en el RSS a lo largo de toda la matriz
+    return load_features(features_dir, 'npy').iloc[start:stop]
+
+
+def _predict_batch(batch) -> np.ndarray:
+    if isinstance(batch, tuple):
+        X = _npy_rows(_FEATURES_DIR, *batch)
+    else:
+        X = batch.to_pandas()
+    return _MODEL.predict(X)
+
+
+def _iter_batches(features_dir: Path, format: str, batch_size: int) -> Iterator[Tuple[object, pa.Table]]:
+    """
+    (task for the worker, table to write) of each batch, in order. For
+    parquet the task is the record batch itself, read row group by row
+    group; for npy it is just the row range of the memory-mapped matrix.
+    """
+    if format == 'npy':
+        n_rows = len(load_features(features_dir, 'npy'))
+        for start in range(0, n_rows, batch_size):
+            stop = min(start + batch_size, n_rows)
+            rows = _npy_rows(str(features_dir), start, stop)
+            yield (start, stop), pa.Table.from_pandas(rows, preserve_index=False)
+    else:
+        parquet_file = pq.ParquetFile(Path(features_dir) / 'X.parquet')
+        for batch in parquet_file.iter_batches(batch_size=batch_size):
+            yield batch, pa.Table.from_batches([batch])
+
+
+def predict_streaming(
+    model_path: Path,
+    features_dir: Path,
+    output_path: Path,
+    format: str = 'parquet',
+    n_workers: Optional[int] = None,
+    batch_size: int = 65_536,
+    max_in_flight: Optional[int] = None,
+) -> int:
+    """
+    Scores the features in `features_dir` in batches of `batch_size` rows
+    across `n_workers` processes and writes the features plus a
+    `demand_pred` column to `output_path` as the batches finish.
+
+    At most `max_in_flight` batches (2 per worker by default) are read and
+    not yet written, so memory depends on the batch size and not on the
+    input size. Batches are written in input order, so the output is the
+    same as predicting everything at once.
+
+    The model is loaded once in this process and inherited by the workers
+    with fork; where fork is not available every worker loads it.
+
+    Returns:
+        int: number of rows written
+    """
+    if format not in FEATURE_FORMATS:
+        raise ValueError(f"format must be one of {FEATURE_FORMATS}, got '{format}'")
+    n_workers = n_workers or os.cpu_count()
+    max_in_flight = max_in_flight or 2 * n_workers
+
+    global _MODEL
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+        _MODEL = joblib.load(model_path)
+    else:
+        context = multiprocessing.get_context('spawn')
+
+    n_rows = 0
+    writer = None
+    in_flight = deque()
+
+    def _write_oldest():
+        nonlocal writer, n_rows
+        future, table = in_flight.popleft()
+        table = table.replace_schema_metadata(None)
+        table = table.append_column('demand_pred', pa.array(future.result(), type=pa.float64()))
+        if writer is None:
+            writer = pq.ParquetWriter(tmp_path, table.schema)
+        writer.write_table(table)
+        n_rows += table.num_rows
+
+    output_path = Path(output_path)
+    tmp_path = output_path.with_name(f'{output_path.name}.tmp')
+    try:
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(str(model_path), str(features_dir)),
+        ) as executor:
+            for task, table in _iter_batches(features_dir, format, batch_size):
+                if len(in_flight) >= max_in_flight:
+                    _write_oldest()
+                in_flight.append((executor.submit(_predict_batch, task), table))
+            while in_flight:
+                _write_oldest()
+    finally:
+        if writer is not None:
+            writer.close()
+        _MODEL = None
+
+    if writer is None:
+        # entrada vacía: un parquet vacío con el mismo esquema que el modo normal
+        X = load_features(features_dir, format)
+        X.assign(demand_pred=np.zeros(0)).to_parquet(tmp_path, index=False)
+    tmp_path.replace(output_path)
+    return n_rows
@@ -0,0 +1,40 @@
+# Punto de entrada único de los pipelines:
+#
+#     python -m src.cli <pipeline> [argumentos del pipeline]
+#
+# Solo se importa el pipeline elegido, así que el arranque paga únicamente
+# los módulos que ese pipeline necesita.
+import runpy
+import sys
+
+# nombre en la línea de comandos -> módulo del pipeline
+PIPELINES = {
+    'feature': 'src.pipelines.feature_pipeline',
+    'feature-hourly': 'src.pipelines.hourly_feature_pipeline',
+    'training': 'src.pipelines.training_pipeline',
+    'tuning': 'src.pipelines.tuning_pipeline',
+    'inference': 'src.pipelines.inference_pipeline',
+    'monitoring': 'src.pipelines.monitoring_pipeline',
+    'variants': 'src.pipelines.variant_pipeline',
+    'backfill': 'src.backfill',
+    'dag': 'src.pipelines.dag_pipeline',
+}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in PIPELINES:
+        print(f'Uso: python -m src.cli {{{",".join(PIPELINES)}}} [argumentos del pipeline]')
+        sys.exit(0 if argv and argv[0] in ('-h', '--help') else 1)
+
+    from src.paths import ensure_data_dirs
+    ensure_data_dirs()
+
+    # el pipeline se ejecuta como si se hubiese lanzado con `python -m`
+    module = PIPELINES[argv[0]]
+    sys.argv = [module] + list(argv[1:])
+    runpy.run_module(module, run_name='__main__', alter_sys=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,24 +2,30 @@ import os
 
 from dotenv import load_dotenv
 
-from paths import PARENT_DIR
-
 import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 # sys.path.append(str(Path().resolve().parent / "src"))
 
+from src.paths import PARENT_DIR
+# solo las dataclasses: hsfs y hopsworks se importan al conectar
 from src.feature_store_api import FeatureGroupConfig, FeatureViewConfig
 
 # load key-value pairs from .env file located in the parent directory
 load_dotenv(PARENT_DIR / '.env')
 
-try:
-    HOPSWORKS_PROJECT_NAME = os.environ['HOPSWORKS_PROJECT_NAME']
-    HOPSWORKS_API_KEY = os.environ['HOPSWORKS_API_KEY']
-except:
+# backend del feature store y del model registry:
+# - 'hopsworks': instancia remota de Hopsworks
+# - 'local': parquet (offline) + SQLite (online) en taxi_demand/feature_repo/data
+FEATURE_STORE_BACKEND = os.environ.get('FEATURE_STORE_BACKEND', 'hopsworks')
+
+# las credenciales solo hacen falta con el backend de Hopsworks
+HOPSWORKS_PROJECT_NAME = os.environ.get('HOPSWORKS_PROJECT_NAME')
+HOPSWORKS_API_KEY = os.environ.get('HOPSWORKS_API_KEY')
+if FEATURE_STORE_BACKEND == 'hopsworks' and not (HOPSWORKS_PROJECT_NAME and HOPSWORKS_API_KEY):
     raise Exception(
-        'Create an .env file on the project root with the HOPSWORKS_PROJECT_NAME and HOPSWORKS_API_KEY'
+        'Create an .env file on the project root with the HOPSWORKS_PROJECT_NAME and HOPSWORKS_API_KEY, '
+        'or set FEATURE_STORE_BACKEND=local'
     )
 
 # remove FEATURE_GROUP_NAME and FEATURE_GROUP_VERSION, and use FEATURE_GROUP_METADATA instead
@@ -62,14 +68,18 @@ FEATURE_VIEW_PREDICTIONS_METADATA = FeatureViewConfig(
     feature_group=FEATURE_GROUP_PREDICTIONS_METADATA,
 )
 
-# MONITORING_FV_NAME = 'monitoring_feature_view'
-# MONITORING_FV_VERSION = 1
+MONITORING_FV_NAME = 'monitoring_feature_view'
+MONITORING_FV_VERSION = 1
 
 # # number of historical values our model needs to generate predictions
 N_FEATURES = 24
 
-# # number of iterations we want Optuna to pefrom to find the best hyperparameters
-# N_HYPERPARAMETER_SEARCH_TRIALS = 1
+# number of iterations we want Optuna to pefrom to find the best hyperparameters
+N_HYPERPARAMETER_SEARCH_TRIALS = 50
+
+# maximum Mean Absolute Error we allow our production model to have
+MAX_MAE = 30.0
 
-# # maximum Mean Absolute Error we allow our production model to have
-# MAX_MAE = 30.0
\ No newline at end of file
+# latency budget (p99 of one prediction batch with every zone, in ms) for the
+# model we serve; used to pick among cheaper model variants
+LATENCY_BUDGET_MS = 20.0
@@ -0,0 +1,135 @@
+import os
+import tempfile
+import multiprocessing as mp
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.data_split import get_rolling_origin_folds
+from src.model import train_lightgbm, eval_model
+
+# Datos compartidos con los procesos hijos. Cada hijo abre con mmap los mismos
+# ficheros .npy al arrancar, así que no se serializan por fold y las páginas
+# vienen de la page cache del sistema operativo.
+_FOLD_DATA = {}
+
+
+def _init_fold_worker(data_dir: str, n_locations: int, hyperparams: dict):
+    _FOLD_DATA.update({
+        name: np.load(Path(data_dir) / f'{name}.npy', mmap_mode='r')
+        for name in ('X', 'y', 'location_codes')
+    })
+    _FOLD_DATA.update(n_locations=n_locations, hyperparams=hyperparams)
+
+
+def _run_fold(fold_id: int, train_stop: int, val_stop: int) -> dict:
+    """Trains and evaluates one fold on slices of the shared arrays."""
+    X, y = _FOLD_DATA['X'], _FOLD_DATA['y']
+    codes = _FOLD_DATA['location_codes']
+    n_locations = _FOLD_DATA['n_locations']
+
+    model = train_lightgbm(X[:train_stop], y[:train_stop], **_FOLD_DATA['hyperparams'])
+
+    X_val, y_val = X[train_stop:val_stop], y[train_stop:val_stop]
+    metrics = eval_model(model, X_val, y_val)
+
+    # errores agregados por localización (sumas, para poder promediar entre folds)
+    abs_error = np.abs(y_val - model.predict(X_val))
+    codes_val = codes[train_stop:val_stop]
+
+    return {
+        'fold': fold_id,
+        'n_train': train_stop,
+        'n_val': val_stop - train_stop,
+        **metrics,
+        'location_abs_error': np.bincount(codes_val, weights=abs_error, minlength=n_locations),
+        'location_count': np.bincount(codes_val, minlength=n_locations),
+    }
+
+
+def cross_validate_rolling_origin(
+    df: pd.DataFrame,
+    n_folds: int = 4,
+    val_hours: int = 7 * 24,
+    target_column_name: str = 'target',
+    n_workers: Optional[int] = None,
+    **hyperparams,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Evaluates a LightGBM model over `n_folds` rolling-origin folds, training
+    the folds in parallel processes.
+
+    The data is sorted by `pickup_hour` and converted to a single float32
+    matrix once. Each fold only receives its `(train_stop, val_stop)`
+    positions and slices that matrix, so no data is copied per fold. The
+    number of LightGBM threads per fold is capped so that
+    `n_workers * n_jobs` does not exceed the number of cores.
+
+    Workers are started with `forkserver`, not `fork`: forking a process
+    where LightGBM already started its OpenMP threads (e.g. training running
+    in another thread of the DAG runner) can deadlock the children. They
+    share the matrix through a memory-mapped `.npy` file instead.
+
+    Args:
+        df (pd.DataFrame): tabular data with `pickup_hour`, `pickup_location_id`,
+            the lag features and the target column
+        n_folds (int): number of folds
+        val_hours (int): length of each validation window, in hours
+        target_column_name (str): name of the target column
+        n_workers (int, optional): number of processes. Defaults to
+            `min(n_folds, cpu_count)`
+        **hyperparams: hyper-parameters forwarded to `lgb.LGBMRegressor`
+
+    Returns:
+        Tuple: metrics per fold, and MAE per `pickup_location_id` aggregated
+        over all folds
+    """
+    df = df.sort_values('pickup_hour', kind='stable')
+
+    feature_columns = [
+        c for c in df.columns
+        if c not in (target_column_name, 'pickup_hour', 'pickup_location_id')
+    ]
+    X = np.ascontiguousarray(df[feature_columns].to_numpy(dtype=np.float32))
+    y = df[target_column_name].to_numpy(dtype=np.float32)
+    location_codes, location_ids = pd.factorize(df['pickup_location_id'])
+
+    folds = get_rolling_origin_folds(df['pickup_hour'].values, n_folds, val_hours)
+
+    n_cpus = os.cpu_count() or 1
+    n_workers = n_workers or min(n_folds, n_cpus)
+    hyperparams = {'verbose': -1, **hyperparams}
+    hyperparams['n_jobs'] = max(1, n_cpus // n_workers)
+
+    with tempfile.TemporaryDirectory(prefix='cv_') as data_dir:
+        for name, values in (('X', X), ('y', y), ('location_codes', location_codes)):
+            np.save(Path(data_dir) / f'{name}.npy', values)
+
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            mp_context=mp.get_context('forkserver'),
+            initializer=_init_fold_worker,
+            initargs=(data_dir, len(location_ids), hyperparams),
+        ) as executor:
+            futures = [
+                executor.submit(_run_fold, fold_id, train_stop, val_stop)
+                for fold_id, (train_stop, val_stop) in enumerate(folds)
+            ]
+            results = [future.result() for future in futures]
+
+    location_abs_error = np.sum([r.pop('location_abs_error') for r in results], axis=0)
+    location_count = np.sum([r.pop('location_count') for r in results], axis=0)
+
+    metrics_per_fold = pd.DataFrame(results)
+
+    seen = location_count > 0
+    metrics_per_location = pd.DataFrame({
+        'pickup_location_id': location_ids[seen],
+        'n_val': location_count[seen],
+        'mae': location_abs_error[seen] / location_count[seen],
+    }).sort_values('mae', ascending=False, ignore_index=True)
+
+    return metrics_per_fold, metrics_per_location
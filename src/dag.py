@@ -0,0 +1,207 @@
+import hashlib
+import json
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import sys
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.paths import DATA_CACHE_DIR
+from src.fingerprint import hash_file, file_stat
+
+DEFAULT_STATE_PATH = Path(DATA_CACHE_DIR) / 'dag_state.json'
+DEFAULT_MANIFEST_DIR = Path(DATA_CACHE_DIR) / 'dag_runs'
+
+
+@dataclass
+class Stage:
+    """
+    One step of a pipeline DAG.
+
+    Args:
+        name: unique name of the stage
+        fn: called as `fn(**params)`; must write every path in `outputs`
+        inputs: files the stage reads. Source files of the code the stage
+            runs can be listed too, so code changes also re-run it
+        outputs: files the stage writes. A stage depends on the stages that
+            write its inputs
+        params: keyword arguments of `fn`, part of the fingerprint
+    """
+    name: str
+    fn: Callable[..., None]
+    inputs: List[Path] = field(default_factory=list)
+    outputs: List[Path] = field(default_factory=list)
+    params: dict = field(default_factory=dict)
+
+
+class FileHasher:
+    """
+    sha256 of files, remembered by (size, mtime) across runs, so unchanged
+    files are never read again.
+    """
+    def __init__(self, known: Optional[dict] = None):
+        self.known = dict(known or {})
+        self._lock = threading.Lock()
+
+    def __call__(self, path: Path) -> Optional[str]:
+        path = Path(path)
+        if not path.exists():
+            return None
+        stat = file_stat(path)
+        with self._lock:
+            entry = self.known.get(str(path))
+        if entry is not None and entry['stat'] == stat:
+            return entry['sha256']
+        sha256 = hash_file(path)
+        with self._lock:
+            self.known[str(path)] = {'stat': stat, 'sha256': sha256}
+        return sha256
+
+
+def stage_fingerprint(stage: Stage, hasher: FileHasher) -> str:
+    """Hash of the stage name, its parameters and the content of its inputs."""
+    digest = hashlib.sha256()
+    digest.update(stage.name.encode())
+    digest.update(json.dumps(stage.params, sort_keys=True, default=str).encode())
+    for path in sorted(map(str, stage.inputs)):
+        digest.update(f'{path}:{hasher(path)}'.encode())
+    return digest.hexdigest()
+
+
+def _dependencies(stages: List[Stage]) -> Dict[str, set]:
+    writers = {}
+    for stage in stages:
+        for output in stage.outputs:
+            if str(output) in writers:
+                raise ValueError(f'{output} is written by {writers[str(output)]} and {stage.name}')
+            writers[str(output)] = stage.name
+    dependencies = {
+        stage.name: {writers[str(i)] for i in stage.inputs if str(i) in writers} - {stage.name}
+        for stage in stages
+    }
+
+    # detecta ciclos con un orden topológico
+    pending, done = dict(dependencies), set()
+    while pending:
+        ready = [name for name, deps in pending.items() if deps <= done]
+        if not ready:
+            raise ValueError(f'Cycle between stages {sorted(pending)}')
+        for name in ready:
+            done.add(name)
+            del pending[name]
+    return dependencies
+
+
+def run_dag(
+    stages: List[Stage],
+    max_workers: int = 4,
+    force: bool = False,
+    state_path: Path = DEFAULT_STATE_PATH,
+    manifest_dir: Path = DEFAULT_MANIFEST_DIR,
+) -> dict:
+    """
+    Runs `stages` in dependency order, with independent stages running
+    concurrently in up to `max_workers` threads.
+
+    A stage is skipped when its fingerprint (name, params and content of its
+    inputs) is the same as in its last successful run and its outputs still
+    have the content it wrote then. Since inputs are compared by content, a
+    stage whose upstream re-ran but produced identical files is skipped too.
+
+    After the run, a manifest with the status, duration and fingerprint of
+    every stage is written to `manifest_dir`.
+
+    Args:
+        force (bool): run every stage, even if unchanged
+
+    Returns:
+        dict: the run manifest
+    """
+    dependencies = _dependencies(stages)
+    stages_by_name = {stage.name: stage for stage in stages}
+
+    state_path = Path(state_path)
+    state = json.loads(state_path.read_text()) if state_path.exists() else {}
+    hasher = FileHasher(state.get('files'))
+    stage_state = state.get('stages', {})
+
+    started_at, run_started = datetime.now(timezone.utc), time.perf_counter()
+    results = {}
+
+    def run_stage(stage: Stage) -> dict:
+        started = time.perf_counter()
+        fingerprint = stage_fingerprint(stage, hasher)
+        previous = stage_state.get(stage.name, {})
+        unchanged = not force and previous.get('fingerprint') == fingerprint and all(
+            hasher(output) is not None and hasher(output) == previous.get('outputs', {}).get(str(output))
+            for output in stage.outputs
+        )
+        if unchanged:
+            return {'status': 'skipped', 'fingerprint': fingerprint,
+                    'seconds': time.perf_counter() - started}
+
+        print(f'[DAG] Ejecutando {stage.name}')
+        try:
+            stage.fn(**stage.params)
+        except SystemExit as e:
+            if e.code not in (0, None):
+                raise RuntimeError(f'{stage.name} exited with code {e.code}')
+
+        missing = [str(o) for o in stage.outputs if not Path(o).exists()]
+        if missing:
+            raise RuntimeError(f'{stage.name} did not write {missing}')
+
+        stage_state[stage.name] = {
+            'fingerprint': fingerprint,
+            'outputs': {str(o): hasher(o) for o in stage.outputs},
+        }
+        return {'status': 'ran', 'fingerprint': fingerprint,
+                'seconds': time.perf_counter() - started}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        running = {}
+        while len(results) < len(stages):
+            for name, deps in dependencies.items():
+                if name in results or name in running.values():
+                    continue
+                if any(results.get(d, {}).get('status') in ('failed', 'not_run') for d in deps):
+                    results[name] = {'status': 'not_run', 'seconds': 0.0}
+                elif all(d in results for d in deps):
+                    running[executor.submit(run_stage, stages_by_name[name])] = name
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except Exception:
+                    results[name] = {'status': 'failed', 'seconds': 0.0, 'error': traceback.format_exc()}
+                    print(f'[DAG] {name} ha fallado:\n{results[name]["error"]}')
+                print(f'[DAG] {name}: {results[name]["status"]} ({results[name]["seconds"]:.2f} s)')
+
+    # solo se guarda el estado de las etapas que terminaron bien
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = state_path.with_suffix('.tmp')
+    tmp_path.write_text(json.dumps({'stages': stage_state, 'files': hasher.known}, indent=2))
+    tmp_path.replace(state_path)
+
+    manifest = {
+        'started_at': started_at.isoformat(),
+        'seconds': time.perf_counter() - run_started,
+        'stages': {stage.name: results[stage.name] for stage in stages},
+    }
+    manifest_dir = Path(manifest_dir)
+    manifest_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = manifest_dir / f'run_{started_at:%Y%m%dT%H%M%S%f}.json'
+    manifest_path.write_text(json.dumps(manifest, indent=2))
+    print(f'[DAG] Manifiesto en {manifest_path} ({manifest["seconds"]:.2f} s)')
+
+    return manifest
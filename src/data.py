@@ -1,20 +1,28 @@
 import pandas as pd
-import requests
-from tqdm import tqdm
 from typing import Tuple
 from typing import Optional, List
-from paths import RAW_DATA_DIR, TRANSFORMED_DATA_DIR
 from pathlib import Path
 from datetime import datetime, timedelta
-from dateutil.relativedelta import relativedelta
+from functools import lru_cache
 import numpy as np
 
+import sys
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+# requests, tqdm y dateutil se importan dentro de las funciones que los usan,
+# para que importar este módulo sea rápido
+from src.paths import RAW_DATA_DIR, TRANSFORMED_DATA_DIR, ensure_data_dirs
+from src.data_validation import validate_rides
+
 # ---------------------------------------------------
 # Descargar datos
 # ---------------------------------------------------
 
 
 def download_one_file_of_raw_data(year: int, month: int) -> Path:
+    import requests
+
+    ensure_data_dirs()
     url = f"https://d37ci6vzurychx.cloudfront.net/trip-data/yellow_tripdata_{year}-{month:02}.parquet"
     output_path = RAW_DATA_DIR / f"rides_{year}_{month:02}.parquet"
 
@@ -48,12 +56,12 @@ def load_data(year: int, month: int) -> pd.DataFrame:
 
 
 def validate_data(df: pd.DataFrame, min_date="2024-01-01", max_date="2024-02-01") -> pd.DataFrame:
-    df = df[['tpep_pickup_datetime', 'PULocationID']].copy()
-    df = df.rename(columns={
-        'tpep_pickup_datetime': 'pickup_datetime',
-        'PULocationID': 'pickup_location_id'
-    })
-    df = df[(df['pickup_datetime'] >= min_date) & (df['pickup_datetime'] < max_date)]
+    df, report = validate_rides(
+        df, min_date, max_date,
+        datetime_column='tpep_pickup_datetime',
+        location_column='PULocationID',
+    )
+    print(f'Validación: {report.summary()}')
     return df
 
 
@@ -63,14 +71,17 @@ def validate_raw_data(
     month: int,
 ) -> pd.DataFrame:
     """
-    Removes rows with pickup_datetimes outside their valid range
+    Removes rows with pickup_datetimes outside their valid range, null values
+    and invalid or unknown pickup locations (see `validate_rides`)
     """
+    from dateutil.relativedelta import relativedelta
+
     # keep only rides for this month
-    this_month_start = f'{year}-{month:02d}-01'
-    next_month_start = f'{year}-{month+1:02d}-01' if month < 12 else f'{year+1}-01-01'
-    rides = rides[rides.pickup_datetime >= this_month_start]
-    rides = rides[rides.pickup_datetime < next_month_start]
-    
+    this_month_start = datetime(year, month, 1)
+    next_month_start = this_month_start + relativedelta(months=1)
+    rides, report = validate_rides(rides, this_month_start, next_month_start)
+    print(f'Validación {year}-{month:02d}: {report.summary()}')
+
     return rides
 
 # ---------------------------------------------------
@@ -186,16 +197,34 @@ def load_raw_data_v2(
 # Fill missing values de fechas/horas
 # ---------------------------------------------------
 
-def add_missing_slots(agg_rides: pd.DataFrame) -> pd.DataFrame:
+# motores para las transformaciones: 'pandas' (por defecto) o 'polars'
+# (multihilo, ver src/data_polars.py). Ambos devuelven exactamente lo mismo.
+ENGINES = ('pandas', 'polars')
+
+
+def _check_engine(engine: str):
+    if engine not in ENGINES:
+        raise ValueError(f"engine must be one of {ENGINES}, got '{engine}'")
+
+
+def add_missing_slots(agg_rides: pd.DataFrame, engine: str = 'pandas') -> pd.DataFrame:
     """
     Rellena las horas faltantes para cada localización con 0 viajes.
 
     Args:
         agg_rides (pd.DataFrame): DataFrame con columnas ['pickup_hour', 'pickup_location_id', 'rides']
+        engine (str): 'pandas' o 'polars'
 
     Returns:
         pd.DataFrame: DataFrame con huecos rellenados por hora y localización.
     """
+    _check_engine(engine)
+    if engine == 'polars':
+        from src.data_polars import add_missing_slots as add_missing_slots_polars
+        return add_missing_slots_polars(agg_rides)
+
+    from tqdm import tqdm
+
     location_ids = agg_rides['pickup_location_id'].unique()
     full_range = pd.date_range(
         agg_rides['pickup_hour'].min(),
@@ -220,17 +249,23 @@ def add_missing_slots(agg_rides: pd.DataFrame) -> pd.DataFrame:
 # ---------------------------------------------------
 
 
-def transform_to_time_series(rides: pd.DataFrame) -> pd.DataFrame:
+def transform_to_time_series(rides: pd.DataFrame, engine: str = 'pandas') -> pd.DataFrame:
     """
     Transforma los datos en una serie temporal con número de viajes por hora y localización.
     Llama internamente a add_missing_slots para rellenar los huecos.
 
     Args:
         rides (pd.DataFrame): DataFrame con columnas ['pickup_datetime', 'pickup_location_id']
+        engine (str): 'pandas' o 'polars'
 
     Returns:
         pd.DataFrame: DataFrame con columnas ['pickup_hour', 'pickup_location_id', 'rides']
     """
+    _check_engine(engine)
+    if engine == 'polars':
+        from src.data_polars import transform_to_time_series as transform_to_time_series_polars
+        return transform_to_time_series_polars(rides)
+
     # Redondear a la hora más cercana
     rides['pickup_hour'] = rides['pickup_datetime'].dt.floor('H')
 
@@ -249,7 +284,7 @@ def transform_to_time_series(rides: pd.DataFrame) -> pd.DataFrame:
 # Generar lags
 # ---------------------------------------------------
 
-def create_lag_features(df: pd.DataFrame, n_lags: int = 24) -> pd.DataFrame:
+def create_lag_features(df: pd.DataFrame, n_lags: int = 24, engine: str = 'pandas') -> pd.DataFrame:
     """
     Crea n_lags features con retrasos (lags) para la serie temporal de rides.
     La columna target será el valor actual a predecir.
@@ -257,11 +292,19 @@ def create_lag_features(df: pd.DataFrame, n_lags: int = 24) -> pd.DataFrame:
     Args:
         df (pd.DataFrame): DataFrame con columnas ['pickup_hour', 'pickup_location_id', 'rides']
         n_lags (int): número de lags que queremos generar.
+        engine (str): 'pandas' o 'polars'
 
     Returns:
         pd.DataFrame: dataframe con columnas rides_previous_N_hour y target
     """
-    df = df.sort_values('pickup_hour').reset_index(drop=True)
+    _check_engine(engine)
+    if engine == 'polars':
+        from src.data_polars import create_lag_features as create_lag_features_polars
+        return create_lag_features_polars(df, n_lags=n_lags)
+
+    # orden estable: las filas de una misma hora mantienen su orden relativo,
+    # así el resultado no depende del algoritmo de ordenación (ni del motor)
+    df = df.sort_values('pickup_hour', kind='stable').reset_index(drop=True)
     
     for lag in range(n_lags, 0, -1):
         df[f'rides_previous_{lag}_hour'] = df['rides'].shift(lag)
@@ -282,7 +325,8 @@ import pandas as pd
 def transform_to_features_and_target(
     ts_data: pd.DataFrame, 
     location_id: Optional[int] = None, 
-    n_lags: int = 24
+    n_lags: int = 24,
+    engine: str = 'pandas',
 ) -> Tuple[pd.DataFrame, pd.Series, pd.DataFrame]:
     """
     Prepara los datos como features y target para entrenar un modelo.
@@ -292,19 +336,25 @@ def transform_to_features_and_target(
         ts_data (pd.DataFrame): DataFrame con ['pickup_hour', 'pickup_location_id', 'rides']
         location_id (int, optional): ID de la zona a usar. Si None, se usan todos los datos.
         n_lags (int): número de lags (horas previas) a usar como features
+        engine (str): 'pandas' o 'polars'
 
     Returns:
         Tuple: X (features), y (target), df_location (datos procesados)
     """
-    df_location = ts_data.copy()
+    _check_engine(engine)
+    if engine == 'polars':
+        from src.data_polars import lag_features_of_location
+        df_location = lag_features_of_location(ts_data, location_id=location_id, n_lags=n_lags)
+    else:
+        df_location = ts_data.copy()
 
-    if location_id is not None:
-        df_location = df_location[df_location.pickup_location_id == location_id].copy()
+        if location_id is not None:
+            df_location = df_location[df_location.pickup_location_id == location_id].copy()
 
-    # Aseguramos orden correcto antes de crear lags
-    df_location = df_location.sort_values('pickup_hour').reset_index(drop=True)
+        # Aseguramos orden correcto antes de crear lags
+        df_location = df_location.sort_values('pickup_hour', kind='stable').reset_index(drop=True)
 
-    df_location = create_lag_features(df_location, n_lags=n_lags)
+        df_location = create_lag_features(df_location, n_lags=n_lags)
 
     X = df_location.drop(columns=['target', 'pickup_hour', 'pickup_location_id'])
     y = df_location['target']
@@ -329,6 +379,8 @@ def load_last_12_months_data(end_date: datetime, months_ago: int = 12) -> pd.Dat
         pd.DataFrame: DataFrame combinado y validado con columnas:
                       ['pickup_datetime', 'pickup_location_id']
     """
+    from dateutil.relativedelta import relativedelta
+
     rides_all = pd.DataFrame()
 
     # Calcular el primer mes a cargar (12 meses atrás)
@@ -374,6 +426,118 @@ def load_last_12_months_data(end_date: datetime, months_ago: int = 12) -> pd.Dat
     rides_all = rides_all.sort_values("pickup_datetime").reset_index(drop=True)
     return rides_all
 
+# ---------------------------------------------------
+# Lectura por ventana temporal de los datos crudos
+# ---------------------------------------------------
+
+@lru_cache(maxsize=8)
+def _raw_file_row_group_ranges(path: str, mtime_ns: int) -> List[Tuple[datetime, datetime]]:
+    """(min, max) `tpep_pickup_datetime` of each row group, from the parquet metadata"""
+    import pyarrow.parquet as pq
+
+    metadata = pq.ParquetFile(path).metadata
+    column = metadata.schema.names.index('tpep_pickup_datetime')
+    ranges = []
+    for i in range(metadata.num_row_groups):
+        stats = metadata.row_group(i).column(column).statistics
+        if stats is None or not stats.has_min_max:
+            ranges.append((None, None))
+        else:
+            ranges.append((stats.min, stats.max))
+    return ranges
+
+
+@lru_cache(maxsize=32)
+def _read_raw_row_group(path: str, mtime_ns: int, row_group: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Decodes the pickup time and location columns of one row group, sorted by
+    pickup time. Kept in memory (LRU) across calls, so a window inside an
+    already decoded row group costs two binary searches.
+    """
+    import pyarrow.parquet as pq
+
+    table = pq.ParquetFile(path).read_row_group(
+        row_group, columns=['tpep_pickup_datetime', 'PULocationID']
+    )
+    pickup_datetime = table.column('tpep_pickup_datetime').to_numpy()
+    pickup_location_id = table.column('PULocationID').to_numpy()
+
+    order = np.argsort(pickup_datetime, kind='stable')
+    pickup_datetime, pickup_location_id = pickup_datetime[order], pickup_location_id[order]
+    # los arrays se comparten entre llamadas: que nadie los modifique
+    pickup_datetime.setflags(write=False)
+    pickup_location_id.setflags(write=False)
+
+    return pickup_datetime, pickup_location_id
+
+
+def load_raw_data_window(from_date: datetime, to_date: datetime) -> pd.DataFrame:
+    """
+    Loads the raw rides with `from_date <= pickup_datetime < to_date`.
+
+    Only the row groups whose pickup time statistics overlap the window are
+    read, and only the two columns we use. Decoded row groups are kept in an
+    in-process LRU cache, sorted by pickup time, so repeated calls (e.g. the
+    hourly simulation job) only slice the window out of memory. As in
+    `validate_raw_data`, rows of a monthly file whose pickup time falls
+    outside that month are dropped.
+
+    Returns:
+        pd.DataFrame: `pickup_datetime` and `pickup_location_id`, sorted by
+        `pickup_datetime`
+    """
+    from dateutil.relativedelta import relativedelta
+
+    # los ficheros crudos tienen fechas sin zona horaria
+    from_date, to_date = (
+        ts.tz_convert('UTC').tz_localize(None) if ts.tzinfo is not None else ts
+        for ts in (pd.Timestamp(from_date), pd.Timestamp(to_date))
+    )
+    pickup_datetimes, pickup_location_ids = [], []
+
+    month_start = from_date.replace(day=1, hour=0, minute=0, second=0, microsecond=0, nanosecond=0)
+    while month_start < to_date:
+        month_end = month_start + relativedelta(months=1)
+        window_start = np.datetime64(max(from_date, month_start))
+        window_end = np.datetime64(min(to_date, month_end))
+
+        path = RAW_DATA_DIR / f'rides_{month_start.year}_{month_start.month:02}.parquet'
+        if not path.exists():
+            try:
+                download_one_file_of_raw_data(month_start.year, month_start.month)
+            except Exception:
+                print(f'{month_start.year}-{month_start.month:02d} file is not available')
+                month_start = month_end
+                continue
+
+        mtime_ns = path.stat().st_mtime_ns
+        for row_group, (rg_min, rg_max) in enumerate(_raw_file_row_group_ranges(str(path), mtime_ns)):
+            if rg_min is not None and (
+                np.datetime64(rg_max) < window_start or np.datetime64(rg_min) >= window_end
+            ):
+                continue
+            pickup_datetime, pickup_location_id = _read_raw_row_group(str(path), mtime_ns, row_group)
+            start, end = np.searchsorted(pickup_datetime, [window_start, window_end], side='left')
+            pickup_datetimes.append(pickup_datetime[start:end])
+            pickup_location_ids.append(pickup_location_id[start:end])
+
+        month_start = month_end
+
+    if not pickup_datetimes:
+        return pd.DataFrame(columns=['pickup_datetime', 'pickup_location_id'])
+
+    rides = pd.DataFrame({
+        'pickup_datetime': np.concatenate(pickup_datetimes),
+        'pickup_location_id': np.concatenate(pickup_location_ids),
+    })
+    if len(pickup_datetimes) > 1:
+        rides.sort_values('pickup_datetime', kind='stable', inplace=True, ignore_index=True)
+
+    # nulos y zonas inválidas; las fechas ya están dentro de la ventana
+    rides, _ = validate_rides(rides, from_date, to_date)
+    return rides
+
+
 def fetch_batch_raw_data(from_date: datetime, to_date: datetime) -> pd.DataFrame:
     """
     Simulate production data by sampling historical data from 52 weeks ago (i.e. 1 year)
@@ -382,13 +546,8 @@ def fetch_batch_raw_data(from_date: datetime, to_date: datetime) -> pd.DataFrame
     to_date_ = to_date - timedelta(days=7*52)
     print(f'{from_date=}, {to_date_=}') 
 
-    # Descargamos los 2 archivos del sitio web
-    rides = load_raw_data_v2(year=from_date_.year, months=from_date_.month)
-    rides = rides[rides.pickup_datetime >= from_date_]
-    rides_2 = load_raw_data_v2(year=to_date_.year, months=to_date_.month)
-    rides_2 = rides_2[rides_2.pickup_datetime < to_date_]
-
-    rides = pd.concat([rides, rides_2])
+    # Leemos solo la ventana [from_date_, to_date_) de los ficheros mensuales
+    rides = load_raw_data_window(from_date_, to_date_)
 
     # Cambiamos los datos para fingir que son datos recientes
     rides['pickup_datetime'] += timedelta(days=7*52)
@@ -429,6 +588,8 @@ def transform_ts_data_into_features_and_target(
     Slices and transposes data from time-series format into a (features, target)
     format that we can use to train Supervised ML models
     """
+    from tqdm import tqdm
+
     assert set(ts_data.columns) == {'pickup_hour', 'rides', 'pickup_location_id'}
 
     location_ids = ts_data['pickup_location_id'].unique()
@@ -0,0 +1,297 @@
+"""
+Polars implementation of the transforms of `src/data.py`, used when they are
+called with `engine='polars'`.
+
+Each transform is a lazy query plan that polars optimizes and runs on all the
+cores. Pandas frames come in through Arrow, and results go back to pandas with
+`split_blocks=True`, so numeric and datetime columns without nulls reuse the
+Arrow buffers instead of being copied.
+
+The output is identical to the pandas engine: same rows, row order, columns
+and dtypes. `check_parity` verifies it on synthetic data, and so do the tests
+in `tests/test_data_polars.py`.
+"""
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import polars as pl
+except ImportError as e:
+    raise ImportError(
+        "engine='polars' needs polars, install it with `poetry install -E polars`"
+    ) from e
+
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+
+def _to_pandas(df: pl.DataFrame) -> pd.DataFrame:
+    # un bloque por columna: las columnas sin nulos apuntan al buffer de Arrow
+    return df.to_pandas(split_blocks=True)
+
+
+def _float_dtype(dtype: pl.DataType) -> pl.DataType:
+    # pandas convierte a float64 las columnas enteras al desplazarlas (NaN)
+    return dtype if dtype in (pl.Float32, pl.Float64) else pl.Float64
+
+
+# ---------------------------------------------------
+# Planes lazy
+# ---------------------------------------------------
+
+def aggregate_rides(rides: pl.LazyFrame) -> pl.LazyFrame:
+    """Rides per (pickup_hour, pickup_location_id), sorted as pandas' groupby"""
+    return (
+        rides
+        .select(
+            pl.col('pickup_datetime').dt.truncate('1h').alias('pickup_hour'),
+            pl.col('pickup_location_id'),
+        )
+        # groupby de pandas descarta las claves nulas
+        .drop_nulls()
+        .group_by(['pickup_hour', 'pickup_location_id'])
+        .agg(pl.len().cast(pl.Int64).alias('rides'))
+        .sort(['pickup_hour', 'pickup_location_id'])
+    )
+
+
+def missing_slots_plan(agg_rides: pl.LazyFrame) -> pl.LazyFrame:
+    """
+    Every (location, hour) between the first and last hour, with 0 rides where
+    there was no data. Locations in order of first appearance and hours
+    ascending, as `add_missing_slots` of the pandas engine.
+    """
+    agg_rides = agg_rides.select(['pickup_hour', 'pickup_location_id', 'rides'])
+    hour_dtype = agg_rides.collect_schema()['pickup_hour']
+
+    locations = (
+        agg_rides
+        .select(pl.col('pickup_location_id').unique(maintain_order=True))
+        .with_row_index('_location_order')
+    )
+    hours = agg_rides.select(
+        pl.datetime_range(
+            pl.col('pickup_hour').min(), pl.col('pickup_hour').max(), interval='1h'
+        ).alias('pickup_hour')
+    )
+
+    return (
+        locations
+        .join(hours, how='cross')
+        .join(agg_rides, on=['pickup_location_id', 'pickup_hour'], how='left')
+        .with_columns(pl.col('rides').fill_null(0))
+        # el orden de los joins no está garantizado: se fija explícitamente
+        .sort(['_location_order', 'pickup_hour'])
+        .select(['pickup_hour', 'pickup_location_id', 'rides'])
+        # `pd.date_range` siempre devuelve ns, aunque los datos de TLC vengan en us
+        .with_columns(pl.col('pickup_hour').cast(pl.Datetime('ns', hour_dtype.time_zone)))
+    )
+
+
+def lag_features_plan(ts_data: pl.LazyFrame, n_lags: int = 24) -> pl.LazyFrame:
+    """Same lags as `create_lag_features` of the pandas engine"""
+    lag_dtype = _float_dtype(ts_data.collect_schema()['rides'])
+    return (
+        ts_data
+        # orden estable, como `sort_values(kind='stable')`
+        .sort('pickup_hour', maintain_order=True)
+        .with_columns([
+            pl.col('rides').shift(lag).cast(lag_dtype).alias(f'rides_previous_{lag}_hour')
+            for lag in range(n_lags, 0, -1)
+        ])
+        .with_columns(pl.col('rides').alias('target'))
+        .drop('rides')
+        # dropna de pandas trata igual NaN y nulos
+        .with_columns(pl.col(pl.Float32, pl.Float64).fill_nan(None))
+        .drop_nulls()
+    )
+
+
+# ---------------------------------------------------
+# Misma interfaz que src/data.py
+# ---------------------------------------------------
+
+def add_missing_slots(agg_rides: pd.DataFrame) -> pd.DataFrame:
+    plan = missing_slots_plan(pl.from_pandas(agg_rides).lazy())
+    return _to_pandas(plan.collect())
+
+
+def transform_to_time_series(rides: pd.DataFrame) -> pd.DataFrame:
+    rides = pl.from_pandas(rides[['pickup_datetime', 'pickup_location_id']]).lazy()
+    plan = missing_slots_plan(aggregate_rides(rides))
+    return _to_pandas(plan.collect())
+
+
+def create_lag_features(df: pd.DataFrame, n_lags: int = 24) -> pd.DataFrame:
+    plan = lag_features_plan(pl.from_pandas(df).lazy(), n_lags=n_lags)
+    return _to_pandas(plan.collect())
+
+
+def lag_features_of_location(
+    ts_data: pd.DataFrame,
+    location_id: Optional[int] = None,
+    n_lags: int = 24,
+) -> pd.DataFrame:
+    """Filter + lags of `transform_to_features_and_target`, in one plan"""
+    plan = pl.from_pandas(ts_data).lazy()
+    if location_id is not None:
+        plan = plan.filter(pl.col('pickup_location_id') == location_id)
+    return _to_pandas(lag_features_plan(plan, n_lags=n_lags).collect())
+
+
+# ---------------------------------------------------
+# Paridad y benchmark
+# ---------------------------------------------------
+
+def make_synthetic_rides(
+    n_rides: int,
+    n_locations: int = 265,
+    n_days: int = 28,
+    seed: int = 42,
+    unit: str = 'ns',
+) -> pd.DataFrame:
+    """
+    Random rides with the schema of `validate_rides`: `pickup_datetime` with
+    second resolution and int32 `pickup_location_id`. Location popularity is
+    skewed, so some locations have empty hours to fill. `unit` is the
+    resolution of the datetime column; TLC parquet files are read as `us`.
+    """
+    rng = np.random.default_rng(seed)
+    start = np.datetime64('2024-01-01T00:00:00', 's')
+    seconds = rng.integers(0, n_days * 24 * 3600, size=n_rides)
+    weights = 1 / np.arange(1, n_locations + 1)
+    locations = rng.choice(np.arange(1, n_locations + 1), size=n_rides, p=weights / weights.sum())
+    return pd.DataFrame({
+        'pickup_datetime': (start + seconds).astype(f'datetime64[{unit}]'),
+        'pickup_location_id': locations.astype(np.int32),
+    })
+
+
+def _run_engine(rides: pd.DataFrame, engine: str, n_lags: int) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    from src.data import transform_to_time_series, transform_to_features_and_target
+
+    ts_data = transform_to_time_series(rides.copy(), engine=engine)
+    _, _, features = transform_to_features_and_target(ts_data, n_lags=n_lags, engine=engine)
+    return ts_data, features
+
+
+def check_parity(
+    sizes: List[int] = (1_000, 100_000),
+    n_lags: int = 24,
+    units: List[str] = ('ns', 'us'),
+) -> pd.DataFrame:
+    """
+    Runs every transform with both engines on synthetic rides, with every
+    datetime resolution in `units`, and checks the results are identical
+    (values, dtypes, column and row order). Also checks a single location and
+    float rides.
+
+    Raises:
+        AssertionError: on the first difference
+
+    Returns:
+        pd.DataFrame: one row per case checked
+    """
+    from src.data import add_missing_slots, create_lag_features, transform_to_features_and_target
+
+    checked = []
+    for unit in units:
+        for n_rides in sizes:
+            rides = make_synthetic_rides(n_rides, unit=unit)
+            ts_pandas, features_pandas = _run_engine(rides, 'pandas', n_lags)
+            ts_polars, features_polars = _run_engine(rides, 'polars', n_lags)
+            pd.testing.assert_frame_equal(ts_pandas, ts_polars)
+            pd.testing.assert_frame_equal(features_pandas, features_polars)
+            checked.append({
+                'unit': unit, 'case': 'time_series + features', 'n_rides': n_rides, 'n_rows': len(features_pandas),
+            })
+
+            # huecos en agregados ya calculados
+            agg_rides = ts_pandas[ts_pandas['rides'] > 0].reset_index(drop=True)
+            pd.testing.assert_frame_equal(
+                add_missing_slots(agg_rides), add_missing_slots(agg_rides, engine='polars')
+            )
+            checked.append({
+                'unit': unit, 'case': 'add_missing_slots', 'n_rides': n_rides, 'n_rows': len(ts_pandas),
+            })
+
+            location_id = int(ts_pandas['pickup_location_id'].iloc[0])
+            X_a, y_a, df_a = transform_to_features_and_target(ts_pandas, location_id, n_lags)
+            X_b, y_b, df_b = transform_to_features_and_target(ts_pandas, location_id, n_lags, engine='polars')
+            pd.testing.assert_frame_equal(X_a, X_b)
+            pd.testing.assert_series_equal(y_a, y_b)
+            pd.testing.assert_frame_equal(df_a, df_b)
+            checked.append({
+                'unit': unit, 'case': 'single location', 'n_rides': n_rides, 'n_rows': len(df_a),
+            })
+
+            ts_float = ts_pandas.astype({'rides': np.float32})
+            pd.testing.assert_frame_equal(
+                create_lag_features(ts_float, n_lags), create_lag_features(ts_float, n_lags, engine='polars')
+            )
+            checked.append({
+                'unit': unit, 'case': 'float32 rides', 'n_rides': n_rides, 'n_rows': len(ts_float),
+            })
+
+    return pd.DataFrame(checked)
+
+
+def benchmark_engines(
+    sizes: List[int] = (100_000, 1_000_000, 3_000_000),
+    n_runs: int = 3,
+    n_lags: int = 24,
+) -> pd.DataFrame:
+    """
+    Wall time of `transform_to_time_series` and
+    `transform_to_features_and_target` with each engine, for synthetic months
+    of `sizes` rides (a real month has ~3M). Best of `n_runs`.
+
+    Returns:
+        pd.DataFrame: one row per (n_rides, engine, step) with the seconds and
+        the speedup of polars over pandas
+    """
+    from src.data import transform_to_time_series, transform_to_features_and_target
+
+    rows = []
+    for n_rides in sizes:
+        rides = make_synthetic_rides(n_rides)
+        for engine in ('pandas', 'polars'):
+            timings = {'time_series': [], 'features': []}
+            for _ in range(n_runs):
+                start = time.perf_counter()
+                ts_data = transform_to_time_series(rides.copy(), engine=engine)
+                timings['time_series'].append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                transform_to_features_and_target(ts_data, n_lags=n_lags, engine=engine)
+                timings['features'].append(time.perf_counter() - start)
+
+            for step, t in timings.items():
+                rows.append({'n_rides': n_rides, 'engine': engine, 'step': step, 'seconds': min(t)})
+
+    results = pd.DataFrame(rows)
+    pandas_seconds = results[results['engine'] == 'pandas'].set_index(['n_rides', 'step'])['seconds']
+    results['speedup'] = [
+        pandas_seconds[(r.n_rides, r.step)] / r.seconds for r in results.itertuples()
+    ]
+    return results
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Parity check and benchmark of the pandas and polars engines')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000, 3_000_000])
+    parser.add_argument('--n-runs', type=int, default=3)
+    parser.add_argument('--skip-benchmark', action='store_true')
+    args = parser.parse_args()
+
+    print(check_parity().to_string(index=False))
+    print('[PARIDAD] Ambos motores devuelven exactamente lo mismo')
+
+    if not args.skip_benchmark:
+        print(benchmark_engines(args.sizes, args.n_runs).to_string(index=False))
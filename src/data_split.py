@@ -1,5 +1,7 @@
 from datetime import datetime
-from typing import Tuple
+from typing import List, Tuple
+
+import numpy as np
 import pandas as pd
 
 
@@ -30,3 +32,48 @@ def train_test_split(
     y_test = test_data[target_column_name]
 
     return X_train, y_train, X_test, y_test
+
+
+def get_rolling_origin_folds(
+    pickup_hours: np.ndarray,
+    n_folds: int,
+    val_hours: int = 7 * 24,
+) -> List[Tuple[int, int]]:
+    """
+    Builds rolling-origin (expanding window) folds over rows sorted by
+    `pickup_hour`.
+
+    The last `n_folds * val_hours` hours are split into `n_folds` consecutive
+    validation windows. Fold k trains on every row before its cutoff and
+    validates on the `val_hours` that follow it. Because rows are sorted, each
+    fold is just a pair of positions, so train and validation sets are plain
+    slices `[:train_stop]` and `[train_stop:val_stop]` (views, no copies).
+
+    Args:
+        pickup_hours (np.ndarray): sorted `pickup_hour` values, one per row
+        n_folds (int): number of folds
+        val_hours (int): length of each validation window, in hours
+
+    Returns:
+        List[Tuple[int, int]]: `(train_stop, val_stop)` positions, one per fold
+    """
+    pickup_hours = np.asarray(pickup_hours)
+    if len(pickup_hours) == 0:
+        raise ValueError('No hay datos para construir los folds')
+    if np.any(pickup_hours[1:] < pickup_hours[:-1]):
+        raise ValueError('`pickup_hours` debe estar ordenado')
+
+    step = np.timedelta64(val_hours, 'h')
+    last_hour = pickup_hours[-1]
+    folds = []
+    for k in range(n_folds, 0, -1):
+        cutoff = last_hour - k * step + np.timedelta64(1, 'h')
+        train_stop = int(np.searchsorted(pickup_hours, cutoff, side='left'))
+        val_stop = int(np.searchsorted(pickup_hours, cutoff + step, side='left'))
+        if train_stop == 0:
+            raise ValueError(
+                f'No hay suficiente histórico para {n_folds} folds de {val_hours} horas'
+            )
+        folds.append((train_stop, val_stop))
+
+    return folds
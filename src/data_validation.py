@@ -0,0 +1,90 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+# zonas de taxi válidas: 264 y 265 son las zonas "Unknown" / "Outside of NYC"
+MIN_LOCATION_ID = 1
+MAX_LOCATION_ID = 265
+UNKNOWN_LOCATION_IDS = (264, 265)
+
+
+@dataclass
+class ValidationReport:
+    """
+    Result of `validate_rides`. A row can break several rules, so the
+    per-rule counts may add up to more than `n_rejected`.
+    """
+    n_rows: int
+    n_valid: int
+    rejected: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def n_rejected(self) -> int:
+        return self.n_rows - self.n_valid
+
+    def summary(self) -> str:
+        pct = 100 * self.n_rejected / self.n_rows if self.n_rows else 0.0
+        rules = ', '.join(f'{rule}={count}' for rule, count in self.rejected.items() if count)
+        return f'{self.n_valid}/{self.n_rows} filas válidas ({pct:.2f}% descartadas) {rules}'.rstrip()
+
+
+def validate_rides(
+    rides: pd.DataFrame,
+    min_date: datetime,
+    max_date: datetime,
+    datetime_column: str = 'pickup_datetime',
+    location_column: str = 'pickup_location_id',
+) -> Tuple[pd.DataFrame, ValidationReport]:
+    """
+    Evaluates every data quality rule over the pickup time and location
+    columns with numpy masks, and keeps the rows that pass all of them:
+
+    - null_pickup_datetime / null_pickup_location_id
+    - invalid_location_id: outside 1-265
+    - unknown_location: zones 264 and 265, which have no geometry
+    - outside_period: pickup time outside `[min_date, max_date)`
+
+    Args:
+        rides (pd.DataFrame): raw rides. Only `datetime_column` and
+            `location_column` are read, so the raw TLC column names can be
+            passed directly
+        min_date (datetime): first valid pickup time
+        max_date (datetime): first invalid pickup time after `min_date`
+
+    Returns:
+        Tuple: clean rides with columns ['pickup_datetime',
+        'pickup_location_id'], and the `ValidationReport`
+    """
+    pickup_datetime = rides[datetime_column].to_numpy()
+    location = rides[location_column]
+    null_location = location.isna().to_numpy()
+    location = location.to_numpy()
+
+    # comparaciones con NaT / NaN dan False: los nulos solo cuentan en su regla
+    masks = {
+        'null_pickup_datetime': np.isnat(pickup_datetime),
+        'null_pickup_location_id': null_location,
+        'invalid_location_id': (location < MIN_LOCATION_ID) | (location > MAX_LOCATION_ID),
+        'unknown_location': (location >= min(UNKNOWN_LOCATION_IDS)) & (location <= max(UNKNOWN_LOCATION_IDS)),
+        'outside_period': (pickup_datetime < np.datetime64(pd.Timestamp(min_date)))
+                          | (pickup_datetime >= np.datetime64(pd.Timestamp(max_date))),
+    }
+
+    invalid = np.zeros(len(rides), dtype=bool)
+    for mask in masks.values():
+        invalid |= mask
+    valid = ~invalid
+
+    clean = pd.DataFrame({
+        'pickup_datetime': pickup_datetime[valid],
+        'pickup_location_id': location[valid].astype(np.int32, copy=False),
+    })
+    report = ValidationReport(
+        n_rows=len(rides),
+        n_valid=len(clean),
+        rejected={rule: int(np.count_nonzero(mask)) for rule, mask in masks.items()},
+    )
+    return clean, report
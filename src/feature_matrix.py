@@ -0,0 +1,191 @@
+import json
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+import sys
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+# formatos de intercambio entre pipelines:
+# - parquet: X.parquet / y.parquet (por defecto)
+# - npy: matriz float32 C-contigua (X.npy) + esquema JSON (X.schema.json),
+#   que se abre con mmap y se entrega a LightGBM sin copias
+FEATURE_FORMATS = ('parquet', 'npy')
+
+# filas por row group de X.parquet: la inferencia por lotes lee de row group
+# en row group, así que esto acota su memoria (pandas usa 1M por defecto)
+PARQUET_ROW_GROUP_SIZE = 65_536
+
+
+def _check_format(format: str):
+    if format not in FEATURE_FORMATS:
+        raise ValueError(f"format must be one of {FEATURE_FORMATS}, got '{format}'")
+
+
+def _paths(directory: Path, name: str):
+    directory = Path(directory)
+    return directory / f'{name}.npy', directory / f'{name}.schema.json'
+
+
+def _write_atomic(path: Path, write_fn):
+    tmp_path = path.with_name(f'{path.name}.tmp')
+    write_fn(tmp_path)
+    tmp_path.replace(path)
+
+
+def save_matrix(
+    data: Union[pd.DataFrame, pd.Series],
+    directory: Path,
+    name: str,
+    dtype: Optional[np.dtype] = np.float32,
+) -> Path:
+    """
+    Writes `data` as a C-contiguous `.npy` matrix plus a JSON schema with the
+    column names and their original dtypes.
+
+    Args:
+        data: numeric DataFrame (2-D matrix) or Series (1-D array)
+        dtype: dtype of the stored matrix; `None` keeps the dtype of `data`.
+            Lag features are ride counts, exact in float32 up to 2**24
+
+    Returns:
+        Path: path of the `.npy` file
+    """
+    npy_path, schema_path = _paths(directory, name)
+    npy_path.parent.mkdir(parents=True, exist_ok=True)
+
+    values = np.ascontiguousarray(data.to_numpy(dtype=dtype))
+    if isinstance(data, pd.Series):
+        schema = {'kind': 'series', 'name': data.name, 'dtypes': {str(data.name): str(data.dtype)}}
+    else:
+        schema = {
+            'kind': 'frame',
+            'columns': list(map(str, data.columns)),
+            'dtypes': {str(c): str(t) for c, t in data.dtypes.items()},
+        }
+    schema.update({'dtype': str(values.dtype), 'shape': list(values.shape)})
+
+    def _save(path):
+        with open(path, 'wb') as f:
+            np.save(f, values)
+
+    # primero la matriz y después el esquema: sin esquema no se lee nada a medias
+    _write_atomic(npy_path, _save)
+    _write_atomic(schema_path, lambda p: p.write_text(json.dumps(schema, indent=2)))
+    return npy_path
+
+
+def load_matrix(directory: Path, name: str, mmap: bool = True) -> Union[pd.DataFrame, pd.Series]:
+    """
+    Opens a matrix written by `save_matrix`.
+
+    With `mmap=True` the file is memory-mapped read-only and the DataFrame
+    (or Series) is a view of it: nothing is read until it is used, and the
+    pages come from the OS page cache. `pd.DataFrame.to_numpy()` of the result
+    returns the mapped array itself, so LightGBM consumes it without copies.
+    """
+    npy_path, schema_path = _paths(directory, name)
+    if not schema_path.exists():
+        raise FileNotFoundError(f'No se encontró el esquema: {schema_path}')
+    schema = json.loads(schema_path.read_text())
+
+    values = np.load(npy_path, mmap_mode='r' if mmap else None)
+    if list(values.shape) != schema['shape'] or str(values.dtype) != schema['dtype']:
+        raise ValueError(f'{npy_path} does not match its schema {schema_path}')
+
+    if schema['kind'] == 'series':
+        return pd.Series(values, name=schema['name'], copy=False)
+    return pd.DataFrame(values, columns=schema['columns'], copy=False)
+
+
+def save_features(X: pd.DataFrame, y: pd.Series, directory: Path, format: str = 'parquet'):
+    """Writes the outputs of the feature pipeline (X and target) in `format`"""
+    _check_format(format)
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    if format == 'npy':
+        save_matrix(X, directory, 'X')
+        save_matrix(y.rename('target'), directory, 'y', dtype=None)
+    else:
+        X.to_parquet(directory / 'X.parquet', index=False, row_group_size=PARQUET_ROW_GROUP_SIZE)
+        y.to_frame(name='target').to_parquet(directory / 'y.parquet', index=False)
+
+
+def load_features(directory: Path, format: str = 'parquet') -> pd.DataFrame:
+    """X written by `save_features`; memory-mapped for `npy`"""
+    _check_format(format)
+    if format == 'npy':
+        return load_matrix(directory, 'X')
+    return pd.read_parquet(Path(directory) / 'X.parquet')
+
+
+def load_target(directory: Path, format: str = 'parquet') -> pd.Series:
+    """Target written by `save_features`; memory-mapped for `npy`"""
+    _check_format(format)
+    if format == 'npy':
+        return load_matrix(directory, 'y')
+    return pd.read_parquet(Path(directory) / 'y.parquet')['target']
+
+
+# ---------------------------------------------------
+# Benchmark
+# ---------------------------------------------------
+
+def _measure_load(directory: str, format: str, consume: bool) -> dict:
+    from src.profiling import measure
+
+    def _load():
+        X, y = load_features(directory, format), load_target(directory, format)
+        if consume:
+            # lo que hace LightGBM con los datos: convertirlos a una matriz y recorrerla
+            float(np.asarray(X.to_numpy()).sum() + y.to_numpy().sum())
+        return X, y
+
+    _, seconds, peak_mb = measure(_load)
+    return {'seconds': seconds, 'peak_rss_mb': peak_mb}
+
+
+def benchmark_formats(directory: Path, n_runs: int = 3) -> pd.DataFrame:
+    """
+    Load time and peak RSS of the features in `directory` (written in both
+    formats) with parquet and with the memory-mapped matrix, only opening
+    them and also reading every value. Each run is a fresh process, so the
+    RSS of one run does not hide the next.
+
+    Returns:
+        pd.DataFrame: one row per (format, consume) with the best time and
+        the peak RSS of that run
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    context = multiprocessing.get_context('spawn')
+    rows = []
+    for format in FEATURE_FORMATS:
+        for consume in (False, True):
+            runs = []
+            for _ in range(n_runs):
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                    runs.append(executor.submit(_measure_load, str(directory), format, consume).result())
+            best = min(runs, key=lambda r: r['seconds'])
+            rows.append({'format': format, 'consume': consume, **best})
+    return pd.DataFrame(rows)
+
+
+if __name__ == '__main__':
+    import argparse
+    from src.paths import PROCESSED_DATA_DIR
+
+    parser = argparse.ArgumentParser(description='Benchmark parquet vs memory-mapped npy features')
+    parser.add_argument('--directory', type=Path, default=PROCESSED_DATA_DIR)
+    parser.add_argument('--n-runs', type=int, default=3)
+    args = parser.parse_args()
+
+    # si solo existe el parquet, se genera la versión npy para compararlas
+    if not _paths(args.directory, 'X')[1].exists():
+        save_features(load_features(args.directory), load_target(args.directory), args.directory, 'npy')
+
+    print(benchmark_formats(args.directory, args.n_runs).to_string(index=False))
@@ -1,14 +1,10 @@
 from typing import Optional, List
 from dataclasses import dataclass
 
-import hsfs
-import hopsworks
-
 import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 
-import src.config as config
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -28,12 +24,23 @@ class FeatureViewConfig:
     version: int
     feature_group: FeatureGroupConfig
 
-def get_feature_store() -> hsfs.feature_store.FeatureStore:
-    """Connects to Hopsworks and returns a pointer to the feature store
+def get_feature_store() -> 'hsfs.feature_store.FeatureStore':
+    """Connects to Hopsworks and returns a pointer to the feature store.
+    With `FEATURE_STORE_BACKEND = 'local'`, returns a `LocalFeatureStore`
+    instead, with the same API and stored under the Feast repo
 
     Returns:
         hsfs.feature_store.FeatureStore: pointer to the feature store
     """
+    # importado aquí: src.config importa este módulo para las dataclasses
+    import src.config as config
+
+    if config.FEATURE_STORE_BACKEND == 'local':
+        from src.local_feature_store import LocalFeatureStore
+        return LocalFeatureStore()
+
+    import hopsworks
+
     project = hopsworks.login(
         project=config.HOPSWORKS_PROJECT_NAME,
         api_key_value=config.HOPSWORKS_API_KEY
@@ -44,7 +51,7 @@ def get_feature_store() -> hsfs.feature_store.FeatureStore:
 def get_feature_group(
     name: str,
     version: Optional[int] = 1
-    ) -> hsfs.feature_group.FeatureGroup:
+    ) -> 'hsfs.feature_group.FeatureGroup':
     """Connects to the feature store and returns a pointer to the given
     feature group `name`
 
@@ -62,7 +69,7 @@ def get_feature_group(
 
 def get_or_create_feature_group(
     feature_group_metadata: FeatureGroupConfig
-) -> hsfs.feature_group.FeatureGroup:
+) -> 'hsfs.feature_group.FeatureGroup':
     """Connects to the feature store and returns a pointer to the given
     feature group `name`
 
@@ -84,7 +91,7 @@ def get_or_create_feature_group(
 
 def get_or_create_feature_view(
     feature_view_metadata: FeatureViewConfig
-) -> hsfs.feature_view.FeatureView:
+) -> 'hsfs.feature_view.FeatureView':
     """Connects to the feature store and returns the feature view. Creates it if it does not exist."""
     
     feature_store = get_feature_store()
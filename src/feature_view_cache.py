@@ -0,0 +1,231 @@
+import json
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List, Tuple
+
+import pandas as pd
+
+import sys
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.paths import DATA_CACHE_DIR
+
+Interval = Tuple[pd.Timestamp, pd.Timestamp]
+
+
+def _utc(ts: datetime) -> pd.Timestamp:
+    ts = pd.Timestamp(ts)
+    return ts.tz_localize('UTC') if ts.tzinfo is None else ts.tz_convert('UTC')
+
+
+def subtract_intervals(interval: Interval, covered: List[Interval]) -> List[Interval]:
+    """Parts of the half-open `interval` that are not covered by `covered`."""
+    start, end = interval
+    gaps = []
+    for c_start, c_end in sorted(covered):
+        if c_end <= start or c_start >= end:
+            continue
+        if c_start > start:
+            gaps.append((start, c_start))
+        start = max(start, c_end)
+        if start >= end:
+            break
+    if start < end:
+        gaps.append((start, end))
+    return gaps
+
+
+class BatchDataCache:
+    """
+    Local interval cache in front of `feature_view.get_batch_data`.
+
+    Every range already downloaded for a feature view (keyed by its name and
+    version) is stored as a parquet segment covering `[start, end)`. A request
+    only fetches the sub-intervals not covered yet, and the answer is built by
+    merging and slicing the segments locally. The current hour and the last
+    `recent_hours` closed ones may still get rows (the feature pipeline
+    inserts an hour some minutes after it closes), so they are fetched on
+    every request and never stored as covered. When the cache grows over
+    `max_bytes`, the least recently used segments are evicted.
+
+    Args:
+        cache_dir (Path): where the segments and their index are stored
+        max_bytes (int): size bound of the cache, per feature view
+        time_column (str): column the ranges refer to
+        fetch_margin (timedelta): extra time fetched on each side of a gap,
+            so rows at the boundaries are never lost; the segment keeps only
+            the rows inside the gap
+        max_segments_per_read (int): when a request reads more segments than
+            this, contiguous ones are merged into a single file
+        recent_hours (int): closed hours that are still fetched every time
+    """
+    def __init__(
+        self,
+        cache_dir: Path = Path(DATA_CACHE_DIR) / 'feature_views',
+        max_bytes: int = 512 * 2**20,
+        time_column: str = 'pickup_hour',
+        fetch_margin: timedelta = timedelta(hours=1),
+        max_segments_per_read: int = 8,
+        recent_hours: int = 1,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.time_column = time_column
+        self.fetch_margin = fetch_margin
+        self.max_segments_per_read = max_segments_per_read
+        self.recent_hours = recent_hours
+        self.stats = {'hits': 0, 'partial_hits': 0, 'misses': 0,
+                      'requested_hours': 0.0, 'fetched_hours': 0.0}
+        self._lock = threading.Lock()
+
+    # --- index -------------------------------------------------------------
+
+    def _dir(self, feature_view) -> Path:
+        return self.cache_dir / f'{feature_view.name}_v{feature_view.version}'
+
+    def _read_index(self, directory: Path) -> List[dict]:
+        index_path = directory / 'index.json'
+        if not index_path.exists():
+            return []
+        segments = json.loads(index_path.read_text())
+        for segment in segments:
+            segment['start'] = pd.Timestamp(segment['start'])
+            segment['end'] = pd.Timestamp(segment['end'])
+        return segments
+
+    def _write_index(self, directory: Path, segments: List[dict]):
+        serializable = [
+            {**s, 'start': s['start'].isoformat(), 'end': s['end'].isoformat()}
+            for s in segments
+        ]
+        tmp_path = directory / 'index.json.tmp'
+        tmp_path.write_text(json.dumps(serializable, indent=2))
+        tmp_path.replace(directory / 'index.json')
+
+    # --- public API --------------------------------------------------------
+
+    def get_batch_data(self, feature_view, start_time: datetime, end_time: datetime) -> pd.DataFrame:
+        """
+        Same as `feature_view.get_batch_data(start_time=..., end_time=...)`,
+        restricted to rows with `start_time <= time_column < end_time`, but
+        only fetching from the feature store what is not cached yet.
+        """
+        start, end = _utc(start_time), _utc(end_time)
+        directory = self._dir(feature_view)
+
+        with self._lock:
+            directory.mkdir(parents=True, exist_ok=True)
+            segments = self._read_index(directory)
+            gaps = subtract_intervals((start, end), [(s['start'], s['end']) for s in segments])
+
+            self.stats['requested_hours'] += (end - start) / timedelta(hours=1)
+            if not gaps:
+                self.stats['hits'] += 1
+            elif gaps == [(start, end)]:
+                self.stats['misses'] += 1
+            else:
+                self.stats['partial_hits'] += 1
+
+            # las horas recientes pueden recibir aún filas: se descargan en
+            # cada petición pero nunca se guardan como cubiertas
+            complete_until = pd.Timestamp.now(tz='UTC').floor('H') - timedelta(hours=self.recent_hours)
+            frames = {}
+            for gap_start, gap_end in gaps:
+                data = self._fetch(feature_view, gap_start, gap_end)
+                self.stats['fetched_hours'] += (gap_end - gap_start) / timedelta(hours=1)
+                if gap_start < complete_until:
+                    segments.append(self._save_segment(
+                        directory, data[data[self.time_column] < complete_until],
+                        gap_start, min(gap_end, complete_until),
+                    ))
+                frames[f'recent_{gap_start.value}'] = data[data[self.time_column] >= complete_until]
+
+            # leemos solo los segmentos que solapan con el rango pedido
+            now = datetime.now(timezone.utc).isoformat()
+            for segment in segments:
+                if segment['end'] > start and segment['start'] < end:
+                    segment['last_access'] = now
+                    frames[segment['file']] = pd.read_parquet(directory / segment['file'])
+
+            cached_frames = {f: frames[f] for f in frames if not f.startswith('recent_')}
+            if len(cached_frames) > self.max_segments_per_read:
+                segments = self._compact(directory, segments, cached_frames)
+            segments = self._evict(directory, segments)
+            self._write_index(directory, segments)
+
+        frames = [f for f in frames.values() if not f.empty]
+        if not frames:
+            return pd.DataFrame()
+        data = pd.concat(frames, ignore_index=True)
+        return data[(data[self.time_column] >= start) & (data[self.time_column] < end)] \
+            .reset_index(drop=True)
+
+    def hit_rate(self) -> float:
+        """Fraction of the requested hours served from the local cache."""
+        requested = self.stats['requested_hours']
+        return 1 - self.stats['fetched_hours'] / requested if requested else 0.0
+
+    # --- internals ---------------------------------------------------------
+
+    def _fetch(self, feature_view, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        data = feature_view.get_batch_data(
+            start_time=start - self.fetch_margin,
+            end_time=end + self.fetch_margin,
+        )
+        data[self.time_column] = pd.to_datetime(data[self.time_column], utc=True)
+        return data[(data[self.time_column] >= start) & (data[self.time_column] < end)]
+
+    def _save_segment(self, directory: Path, data: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp) -> dict:
+        file_name = f'{uuid.uuid4().hex}.parquet'
+        data.to_parquet(directory / file_name, index=False)
+        return {
+            'file': file_name,
+            'start': start,
+            'end': end,
+            'size': (directory / file_name).stat().st_size,
+            'last_access': datetime.now(timezone.utc).isoformat(),
+        }
+
+    def _compact(self, directory: Path, segments: List[dict], frames: dict) -> List[dict]:
+        """Merges runs of contiguous segments that were just read into one file each."""
+        segments = sorted(segments, key=lambda s: s['start'])
+        runs, run = [], []
+        for segment in segments:
+            if segment['file'] in frames and run and run[-1]['end'] == segment['start']:
+                run.append(segment)
+                continue
+            runs.append(run)
+            run = [segment] if segment['file'] in frames else []
+            if not run:
+                runs.append([segment])
+        runs.append(run)
+
+        compacted = []
+        for run in filter(None, runs):
+            if len(run) == 1:
+                compacted.append(run[0])
+                continue
+            data = pd.concat([frames[s['file']] for s in run], ignore_index=True)
+            file_name = f'{uuid.uuid4().hex}.parquet'
+            data.to_parquet(directory / file_name, index=False)
+            for s in run:
+                (directory / s['file']).unlink(missing_ok=True)
+            compacted.append({
+                'file': file_name,
+                'start': run[0]['start'],
+                'end': run[-1]['end'],
+                'size': (directory / file_name).stat().st_size,
+                'last_access': max(s['last_access'] for s in run),
+            })
+        return compacted
+
+    def _evict(self, directory: Path, segments: List[dict]) -> List[dict]:
+        total = sum(s['size'] for s in segments)
+        segments = sorted(segments, key=lambda s: s['last_access'])
+        while segments and total > self.max_bytes:
+            segment = segments.pop(0)
+            (directory / segment['file']).unlink(missing_ok=True)
+            total -= segment['size']
+        return sorted(segments, key=lambda s: s['start'])
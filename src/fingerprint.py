@@ -0,0 +1,31 @@
+import hashlib
+import inspect
+from pathlib import Path
+from typing import Callable
+
+
+def hash_file(path: Path, chunk_size: int = 2**20) -> str:
+    """sha256 of the content of a file, read in chunks of `chunk_size` bytes."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_code(*functions: Callable) -> str:
+    """
+    Short hash of the source code of `functions`. Used as the "code version"
+    of derived data, so caches are rebuilt when the code producing them
+    changes.
+    """
+    digest = hashlib.sha256()
+    for fn in functions:
+        digest.update(inspect.getsource(fn).encode())
+    return digest.hexdigest()[:16]
+
+
+def file_stat(path: Path) -> dict:
+    """Size and modification time of a file: a cheap first check before hashing it."""
+    stat = Path(path).stat()
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
@@ -0,0 +1,115 @@
+import re
+import time
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+
+def _lag_columns(features: pd.DataFrame) -> list:
+    """`rides_previous_N_hour` columns, from the oldest (largest N) to the newest."""
+    lags = {
+        int(m.group(1)): c for c in features.columns
+        if (m := re.fullmatch(r'rides_previous_(\d+)_hour', c))
+    }
+    n_lags = max(lags)
+    if sorted(lags) != list(range(1, n_lags + 1)):
+        raise ValueError('Lag features must be rides_previous_1_hour ... rides_previous_N_hour')
+    return [lags[n] for n in range(n_lags, 0, -1)]
+
+
+def forecast_multi_horizon(
+    model,
+    features: pd.DataFrame,
+    horizon: int = 24,
+) -> pd.DataFrame:
+    """
+    Forecasts the next `horizon` hours for all locations at once, feeding each
+    prediction back as the most recent lag of the next step (recursive
+    forecasting).
+
+    All locations advance together: there is one batched `model.predict` per
+    step. The lag history and the predictions live in one preallocated
+    (locations x (n_lags + horizon)) array, and the lag window of step `h` is
+    the view `[:, h:h + n_lags]` of it, so advancing one hour copies nothing.
+    `pickup_hour` is moved forward every step, so the model's calendar
+    features (hour, day of week) are those of the hour being predicted.
+
+    Args:
+        model: fitted model or `get_pipeline` pipeline
+        features (pd.DataFrame): one row per `pickup_location_id`, as returned
+            by `load_batch_of_features_from_store`
+        horizon (int): number of hours to forecast
+
+    Returns:
+        pd.DataFrame: predicted rides, index `pickup_location_id` and one
+        column per forecasted `pickup_hour`
+    """
+    lag_columns = _lag_columns(features)
+    n_lags = len(lag_columns)
+    other_columns = [c for c in features.columns if c not in lag_columns and c != 'pickup_hour']
+
+    history = np.empty((len(features), n_lags + horizon), dtype=np.float32)
+    history[:, :n_lags] = features[lag_columns].to_numpy(dtype=np.float32)
+
+    first_hour = pd.Timestamp(features['pickup_hour'].iloc[0])
+    forecast_hours = [first_hour + timedelta(hours=h) for h in range(horizon)]
+
+    for h, pickup_hour in enumerate(forecast_hours):
+        window = history[:, h:h + n_lags]
+
+        X = pd.DataFrame(window, columns=lag_columns)
+        X['pickup_hour'] = pickup_hour
+        for c in other_columns:
+            X[c] = features[c].to_numpy()
+
+        # el número de viajes no puede ser negativo
+        history[:, n_lags + h] = np.maximum(model.predict(X[features.columns]), 0)
+
+    return pd.DataFrame(
+        history[:, n_lags:],
+        index=pd.Index(features['pickup_location_id'].to_numpy(), name='pickup_location_id'),
+        columns=pd.DatetimeIndex(forecast_hours, name='pickup_hour'),
+    )
+
+
+def _forecast_per_zone_loop(model, features: pd.DataFrame, horizon: int) -> pd.DataFrame:
+    """Naive reference: one `predict` call per location and per step."""
+    lag_columns = _lag_columns(features)
+    predictions = np.empty((len(features), horizon), dtype=np.float32)
+
+    for i in range(len(features)):
+        row = features.iloc[[i]].copy()
+        for h in range(horizon):
+            prediction = max(float(model.predict(row.copy())[0]), 0.0)
+            predictions[i, h] = prediction
+            window = np.append(row[lag_columns].to_numpy()[0, 1:], prediction)
+            row.loc[:, lag_columns] = window[np.newaxis, :]
+            row['pickup_hour'] = row['pickup_hour'] + timedelta(hours=1)
+
+    return pd.DataFrame(predictions, index=features['pickup_location_id'].to_numpy())
+
+
+def benchmark_multi_horizon(model, features: pd.DataFrame, horizon: int = 24) -> dict:
+    """
+    Compares the latency of `forecast_multi_horizon` against the naive
+    per-location loop, and checks both produce the same forecasts.
+    """
+    start = time.perf_counter()
+    vectorized = forecast_multi_horizon(model, features, horizon)
+    vectorized_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    loop = _forecast_per_zone_loop(model, features, horizon)
+    loop_seconds = time.perf_counter() - start
+
+    results = {
+        'n_locations': len(features),
+        'horizon': horizon,
+        'vectorized_seconds': vectorized_seconds,
+        'loop_seconds': loop_seconds,
+        'speedup': loop_seconds / vectorized_seconds,
+        'max_abs_diff': float(np.abs(vectorized.to_numpy() - loop.to_numpy()).max()),
+    }
+    print(results)
+    return results
@@ -1,13 +1,12 @@
-import zipfile 
+import threading
 from datetime import datetime, timedelta
 
-import requests
 import numpy as np
 import pandas as pd
 
 # plotting libraries
 import streamlit as st
-import geopandas as gpd
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import pydeck as pdk
 
 import sys
@@ -15,18 +14,24 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 
 from src.inference import (
-    load_batch_of_features_from_store,
+    is_hour_in_store,
+    fetch_batch_of_features_from_store,
     load_model_from_registry,
     get_model_predictions
 )
-from src.paths import DATA_DIR
-from src.plot import plot_one_sample
+from src.taxi_zones import load_taxi_zones
+from src.plot import plot_samples
+from src.prefetch import HourlyPrefetcher
+from src.startup import run_concurrently
 
 st.set_page_config(layout='wide')
 
+def get_current_date() -> pd.Timestamp:
+    # return pd.to_datetime(datetime.utcnow()).floor('H')
+    return pd.Timestamp("2024-10-10 08:00:00")
+
 # title
-# current_date = pd.to_datetime(datetime.utcnow()).floor('H')
-current_date = pd.Timestamp("2024-10-10 08:00:00")
+current_date = get_current_date()
 st.title('Taxi Demand Prediction')
 st.header(f'{current_date}')
 
@@ -37,46 +42,98 @@ N_STEPS = 7
 @st.cache_data
 def load_shape_data_file():
     """ Conocer zona del taxi a partir de las coordenadas de pickup"""
-    # descargar el archivo zip con las zonas de taxi
-    URL = 'https://d37ci6vzurychx.cloudfront.net/misc/taxi_zones.zip'
-    response = requests.get(URL)
-    path = DATA_DIR / f'taxi_zones.zip'
-    if response.status_code == 200:
-        open(path, "wb").write(response.content)
-    else:
-        raise Exception(f'{URL} is not available')
-    
-    # unzip file
-    with zipfile.ZipFile(path, 'r') as zip_ref:
-        zip_ref.extractall(DATA_DIR / 'taxi_zones')
+    # zonas reproyectadas y simplificadas (ver `python -m src.taxi_zones`);
+    # solo se descargan y preprocesan la primera vez
+    return load_taxi_zones()
 
-    # cargamos y devolvemos las zonas de taxi
-    return gpd.read_file(DATA_DIR / 'taxi_zones/taxi_zones.shp').to_crs('epsg:4326')
 
+# tarea del arranque que calcula (o espera) features y predicciones de la hora
+PREDICTIONS_TASK = 'Features y predicciones'
 
-with st.spinner(text="Descargando localizaciones para graficar zonas"):
-    geo_df = load_shape_data_file()
-    st.sidebar.write('✅ Descargadas zonas de Taxi')
-    progress_bar.progress(1 / N_STEPS)
 
-with st.spinner(text="Obtención de funciones del almacén de funciones"):
-    # load features from the feature store
-    features = load_batch_of_features_from_store(current_date)
-    st.sidebar.write('✅ Features de inferencia obtenidos')
-    progress_bar.progress(2 / N_STEPS)
+def compute_features_and_predictions(current_date: pd.Timestamp):
+    # sin la caché de Streamlit: al recalcular una entrada provisional hay que
+    # volver a leer el feature store (el prefetcher ya guarda el resultado)
+    # load features from the feature store and the model from the model registry
+    results, timings = run_concurrently({
+        'Features de inferencia': lambda: fetch_batch_of_features_from_store(current_date),
+        'Modelo de ML': load_model_from_registry,
+    })
+    # get predictions
+    predictions = get_model_predictions(results['Modelo de ML'], results['Features de inferencia'])
+    return results['Features de inferencia'], predictions, timings
+
+
+@st.cache_resource
+def get_prefetcher() -> HourlyPrefetcher:
+    """
+    Un único prefetcher compartido por todas las sesiones: calcula en segundo
+    plano features y predicciones de cada hora en cuanto la hora anterior
+    está en el feature store. Solo su hilo consulta si ya lo está.
+    """
+    return HourlyPrefetcher(
+        compute_fn=compute_features_and_predictions,
+        is_ready=lambda current_date: is_hour_in_store(current_date - timedelta(hours=1)),
+        clock=get_current_date,
+    ).start()
+
+
+with st.spinner(text="Cargando zonas, features y modelo en paralelo"):
+    # las predicciones de esta hora pueden estar ya precalculadas en memoria
+    prefetcher = get_prefetcher()
+    prefetched = prefetcher.get(current_date)
+
+    # tareas independientes: se lanzan a la vez y el arranque tarda lo que la más lenta
+    tasks = {'Zonas de Taxi': load_shape_data_file}
+    if prefetched is None:
+        # features y modelo en paralelo, un único cálculo por hora para todas
+        # las sesiones (provisional si la hora anterior aún no está en el store)
+        tasks[PREDICTIONS_TASK] = lambda: prefetcher.get_or_compute(current_date)
+
+    # los hilos necesitan el contexto de la sesión para usar st.cache_*
+    script_ctx = get_script_run_ctx()
+    n_done = 0
+
+    def on_task_done(name: str, seconds: float):
+        global n_done
+        if name == PREDICTIONS_TASK:
+            # features y modelo se cargan en paralelo dentro de esta tarea: se
+            # muestran por separado al terminar
+            return
+        n_done += 1
+        st.sidebar.write(f'✅ {name} ({seconds:.2f} s)')
+        progress_bar.progress(n_done / N_STEPS)
+
+    results, timings = run_concurrently(
+        tasks,
+        on_done=on_task_done,
+        initializer=lambda: add_script_run_ctx(threading.current_thread(), script_ctx),
+    )
+    geo_df = results['Zonas de Taxi']
 
-with st.spinner(text="Cargando modelo de ML del registro de modelos"):
-    # load model from the model registry
-    model = load_model_from_registry()
-    st.sidebar.write('✅ Modelo de ML cargado')
-    progress_bar.progress(3 / N_STEPS)
+    if prefetched is None:
+        features, predictions, compute_timings = results[PREDICTIONS_TASK]
+        # el camino crítico distingue la carga de features de la del modelo
+        del timings[PREDICTIONS_TASK]
+        for name, seconds in compute_timings.items():
+            on_task_done(name, seconds)
+        timings.update(compute_timings)
 
 with st.spinner(text="Realizando predicciones"):
-    # get predictions
-    predictions = get_model_predictions(model, features)
-    st.sidebar.write('✅ Predicciones obtenidas')
+    if prefetched is None:
+        st.sidebar.write('✅ Predicciones obtenidas')
+    else:
+        features, predictions, _ = prefetched
+        st.sidebar.write('✅ Features y predicciones precalculadas')
     progress_bar.progress(4 / N_STEPS)
 
+    # camino crítico del arranque: la tarea más lenta
+    slowest = max(timings, key=timings.get)
+    st.sidebar.caption(
+        f'Arranque: {timings[slowest]:.2f} s (camino crítico: {slowest}), '
+        f'{sum(timings.values()):.2f} s si fuese secuencial'
+    )
+
 
 with st.spinner(text="Preparing data to plot"):
     # prepare data to plot
@@ -142,16 +199,13 @@ with st.spinner(text="Generating NYC Map"):
     with st.spinner(text="Graficamos datos de series temporales"):
         
         row_indices = np.argsort(predictions['predicted_demand'].values)[-5:]  # top 5 predictions
-        n_to_plot = 5
-
-        # plot the top 5 predictions
-        for row_id in row_indices[:n_to_plot]:
-            fig = plot_one_sample(
-                features=features,
-                targets = predictions['predicted_demand'],
-                example_id=row_id,
-                predictions = pd.Series(predictions['predicted_demand'])
-            )
-            st.plotly_chart(fig, theme="streamlit", use_container_width=True, width=1000)
+
+        # una sola figura con las 5 series y eje de fechas compartido
+        fig = plot_samples(
+            example_ids=row_indices[::-1],
+            features=features,
+            predictions=pd.Series(predictions['predicted_demand']),
+        )
+        st.plotly_chart(fig, theme="streamlit", use_container_width=True, width=1000)
 
         progress_bar.progress(6/N_STEPS)
\ No newline at end of file
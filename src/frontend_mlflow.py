@@ -1,13 +1,10 @@
-import zipfile 
 from datetime import datetime, timedelta
 
-import requests
 import numpy as np
 import pandas as pd
 
 # plotting libraries
 import streamlit as st
-import geopandas as gpd
 import pydeck as pdk
 
 import sys
@@ -19,7 +16,7 @@ from src.inference import (
     load_model_from_registry,
     get_model_predictions
 )
-from src.paths import DATA_DIR
+from src.taxi_zones import load_taxi_zones
 from src.plot import plot_one_sample
 
 st.set_page_config(layout='wide')
@@ -47,21 +44,9 @@ N_STEPS = 7
 @st.cache_data
 def load_shape_data_file():
     """ Conocer zona del taxi a partir de las coordenadas de pickup"""
-    # descargar el archivo zip con las zonas de taxi
-    URL = 'https://d37ci6vzurychx.cloudfront.net/misc/taxi_zones.zip'
-    response = requests.get(URL)
-    path = DATA_DIR / f'taxi_zones.zip'
-    if response.status_code == 200:
-        open(path, "wb").write(response.content)
-    else:
-        raise Exception(f'{URL} is not available')
-    
-    # unzip file
-    with zipfile.ZipFile(path, 'r') as zip_ref:
-        zip_ref.extractall(DATA_DIR / 'taxi_zones')
-
-    # cargamos y devolvemos las zonas de taxi
-    return gpd.read_file(DATA_DIR / 'taxi_zones/taxi_zones.shp').to_crs('epsg:4326')
+    # zonas reproyectadas y simplificadas (ver `python -m src.taxi_zones`);
+    # solo se descargan y preprocesan la primera vez
+    return load_taxi_zones()
 
 with st.spinner(text="Descargando localizaciones para graficar zonas"):
     geo_df = load_shape_data_file()
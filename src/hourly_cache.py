@@ -0,0 +1,208 @@
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+
+import sys
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.paths import RAW_DATA_DIR, DATA_CACHE_DIR
+from src.fingerprint import hash_file, hash_code, file_stat
+from src.data_validation import validate_rides
+
+HOURLY_CACHE_DIR = Path(DATA_CACHE_DIR) / 'hourly'
+
+
+def _empty_aggregates() -> pd.DataFrame:
+    """Aggregates of a month without data, with the dtypes of `aggregate_raw_month`"""
+    return pd.DataFrame({
+        'pickup_hour': pd.Series(dtype='datetime64[ns]'),
+        'pickup_location_id': pd.Series(dtype=np.int32),
+        'rides': pd.Series(dtype=np.int32),
+    })
+
+
+def aggregate_raw_month(raw_path: Path, year: int, month: int) -> pd.DataFrame:
+    """
+    Aggregates one monthly raw file into rides per (pickup_hour,
+    pickup_location_id). As in `validate_raw_data`, rides outside the month
+    and rides breaking a data quality rule (see `validate_rides`) are
+    dropped. Only hours with at least one ride are returned; the missing
+    slots are added after merging months (see `load_hourly_time_series`).
+    """
+    rides = pd.read_parquet(raw_path, columns=['tpep_pickup_datetime', 'PULocationID'])
+
+    month_start = pd.Timestamp(year, month, 1)
+    rides, report = validate_rides(
+        rides, month_start, month_start + relativedelta(months=1),
+        datetime_column='tpep_pickup_datetime',
+        location_column='PULocationID',
+    )
+    print(f'Validación {raw_path.name}: {report.summary()}')
+
+    agg_rides = (
+        rides.assign(pickup_hour=rides['pickup_datetime'].dt.floor('H'))
+        .groupby(['pickup_hour', 'pickup_location_id'])
+        .size()
+        .reset_index(name='rides')
+    )
+    agg_rides['pickup_location_id'] = agg_rides['pickup_location_id'].astype(np.int32)
+    agg_rides['rides'] = agg_rides['rides'].astype(np.int32)
+    return agg_rides
+
+
+# versión del código que genera los agregados: si cambia, se regeneran todos
+CODE_VERSION = hash_code(aggregate_raw_month, validate_rides)
+
+
+def _cache_paths(raw_path: Path):
+    return HOURLY_CACHE_DIR / raw_path.name, HOURLY_CACHE_DIR / f'{raw_path.stem}.json'
+
+
+def _write_atomic(path: Path, write_fn):
+    tmp_path = path.with_name(f'{path.name}.tmp')
+    write_fn(tmp_path)
+    tmp_path.replace(path)
+
+
+def _is_cache_valid(raw_path: Path, meta_path: Path) -> bool:
+    """
+    The cached aggregate is valid if it was built by the current code from a
+    raw file with the same content. Size and mtime are checked first; the
+    file is only hashed when they changed (e.g. the month was downloaded
+    again), and the metadata is refreshed if the content is the same.
+    """
+    if not meta_path.exists():
+        return False
+    meta = json.loads(meta_path.read_text())
+    if meta.get('code_version') != CODE_VERSION:
+        return False
+
+    stat = file_stat(raw_path)
+    if stat == meta['source_stat']:
+        return True
+    if hash_file(raw_path) != meta['source_sha256']:
+        return False
+
+    meta['source_stat'] = stat
+    _write_atomic(meta_path, lambda p: p.write_text(json.dumps(meta, indent=2)))
+    return True
+
+
+def load_hourly_aggregates(year: int, month: int) -> pd.DataFrame:
+    """
+    Hourly rides per location of one month, from the derived-data cache in
+    `DATA_CACHE_DIR/hourly`. The aggregate is rebuilt from the raw file only
+    when the raw file or the aggregation code changed.
+
+    Returns:
+        pd.DataFrame: columns ['pickup_hour', 'pickup_location_id', 'rides'],
+        empty if the raw file is not available
+    """
+    raw_path = RAW_DATA_DIR / f'rides_{year}_{month:02}.parquet'
+    if not raw_path.exists():
+        from src.data import download_one_file_of_raw_data
+        try:
+            download_one_file_of_raw_data(year, month)
+        except Exception:
+            print(f'{year}-{month:02d} file is not available')
+            return _empty_aggregates()
+
+    data_path, meta_path = _cache_paths(raw_path)
+    if data_path.exists() and _is_cache_valid(raw_path, meta_path):
+        return pd.read_parquet(data_path)
+
+    print(f'Agregando por horas {raw_path.name}')
+    HOURLY_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    source_stat, source_sha256 = file_stat(raw_path), hash_file(raw_path)
+    agg_rides = aggregate_raw_month(raw_path, year, month)
+
+    # primero los datos y después los metadatos: si se interrumpe, no hay
+    # metadatos que den por válido un fichero a medias
+    _write_atomic(data_path, lambda p: agg_rides.to_parquet(p, index=False))
+    meta = {
+        'source': raw_path.name,
+        'source_stat': source_stat,
+        'source_sha256': source_sha256,
+        'code_version': CODE_VERSION,
+        'n_rows': len(agg_rides),
+        'n_rides': int(agg_rides['rides'].sum()),
+        'created_at': datetime.now(timezone.utc).isoformat(),
+    }
+    _write_atomic(meta_path, lambda p: p.write_text(json.dumps(meta, indent=2)))
+    return agg_rides
+
+
+def load_hourly_time_series(from_date: datetime, to_date: datetime) -> pd.DataFrame:
+    """
+    Same output as `transform_to_time_series` over the raw rides with
+    `from_date <= pickup_datetime < to_date` (dates aligned to the hour),
+    but built from the cached monthly aggregates instead of the raw rides.
+
+    Returns:
+        pd.DataFrame: columns ['pickup_hour', 'pickup_location_id', 'rides'],
+        with the missing slots filled with 0
+    """
+    from src.data import add_missing_slots
+
+    from_date, to_date = pd.Timestamp(from_date), pd.Timestamp(to_date)
+    month_start = from_date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+    months = []
+    while month_start < to_date:
+        agg_rides = load_hourly_aggregates(month_start.year, month_start.month)
+        # los meses sin datos no aportan filas (ni cambian los dtypes al concatenar)
+        if not agg_rides.empty:
+            months.append(agg_rides)
+        month_start += relativedelta(months=1)
+    if not months:
+        return pd.DataFrame()
+
+    agg_rides = pd.concat(months, ignore_index=True)
+    agg_rides = agg_rides[(agg_rides.pickup_hour >= from_date) & (agg_rides.pickup_hour < to_date)]
+    if agg_rides.empty:
+        return pd.DataFrame()
+
+    return add_missing_slots(agg_rides)
+
+
+def load_hourly_sparse_series(from_date: datetime, to_date: datetime) -> Optional['SparseTimeSeries']:
+    """
+    Rides of `from_date <= pickup_hour < to_date` as a `SparseTimeSeries`,
+    straight from the cached monthly aggregates: unlike
+    `load_hourly_time_series`, the hours without rides are never filled in.
+
+    Returns:
+        SparseTimeSeries: from the first to the last hour with rides, or
+        `None` if there are none
+    """
+    from src.sparse_ts import SparseTimeSeries
+
+    from_date, to_date = pd.Timestamp(from_date), pd.Timestamp(to_date)
+    month_start = from_date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+    months = []
+    while month_start < to_date:
+        agg_rides = load_hourly_aggregates(month_start.year, month_start.month)
+        agg_rides = agg_rides[(agg_rides.pickup_hour >= from_date) & (agg_rides.pickup_hour < to_date)]
+        if not agg_rides.empty:
+            months.append(SparseTimeSeries.from_time_series(agg_rides))
+        month_start += relativedelta(months=1)
+
+    return SparseTimeSeries.concat(months) if months else None
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Build the hourly aggregates cache of the raw monthly files')
+    parser.add_argument('from_date', type=datetime.fromisoformat, help='YYYY-MM-DD')
+    parser.add_argument('to_date', type=datetime.fromisoformat, help='YYYY-MM-DD (exclusive)')
+    args = parser.parse_args()
+
+    ts_data = load_hourly_time_series(args.from_date, args.to_date)
+    print(f'{len(ts_data)} filas horarias entre {args.from_date} y {args.to_date}')
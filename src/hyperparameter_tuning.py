@@ -0,0 +1,249 @@
+import os
+import json
+import hashlib
+import multiprocessing as mp
+from pathlib import Path
+from typing import Optional, Tuple
+
+import pandas as pd
+import lightgbm as lgb
+
+from src.model import get_pipeline
+
+# Parámetros de construcción del Dataset binned. Son fijos para todos los
+# trials: solo así el Dataset guardado en binario puede reutilizarse.
+DATASET_PARAMS = {
+    'max_bin': 255,
+    'feature_pre_filter': False,  # permite variar `min_child_samples` por trial
+    'verbose': -1,
+}
+
+
+def _finished_states() -> tuple:
+    # estados de trial que cuentan para `n_trials`
+    from optuna.trial import TrialState
+
+    return (TrialState.COMPLETE, TrialState.PRUNED)
+
+
+def _data_fingerprint(X: pd.DataFrame, y: pd.Series) -> str:
+    """Short content hash used to name the cached binary datasets."""
+    h = hashlib.sha1()
+    h.update(json.dumps([list(map(str, X.columns)), X.shape, DATASET_PARAMS]).encode())
+    h.update(pd.util.hash_pandas_object(X, index=False).values.tobytes())
+    h.update(pd.util.hash_pandas_object(y, index=False).values.tobytes())
+    return h.hexdigest()[:16]
+
+
+def build_binned_datasets(
+    X_train: pd.DataFrame,
+    y_train: pd.Series,
+    X_val: pd.DataFrame,
+    y_val: pd.Series,
+    cache_dir: Path,
+) -> Tuple[Path, Path]:
+    """
+    Applies the feature engineering steps of `get_pipeline` and builds the
+    LightGBM binned train/validation `Dataset`s once, saving them in LightGBM
+    binary format.
+
+    Trials load these files directly instead of re-binning the feature matrix
+    from pandas every time. If files for the same data already exist they are
+    reused.
+
+    Returns:
+        Tuple[Path, Path]: paths to the train and validation binary files
+    """
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    key = _data_fingerprint(X_train, y_train) + '_' + _data_fingerprint(X_val, y_val)
+    train_path = cache_dir / f'lgb_train_{key}.bin'
+    val_path = cache_dir / f'lgb_val_{key}.bin'
+
+    if train_path.exists() and val_path.exists():
+        print(f'Reusing binned datasets {train_path.name}, {val_path.name}')
+        return train_path, val_path
+
+    # mismos pasos de feature engineering que el pipeline de producción
+    # (copiamos porque `average_rides_last_4_weeks` modifica X in place)
+    feature_steps = get_pipeline()[:-1]
+    X_train_ = feature_steps.fit_transform(X_train.copy())
+    X_val_ = feature_steps.transform(X_val.copy())
+
+    train_set = lgb.Dataset(X_train_, label=y_train, params=DATASET_PARAMS)
+    val_set = lgb.Dataset(X_val_, label=y_val, reference=train_set)
+
+    # `save_binary` construye (bins) el Dataset y lo escribe a disco
+    train_set.save_binary(str(train_path))
+    val_set.save_binary(str(val_path))
+
+    return train_path, val_path
+
+
+def _suggest_params(trial) -> dict:
+    # mismo espacio de búsqueda que el notebook de Optuna
+    return {
+        'objective': 'regression',
+        'metric': 'mae',
+        'verbose': -1,
+        'num_leaves': trial.suggest_int('num_leaves', 2, 256),
+        'feature_fraction': trial.suggest_float('feature_fraction', 0.2, 1.0),
+        'bagging_fraction': trial.suggest_float('bagging_fraction', 0.2, 1.0),
+        'bagging_freq': 1,
+        'min_child_samples': trial.suggest_int('min_child_samples', 3, 100),
+        'learning_rate': trial.suggest_float('learning_rate', 0.01, 0.3, log=True),
+    }
+
+
+def _pruning_callback(trial, report_every: int):
+    """LightGBM callback that reports the validation MAE to Optuna and prunes."""
+    import optuna
+
+    def _callback(env):
+        if env.iteration % report_every != 0:
+            return
+        mae = env.evaluation_result_list[0][2]
+        trial.report(mae, step=env.iteration)
+        if trial.should_prune():
+            raise optuna.TrialPruned(f'Trial pruned at iteration {env.iteration}')
+
+    return _callback
+
+
+def _tuning_worker(
+    storage_url: str,
+    study_name: str,
+    train_path: str,
+    val_path: str,
+    n_trials: int,
+    num_threads: int,
+    num_boost_round: int,
+    early_stopping_rounds: int,
+):
+    """Runs trials of the shared study until it has `n_trials` finished trials."""
+    import optuna
+    from optuna.study import MaxTrialsCallback
+
+    # cada proceso lee los binarios una vez y los reutiliza en todos sus trials
+    train_set = lgb.Dataset(train_path, params=DATASET_PARAMS)
+    val_set = lgb.Dataset(val_path, reference=train_set)
+
+    def objective(trial) -> float:
+        params = _suggest_params(trial)
+        params['num_threads'] = num_threads
+
+        booster = lgb.train(
+            params,
+            train_set,
+            num_boost_round=num_boost_round,
+            valid_sets=[val_set],
+            callbacks=[
+                lgb.early_stopping(early_stopping_rounds, verbose=False),
+                _pruning_callback(trial, report_every=10),
+            ],
+        )
+        trial.set_user_attr('best_iteration', booster.best_iteration)
+        return booster.best_score['valid_0']['l1']
+
+    # el pruner no se guarda en el storage: hay que pasarlo en cada proceso
+    study = optuna.load_study(
+        study_name=study_name, storage=_get_storage(storage_url), pruner=_get_pruner()
+    )
+    study.optimize(
+        objective,
+        callbacks=[MaxTrialsCallback(n_trials, states=_finished_states())],
+    )
+
+
+def _get_pruner():
+    import optuna
+
+    return optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=50)
+
+
+def _get_storage(storage_url: str):
+    import optuna
+
+    # SQLite con varios procesos: damos margen a los locks de escritura
+    return optuna.storages.RDBStorage(
+        storage_url, engine_kwargs={'connect_args': {'timeout': 60}}
+    )
+
+
+def tune_hyperparameters(
+    X_train: pd.DataFrame,
+    y_train: pd.Series,
+    X_val: pd.DataFrame,
+    y_val: pd.Series,
+    n_trials: int,
+    study_dir: Path,
+    study_name: str = 'taxi_demand_lgbm',
+    n_workers: Optional[int] = None,
+    num_boost_round: int = 1000,
+    early_stopping_rounds: int = 50,
+) -> dict:
+    """
+    Searches LightGBM hyper-parameters for `get_pipeline` with Optuna.
+
+    - The binned `Dataset`s are built once and cached in binary form.
+    - Trials run in `n_workers` parallel processes sharing a local SQLite
+      study, so an interrupted search resumes where it stopped.
+    - Each trial uses early stopping on the validation set, and unpromising
+      trials are pruned with a median pruner.
+
+    Args:
+        n_trials (int): total number of finished trials the study should have
+        study_dir (Path): directory for the SQLite study and the binary datasets
+        n_workers (int, optional): number of processes. Defaults to the number
+            of cores divided by 4 (each worker uses the rest as threads)
+
+    Returns:
+        dict: best hyper-parameters, ready for `get_pipeline(**best_params)`
+    """
+    import optuna
+
+    study_dir = Path(study_dir)
+    study_dir.mkdir(parents=True, exist_ok=True)
+    train_path, val_path = build_binned_datasets(X_train, y_train, X_val, y_val, study_dir)
+
+    storage_url = f"sqlite:///{study_dir / f'{study_name}.db'}"
+    study = optuna.create_study(
+        study_name=study_name,
+        storage=_get_storage(storage_url),
+        direction='minimize',
+        pruner=_get_pruner(),
+        load_if_exists=True,
+    )
+    n_done = len(study.get_trials(deepcopy=False, states=_finished_states()))
+    print(f'Study `{study_name}`: {n_done} trials already finished, target {n_trials}')
+
+    n_cpus = os.cpu_count() or 1
+    n_workers = n_workers or max(1, n_cpus // 4)
+    num_threads = max(1, n_cpus // n_workers)
+
+    if n_done < n_trials:
+        # `spawn`: el proceso padre ya ha usado OpenMP al construir el Dataset
+        ctx = mp.get_context('spawn')
+        workers = [
+            ctx.Process(
+                target=_tuning_worker,
+                args=(storage_url, study_name, str(train_path), str(val_path),
+                      n_trials, num_threads, num_boost_round, early_stopping_rounds),
+            )
+            for _ in range(n_workers)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    study = optuna.load_study(study_name=study_name, storage=_get_storage(storage_url))
+    best_trial = study.best_trial
+    print(f'Best trial #{best_trial.number}: MAE={best_trial.value:.4f}')
+
+    return {
+        **best_trial.params,
+        'bagging_freq': 1,
+        'n_estimators': int(best_trial.user_attrs.get('best_iteration') or num_boost_round),
+    }
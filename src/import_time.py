@@ -0,0 +1,89 @@
+import os
+import re
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import sys
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.paths import PARENT_DIR
+
+# presupuesto de importación en ms (acumulado, según `-X importtime`) y
+# módulos pesados que no deberían cargarse al importar cada módulo
+IMPORT_BUDGETS = {
+    'src.cli': {'budget_ms': 50, 'forbidden': ['pandas', 'numpy', 'hsfs', 'hopsworks', 'requests']},
+    'src.paths': {'budget_ms': 50, 'forbidden': ['pandas', 'numpy']},
+    'src.config': {'budget_ms': 300, 'forbidden': ['pandas', 'hsfs', 'hopsworks']},
+    'src.data': {'budget_ms': 1500, 'forbidden': ['hsfs', 'hopsworks', 'requests', 'tqdm', 'lightgbm', 'streamlit']},
+}
+
+_IMPORT_TIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def measure_import_time(module: str) -> Dict[str, int]:
+    """
+    Imports `module` in a fresh interpreter with `-X importtime`.
+
+    Returns:
+        Dict: cumulative import time in microseconds of every module loaded,
+        including `module` itself
+    """
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=PARENT_DIR,
+        capture_output=True,
+        text=True,
+        # sin credenciales de Hopsworks: importar no debe conectarse a nada
+        env={**os.environ, 'FEATURE_STORE_BACKEND': 'local'},
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f'Importing {module} failed:\n{completed.stderr[-2000:]}')
+
+    cumulative_us = {}
+    for line in completed.stderr.splitlines():
+        match = _IMPORT_TIME_LINE.match(line)
+        if match:
+            cumulative_us[match.group(4)] = int(match.group(2))
+    return cumulative_us
+
+
+def check_import_budgets(budgets: Optional[dict] = None, n_runs: int = 3) -> List[dict]:
+    """
+    Measures every module in `budgets` (best of `n_runs`, to skip cold disk
+    caches) and checks its budget and forbidden imports.
+
+    Returns:
+        List: one dict per module with the time in ms, the budget, the
+        forbidden modules that were imported and whether it passed
+    """
+    results = []
+    for module, budget in (budgets or IMPORT_BUDGETS).items():
+        runs = [measure_import_time(module) for _ in range(n_runs)]
+        elapsed_ms = min(run[module] for run in runs) / 1000
+        imported = set(runs[0])
+        forbidden = [m for m in budget['forbidden'] if m in imported]
+        results.append({
+            'module': module,
+            'ms': round(elapsed_ms, 1),
+            'budget_ms': budget['budget_ms'],
+            'forbidden_imported': forbidden,
+            'ok': elapsed_ms <= budget['budget_ms'] and not forbidden,
+        })
+    return results
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Check the import-time budget of the project modules')
+    parser.add_argument('--n-runs', type=int, default=3)
+    args = parser.parse_args()
+
+    results = check_import_budgets(n_runs=args.n_runs)
+    for r in results:
+        status = 'OK ' if r['ok'] else 'MAL'
+        extra = f" (importa {', '.join(r['forbidden_imported'])})" if r['forbidden_imported'] else ''
+        print(f"[{status}] {r['module']:<12} {r['ms']:>8.1f} ms / {r['budget_ms']} ms{extra}")
+
+    sys.exit(0 if all(r['ok'] for r in results) else 1)
@@ -0,0 +1,125 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import pandas as pd
+import lightgbm as lgb
+from sklearn.base import clone
+from sklearn.pipeline import Pipeline
+from sklearn.metrics import mean_absolute_error
+
+from src.profiling import measure
+
+
+def _final_estimator(model) -> lgb.LGBMRegressor:
+    estimator = model.steps[-1][1] if isinstance(model, Pipeline) else model
+    if not isinstance(estimator, lgb.LGBMRegressor):
+        raise ValueError(
+            f'Warm-start retraining requires a LightGBM model, got {type(estimator).__name__}'
+        )
+    return estimator
+
+
+def continue_training(
+    model,
+    X_new: pd.DataFrame,
+    y_new: pd.Series,
+    num_boost_round: int = 100,
+):
+    """
+    Continues boosting a fitted LightGBM model (or a `get_pipeline` pipeline)
+    on new data only, starting from its current trees (`init_model`).
+
+    The original model is left untouched; a new fitted model is returned with
+    `num_boost_round` extra trees.
+
+    Args:
+        model: fitted `lgb.LGBMRegressor` or sklearn pipeline ending in one
+        X_new (pd.DataFrame): features of the new window
+        y_new (pd.Series): target of the new window
+        num_boost_round (int): number of trees to add
+
+    Returns:
+        the warm-started model
+    """
+    init_booster = _final_estimator(model).booster_
+
+    new_model = clone(model)
+    if isinstance(model, Pipeline):
+        step_name = model.steps[-1][0]
+        new_model.set_params(**{f'{step_name}__n_estimators': num_boost_round})
+        fit_params = {f'{step_name}__init_model': init_booster}
+    else:
+        new_model.set_params(n_estimators=num_boost_round)
+        fit_params = {'init_model': init_booster}
+
+    # copiamos X porque `average_rides_last_4_weeks` modifica el frame in place
+    new_model.fit(X_new.copy(), y_new, **fit_params)
+    return new_model
+
+
+def _full_refit(model, X: pd.DataFrame, y: pd.Series):
+    # solo se entrena para medir su coste: no se devuelve al proceso padre
+    new_model = clone(model)
+    new_model.fit(X.copy(), y)
+
+
+def _measure_in_fresh_process(fn, *args):
+    """
+    `measure(fn, *args)` in a new (spawned) process, so the memory a previous
+    measurement took and never returned to the OS does not hide this one.
+    """
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(measure, fn, *args).result()
+
+
+def incremental_retrain(
+    model,
+    X_new: pd.DataFrame,
+    y_new: pd.Series,
+    X_holdout: pd.DataFrame,
+    y_holdout: pd.Series,
+    num_boost_round: int = 100,
+    X_history: Optional[pd.DataFrame] = None,
+    y_history: Optional[pd.Series] = None,
+) -> dict:
+    """
+    Warm-starts `model` on the new window and compares it against the
+    current model on a holdout set.
+
+    If the full history is given, a full refit (same hyper-parameters, from
+    scratch, on history + new window) is also run so the cost of both paths
+    can be compared. Each path is measured in its own fresh process.
+
+    Returns:
+        dict with:
+            - `model`: the warm-started model
+            - `old_mae` / `new_mae`: holdout MAE of the current and new model
+            - `is_better`: whether the new model matches or beats the old one
+            - `cost`: retrain time (s) and peak memory (MB) of each path
+    """
+    old_mae = mean_absolute_error(y_holdout, model.predict(X_holdout.copy()))
+
+    new_model, seconds, peak_mb = _measure_in_fresh_process(
+        continue_training, model, X_new, y_new, num_boost_round
+    )
+    new_mae = mean_absolute_error(y_holdout, new_model.predict(X_holdout.copy()))
+
+    cost = pd.DataFrame(
+        [{'path': 'incremental', 'rows': len(X_new), 'seconds': seconds, 'peak_mb': peak_mb}]
+    )
+
+    if X_history is not None and y_history is not None:
+        X_full = pd.concat([X_history, X_new], ignore_index=True)
+        y_full = pd.concat([y_history, y_new], ignore_index=True)
+        _, seconds, peak_mb = _measure_in_fresh_process(_full_refit, model, X_full, y_full)
+        cost.loc[len(cost)] = ['full_refit', len(X_full), seconds, peak_mb]
+
+    return {
+        'model': new_model,
+        'old_mae': old_mae,
+        'new_mae': new_mae,
+        'is_better': new_mae <= old_mae,
+        'cost': cost,
+    }
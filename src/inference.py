@@ -1,6 +1,5 @@
 from datetime import datetime, timedelta
 import streamlit as st
-import hopsworks
 # from hsfs.feature_store import FeatureStore
 import pandas as pd
 import numpy as np
@@ -13,8 +12,33 @@ sys.path.append(str(Path(__file__).resolve().parent.parent))
 import src.config as config
 from src.feature_store_api import get_feature_store, get_or_create_feature_view
 from src.config import FEATURE_VIEW_METADATA
+from src.feature_view_cache import BatchDataCache
 
-def get_hopsworks_project() -> hopsworks.project.Project:
+# caché local de rangos ya descargados de las feature views (compartida por
+# las dos funciones de lectura y por todas las sesiones del frontend)
+batch_data_cache = BatchDataCache()
+
+
+def get_batch_data(feature_view, start_time: datetime, end_time: datetime) -> pd.DataFrame:
+    """`feature_view.get_batch_data`, through the local cache when the feature store is remote"""
+    # el backend local ya lee de disco: la caché solo tiene sentido con Hopsworks
+    if config.FEATURE_STORE_BACKEND == 'local':
+        return feature_view.get_batch_data(start_time=start_time, end_time=end_time)
+    return batch_data_cache.get_batch_data(feature_view, start_time=start_time, end_time=end_time)
+
+def is_hour_in_store(pickup_hour: datetime) -> bool:
+    """Whether the feature pipeline already inserted the rides of `pickup_hour`"""
+    feature_view = get_or_create_feature_view(FEATURE_VIEW_METADATA)
+    pickup_hour = pd.to_datetime(pickup_hour, utc=True)
+    ts_data = get_batch_data(
+        feature_view,
+        start_time=pickup_hour,
+        end_time=pickup_hour + timedelta(hours=1),
+    )
+    return not ts_data.empty
+
+def get_hopsworks_project() -> 'hopsworks.project.Project':
+    import hopsworks
 
     return hopsworks.login(
         project=config.HOPSWORKS_PROJECT_NAME,
@@ -35,7 +59,11 @@ def get_model_predictions(model, features: pd.DataFrame) -> pd.DataFrame:
     return results
 
 @st.cache_data
-def load_batch_of_features_from_store(
+def load_batch_of_features_from_store(current_date: pd.Timestamp) -> pd.DataFrame:
+    """`fetch_batch_of_features_from_store`, cached by Streamlit"""
+    return fetch_batch_of_features_from_store(current_date)
+
+def fetch_batch_of_features_from_store(
     current_date: pd.Timestamp,    
 ) -> pd.DataFrame:
     """Fetches the batch of features used by the ML system at `current_date`
@@ -60,7 +88,9 @@ def load_batch_of_features_from_store(
     fetch_data_to = current_date - timedelta(hours=1)
 
     # add plus minus margin to make sure we do not drop any observation
-    ts_data = feature_view.get_batch_data(
+    # (only the hours not cached yet are downloaded from the feature store)
+    ts_data = get_batch_data(
+        feature_view,
         start_time=fetch_data_from - timedelta(days=1),
         end_time=fetch_data_to + timedelta(days=1)
     )
@@ -111,23 +141,16 @@ def load_batch_of_features_from_store(
 
     return features
     
-@st.cache_resource
+# se vuelve a consultar el registry cada hora: así se sirve la versión que
+# haya promovido un reentrenamiento sin reiniciar la app
+@st.cache_resource(ttl=timedelta(hours=1))
 def load_model_from_registry():
-    
-    import joblib
-    from pathlib import Path
+    # Hopsworks o registry local, según `FEATURE_STORE_BACKEND`
+    from src.model_registry import load_production_model
 
-    project = get_hopsworks_project()
-    model_registry = project.get_model_registry()
+    # la última versión promovida a producción por `register_model`
+    model, _ = load_production_model(name=config.MODEL_NAME)
 
-    model = model_registry.get_model(
-        name=config.MODEL_NAME,
-        version=config.MODEL_VERSION,
-    )  
-    
-    model_dir = model.download()
-    model = joblib.load(Path(model_dir)  / 'gb_model.pkl')
-       
     return model
 
 def load_predictions_from_store(
@@ -160,7 +183,8 @@ def load_predictions_from_store(
 
     # get data from the feature view
     print(f'Fetching predictions for `pickup_hours` between {from_pickup_hour}  and {to_pickup_hour}')
-    predictions = predictions_fv.get_batch_data(
+    predictions = get_batch_data(
+        predictions_fv,
         start_time=from_pickup_hour - timedelta(days=1),
         end_time=to_pickup_hour + timedelta(days=1)
     )
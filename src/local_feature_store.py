@@ -0,0 +1,405 @@
+import json
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+import sys
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.paths import PARENT_DIR
+
+# repo de Feast del proyecto: el almacenamiento local vive en su carpeta `data`
+FEATURE_REPO_DIR = Path(PARENT_DIR) / 'taxi_demand' / 'feature_repo'
+OFFLINE_STORE_DIR = FEATURE_REPO_DIR / 'data' / 'offline'
+FEATURE_VIEWS_DIR = FEATURE_REPO_DIR / 'data' / 'feature_views'
+ONLINE_STORE_PATH = FEATURE_REPO_DIR / 'data' / 'online_store_local.db'
+
+# a partir de este número de ficheros por feature group, se compactan en uno
+MAX_OFFLINE_PARTS = 16
+
+
+def _to_epoch_ms(ts: datetime) -> int:
+    ts = pd.Timestamp(ts)
+    ts = ts.tz_localize('UTC') if ts.tzinfo is None else ts.tz_convert('UTC')
+    return ts.value // 10**6
+
+
+class LocalFeatureGroup:
+    """
+    Local feature group with the subset of the `hsfs.feature_group.FeatureGroup`
+    API used in this project.
+
+    - Offline store: one parquet file per insert, under
+      `OFFLINE_STORE_DIR/{name}_v{version}`. Reads upsert on the primary key
+      (the last insert wins), and files are compacted into one when there are
+      more than `MAX_OFFLINE_PARTS`.
+    - Online store (if `online_enabled`): one SQLite table keyed by the
+      primary key, with the latest values of each key.
+    """
+    def __init__(
+        self,
+        name: str,
+        version: int,
+        primary_key: List[str],
+        event_time: str,
+        description: str = '',
+        online_enabled: bool = False,
+    ):
+        self.name = name
+        self.version = version
+        self.primary_key = list(primary_key)
+        self.event_time = event_time
+        self.description = description
+        self.online_enabled = online_enabled
+        self._lock = threading.Lock()
+        self._cache_key, self._cache = None, None
+
+    @property
+    def path(self) -> Path:
+        return OFFLINE_STORE_DIR / f'{self.name}_v{self.version}'
+
+    def _metadata(self) -> dict:
+        return {
+            'name': self.name,
+            'version': self.version,
+            'primary_key': self.primary_key,
+            'event_time': self.event_time,
+            'description': self.description,
+            'online_enabled': self.online_enabled,
+        }
+
+    def save_metadata(self):
+        self.path.mkdir(parents=True, exist_ok=True)
+        (self.path / '_metadata.json').write_text(json.dumps(self._metadata(), indent=2))
+
+    # --- writes ------------------------------------------------------------
+
+    def insert(self, features: pd.DataFrame, write_options: Optional[dict] = None):
+        """Upserts `features` on the primary key. `write_options` is ignored."""
+        with self._lock:
+            self.path.mkdir(parents=True, exist_ok=True)
+            parts = self._parts()
+            next_part = int(parts[-1].stem.split('-')[1]) + 1 if parts else 0
+            tmp_path = self.path / f'part-{next_part:06d}.parquet.tmp'
+            features.to_parquet(tmp_path, index=False)
+            tmp_path.replace(self.path / f'part-{next_part:06d}.parquet')
+
+            if len(parts) + 1 > MAX_OFFLINE_PARTS:
+                self._compact()
+
+        if self.online_enabled:
+            OnlineStore().upsert(self, features)
+
+    def _parts(self) -> List[Path]:
+        return sorted(self.path.glob('part-*.parquet'))
+
+    def _compact(self):
+        parts = self._parts()
+        data = self._read_parts(parts)
+        last_part = parts[-1]
+        tmp_path = self.path / f'{last_part.name}.tmp'
+        data.to_parquet(tmp_path, index=False)
+        for part in parts[:-1]:
+            part.unlink()
+        tmp_path.replace(last_part)
+
+    # --- reads -------------------------------------------------------------
+
+    def _read_parts(self, parts: List[Path]) -> pd.DataFrame:
+        if not parts:
+            return pd.DataFrame()
+        data = pd.concat([pd.read_parquet(part) for part in parts], ignore_index=True)
+        return data.drop_duplicates(subset=self.primary_key, keep='last', ignore_index=True)
+
+    def _cached(self) -> pd.DataFrame:
+        """Rows of `read`, shared (not copied) and sorted by event time"""
+        parts = self._parts()
+        # se reutiliza la última lectura mientras no cambien los ficheros
+        cache_key = tuple((p.name, p.stat().st_mtime_ns) for p in parts)
+        if cache_key != self._cache_key:
+            data = self._read_parts(parts)
+            if not data.empty:
+                data = data.sort_values(self.event_time, kind='stable', ignore_index=True)
+            self._cache, self._cache_key = data, cache_key
+        return self._cache
+
+    def read(self) -> pd.DataFrame:
+        """All the rows of the offline store, latest version of each primary key, by event time."""
+        return self._cached().copy()
+
+    def read_range(self, start_time: Optional[datetime] = None, end_time: Optional[datetime] = None) -> pd.DataFrame:
+        """Rows with `start_time <= event_time <= end_time`; the event time is in ms."""
+        data = self._cached()
+        if data.empty:
+            return data.copy()
+        # la caché está ordenada por event time: dos búsquedas binarias y
+        # solo se copia el tramo pedido
+        event_time = data[self.event_time].to_numpy()
+        i = 0 if start_time is None else np.searchsorted(event_time, _to_epoch_ms(start_time), side='left')
+        j = len(data) if end_time is None else np.searchsorted(event_time, _to_epoch_ms(end_time), side='right')
+        return data.iloc[i:j].reset_index(drop=True)
+
+    # --- queries -----------------------------------------------------------
+
+    def select_all(self) -> 'LocalQuery':
+        return LocalQuery(self)
+
+    def select(self, features: List[str]) -> 'LocalQuery':
+        return LocalQuery(self, features)
+
+
+class LocalQuery:
+    """
+    Feature group selection, optionally joined with others. Joins are always
+    inner joins on the `on` columns (`hsfs` queries default to left joins;
+    callers of this project drop the unmatched rows anyway).
+    """
+    def __init__(self, feature_group: LocalFeatureGroup, features: Optional[List[str]] = None):
+        self.feature_group = feature_group
+        self.features = features
+        self.joins = []
+
+    def join(self, sub_query: 'LocalQuery', on: List[str]) -> 'LocalQuery':
+        self.joins.append((sub_query, list(on)))
+        return self
+
+    def read(self, start_time: Optional[datetime] = None, end_time: Optional[datetime] = None) -> pd.DataFrame:
+        data = self.feature_group.read_range(start_time, end_time)
+        if self.features is not None:
+            data = data[self.features]
+        for sub_query, on in self.joins:
+            data = data.merge(sub_query.read(start_time, end_time), on=on, how='inner')
+        return data
+
+    def to_dict(self) -> dict:
+        return {
+            'feature_group': {'name': self.feature_group.name, 'version': self.feature_group.version},
+            'features': self.features,
+            'joins': [{'query': q.to_dict(), 'on': on} for q, on in self.joins],
+        }
+
+    @classmethod
+    def from_dict(cls, spec: dict, feature_store: 'LocalFeatureStore') -> 'LocalQuery':
+        feature_group = feature_store.get_feature_group(**spec['feature_group'])
+        query = cls(feature_group, spec['features'])
+        for join in spec['joins']:
+            query.join(cls.from_dict(join['query'], feature_store), join['on'])
+        return query
+
+
+class LocalFeatureView:
+    """Local feature view with the `hsfs.feature_view.FeatureView` methods used in this project."""
+    def __init__(self, name: str, version: int, query: LocalQuery):
+        self.name = name
+        self.version = version
+        self.query = query
+
+    def get_batch_data(self, start_time: Optional[datetime] = None, end_time: Optional[datetime] = None) -> pd.DataFrame:
+        """Rows from the offline store with `start_time <= event_time <= end_time`."""
+        return self.query.read(start_time, end_time)
+
+    @staticmethod
+    def _online_rows(query: LocalQuery, entry: List[dict]):
+        """
+        Online rows of every feature group of `query`, each one looked up by
+        its own primary key taken from `entry`, side by side in the order of
+        `entry`. As the inner joins of the offline read, a row is only found
+        if every feature group has its key.
+        """
+        feature_group = query.feature_group
+        primary_key = feature_group.primary_key
+        missing = [k for k in primary_key if any(k not in e for e in entry)]
+        if missing:
+            raise ValueError(
+                f'Entries must have the primary key {primary_key} of feature group '
+                f'{feature_group.name}, missing {missing}'
+            )
+
+        data = OnlineStore().get(feature_group, [{k: e[k] for k in primary_key} for e in entry])
+        if query.features is not None:
+            data = data[primary_key + [f for f in query.features if f not in primary_key]]
+        found = data.drop(columns=primary_key).notna().any(axis=1).to_numpy()
+
+        for sub_query, _ in query.joins:
+            sub_data, sub_found = LocalFeatureView._online_rows(sub_query, entry)
+            # las columnas del join ya están en el lado izquierdo, como en el merge offline
+            data = pd.concat([data, sub_data[[c for c in sub_data.columns if c not in data.columns]]], axis=1)
+            found &= sub_found
+        return data, found
+
+    def get_feature_vectors(self, entry: List[dict], return_type: str = 'list'):
+        """
+        Latest values of each primary key in `entry`, from the online store,
+        in the same order as `entry`. As in `hsfs`, each vector has all the
+        features of the view, primary key included, and on views with joins
+        the entries need the primary keys of every feature group. Keys that
+        are not in the online store get `None` (list) or are dropped (pandas).
+        """
+        data, found = self._online_rows(self.query, entry)
+        if return_type == 'pandas':
+            return data[found].reset_index(drop=True)
+        return [row if is_found else None for row, is_found in zip(data.to_numpy().tolist(), found)]
+
+    def get_feature_vector(self, entry: dict, return_type: str = 'list'):
+        vectors = self.get_feature_vectors([entry], return_type=return_type)
+        return vectors[0] if return_type == 'list' else vectors
+
+
+class LocalFeatureStore:
+    """
+    Drop-in replacement of `hsfs.feature_store.FeatureStore` for the calls in
+    `src.feature_store_api`, storing everything under the Feast repo in
+    `taxi_demand/feature_repo/data`.
+
+    There is a single `LocalFeatureGroup` per (name, version) in the process,
+    shared by every store instance, so its write lock and read cache cover
+    all the callers.
+    """
+    _feature_groups = {}
+    _feature_groups_lock = threading.Lock()
+
+    def get_feature_group(self, name: str, version: int = 1) -> LocalFeatureGroup:
+        with self._feature_groups_lock:
+            feature_group = self._feature_groups.get((name, version))
+            if feature_group is None:
+                metadata_path = OFFLINE_STORE_DIR / f'{name}_v{version}' / '_metadata.json'
+                if not metadata_path.exists():
+                    raise KeyError(f'Feature group {name} (v{version}) does not exist')
+                feature_group = LocalFeatureGroup(**json.loads(metadata_path.read_text()))
+                self._feature_groups[(name, version)] = feature_group
+            return feature_group
+
+    def get_or_create_feature_group(
+        self,
+        name: str,
+        version: int,
+        description: str,
+        primary_key: List[str],
+        event_time: str,
+        online_enabled: bool = False,
+    ) -> LocalFeatureGroup:
+        try:
+            return self.get_feature_group(name, version)
+        except KeyError:
+            with self._feature_groups_lock:
+                feature_group = self._feature_groups.get((name, version))
+                if feature_group is None:
+                    feature_group = LocalFeatureGroup(
+                        name=name,
+                        version=version,
+                        primary_key=primary_key,
+                        event_time=event_time,
+                        description=description,
+                        online_enabled=online_enabled,
+                    )
+                    feature_group.save_metadata()
+                    self._feature_groups[(name, version)] = feature_group
+                return feature_group
+
+    def get_feature_view(self, name: str, version: int = 1) -> LocalFeatureView:
+        path = FEATURE_VIEWS_DIR / f'{name}_v{version}.json'
+        if not path.exists():
+            raise KeyError(f'Feature view {name} (v{version}) does not exist')
+        return LocalFeatureView(name, version, LocalQuery.from_dict(json.loads(path.read_text()), self))
+
+    def create_feature_view(self, name: str, version: int, query: LocalQuery, **kwargs) -> LocalFeatureView:
+        FEATURE_VIEWS_DIR.mkdir(parents=True, exist_ok=True)
+        (FEATURE_VIEWS_DIR / f'{name}_v{version}.json').write_text(json.dumps(query.to_dict(), indent=2))
+        return LocalFeatureView(name, version, query)
+
+
+class OnlineStore:
+    """
+    SQLite online store: one table per feature group, with the primary key
+    as table key, so each upsert and lookup is an indexed operation.
+    Datetime columns are stored as int64 ns (UTC) and restored on reads.
+    """
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or ONLINE_STORE_PATH)
+
+    def _connect(self) -> sqlite3.Connection:
+        """New connection; close it with `contextlib.closing` (`with connection` only commits)"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=60)
+        try:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS _columns (tbl TEXT, col TEXT, dtype TEXT, PRIMARY KEY (tbl, col))'
+            )
+        except Exception:
+            connection.close()
+            raise
+        return connection
+
+    @staticmethod
+    def _table(feature_group: LocalFeatureGroup) -> str:
+        return f'{feature_group.name}_v{feature_group.version}'
+
+    @staticmethod
+    def _sql_type(dtype) -> str:
+        if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype) \
+                or pd.api.types.is_datetime64_any_dtype(dtype):
+            return 'INTEGER'
+        if pd.api.types.is_float_dtype(dtype):
+            return 'REAL'
+        return 'TEXT'
+
+    def upsert(self, feature_group: LocalFeatureGroup, features: pd.DataFrame):
+        table = self._table(feature_group)
+        columns = list(features.columns)
+        values = {}
+        for column in columns:
+            if pd.api.types.is_datetime64_any_dtype(features[column]):
+                values[column] = pd.to_datetime(features[column], utc=True).values.astype('datetime64[ns]').astype(np.int64)
+            else:
+                values[column] = features[column].to_numpy()
+        rows = list(zip(*(values[c].tolist() for c in columns)))
+
+        with closing(self._connect()) as connection, connection:
+            column_defs = ', '.join(f'"{c}" {self._sql_type(features[c].dtype)}' for c in columns)
+            primary_key = ', '.join(f'"{c}"' for c in feature_group.primary_key)
+            connection.execute(f'CREATE TABLE IF NOT EXISTS "{table}" ({column_defs}, PRIMARY KEY ({primary_key}))')
+            connection.executemany(
+                'INSERT OR REPLACE INTO _columns VALUES (?, ?, ?)',
+                [(table, c, str(features[c].dtype)) for c in columns],
+            )
+            connection.executemany(
+                f'INSERT OR REPLACE INTO "{table}" ({", ".join(chr(34) + c + chr(34) for c in columns)}) '
+                f'VALUES ({", ".join("?" * len(columns))})',
+                rows,
+            )
+
+    def get(self, feature_group: LocalFeatureGroup, entry: List[dict]) -> pd.DataFrame:
+        """Rows of the primary keys in `entry`, in the same order; missing keys are all-NaN rows."""
+        table = self._table(feature_group)
+        primary_key = feature_group.primary_key
+        keys = pd.DataFrame(entry, columns=primary_key)
+
+        with closing(self._connect()) as connection, connection:
+            dtypes = dict(connection.execute('SELECT col, dtype FROM _columns WHERE tbl = ?', (table,)).fetchall())
+            if not dtypes:
+                raise KeyError(f'Feature group {table} has no online data')
+
+            # las claves van a una tabla temporal y se cruzan con la tabla de
+            # features: una búsqueda por índice por clave, en una sola consulta
+            key_columns = ', '.join(f'"{c}"' for c in primary_key)
+            connection.execute(f'CREATE TEMP TABLE _keys ({key_columns})')
+            connection.executemany(
+                f'INSERT INTO _keys VALUES ({", ".join("?" * len(primary_key))})',
+                keys.astype(object).itertuples(index=False, name=None),
+            )
+            join_condition = ' AND '.join(f't."{c}" = k."{c}"' for c in primary_key)
+            data = pd.read_sql_query(
+                f'SELECT t.* FROM _keys k JOIN "{table}" t ON {join_condition}', connection
+            )
+            connection.execute('DROP TABLE _keys')
+
+        for column, dtype in dtypes.items():
+            if dtype.startswith('datetime64'):
+                data[column] = pd.to_datetime(data[column], unit='ns', utc='UTC' in dtype or ',' in dtype)
+        return keys.merge(data, on=primary_key, how='left')
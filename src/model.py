@@ -57,4 +57,52 @@ def get_pipeline(**hyperparams) -> Pipeline:
         add_feature_average_rides_last_4_weeks,
         add_temporal_features,
         lgb.LGBMRegressor(**hyperparams)
-    )
\ No newline at end of file
+    )
+
+def train_lightgbm(X: pd.DataFrame, y: pd.Series, **hyperparams) -> lgb.LGBMRegressor:
+    """
+    Fits a plain LightGBM regressor on the given features and target.
+
+    Args:
+        X (pd.DataFrame): features
+        y (pd.Series): target
+        **hyperparams: hyper-parameters forwarded to `lgb.LGBMRegressor`
+
+    Returns:
+        lgb.LGBMRegressor: fitted model
+    """
+    model = lgb.LGBMRegressor(**hyperparams)
+    model.fit(X, y)
+    return model
+
+
+def eval_model(model, X: pd.DataFrame, y: pd.Series) -> dict:
+    """
+    Computes the validation metrics we track for every model (same names we
+    log to MLflow).
+
+    Returns:
+        dict: `mae`, `mse` and `r2`
+    """
+    from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+    y_pred = model.predict(X)
+    return {
+        'mae': mean_absolute_error(y, y_pred),
+        'mse': mean_squared_error(y, y_pred),
+        'r2': r2_score(y, y_pred),
+    }
+
+
+
+def set_n_jobs(model, n_jobs: int):
+    """
+    Sets the number of LightGBM threads `model.predict` uses. `model` is a
+    plain LightGBM regressor or a pipeline from `get_pipeline`.
+
+    Returns:
+        the same model
+    """
+    estimator = model.steps[-1][1] if isinstance(model, Pipeline) else model
+    estimator.set_params(n_jobs=n_jobs)
+    return model
@@ -0,0 +1,200 @@
+from pathlib import Path
+from typing import Optional
+
+import json
+import shutil
+from datetime import datetime, timezone
+
+import joblib
+import pandas as pd
+
+import sys
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import src.config as config
+from src.paths import MODELS_DIR
+
+# nombre del fichero con el que se guarda el modelo en el registry
+MODEL_FILE = 'gb_model.pkl'
+
+# registry local (backend 'local'): una carpeta por nombre y versión
+LOCAL_MODEL_REGISTRY_DIR = Path(MODELS_DIR) / 'registry'
+
+# tag de las versiones promovidas a producción; sirve la más reciente
+PRODUCTION_TAG = 'production'
+
+
+class LocalModel:
+    """One version of a model in the `LocalModelRegistry`, with the `hsml` methods we use."""
+    def __init__(self, name: str, version: int, metrics: dict = None, description: str = '', tags: dict = None):
+        self.name = name
+        self.version = version
+        self.training_metrics = metrics or {}
+        self.description = description
+        self._tags = tags or {}
+
+    @property
+    def path(self) -> Path:
+        return LOCAL_MODEL_REGISTRY_DIR / self.name / str(self.version)
+
+    def download(self) -> str:
+        return str(self.path)
+
+    def save(self, model_dir: str):
+        """Copies the content of `model_dir` into the registry."""
+        shutil.copytree(model_dir, self.path, dirs_exist_ok=True)
+        self._write_metadata(created_at=datetime.now(timezone.utc).isoformat())
+
+    def _write_metadata(self, created_at: str):
+        (self.path / 'metadata.json').write_text(json.dumps({
+            'metrics': self.training_metrics,
+            'description': self.description,
+            'created_at': created_at,
+            'tags': self._tags,
+        }, indent=2))
+
+    def set_tag(self, name: str, value):
+        metadata = json.loads((self.path / 'metadata.json').read_text())
+        self._tags[name] = value
+        self._write_metadata(created_at=metadata['created_at'])
+
+    def get_tags(self) -> dict:
+        return dict(self._tags)
+
+
+class LocalModelRegistry:
+    """
+    Model registry on the local disk (`LOCAL_MODEL_REGISTRY_DIR`), with the
+    subset of the Hopsworks model registry API used in this project.
+    """
+    @property
+    def sklearn(self) -> 'LocalModelRegistry':
+        return self
+
+    def _versions(self, name: str) -> list:
+        directory = LOCAL_MODEL_REGISTRY_DIR / name
+        if not directory.exists():
+            return []
+        return sorted(int(p.name) for p in directory.iterdir() if (p / 'metadata.json').exists())
+
+    def get_model(self, name: str, version: int) -> LocalModel:
+        metadata_path = LOCAL_MODEL_REGISTRY_DIR / name / str(version) / 'metadata.json'
+        if not metadata_path.exists():
+            raise KeyError(f'Model {name} (v{version}) is not in the local registry')
+        metadata = json.loads(metadata_path.read_text())
+        return LocalModel(name, version, metadata['metrics'], metadata['description'], metadata.get('tags'))
+
+    def get_models(self, name: str) -> list:
+        return [self.get_model(name, version) for version in self._versions(name)]
+
+    def get_best_model(self, name: str, metric: str, direction: str) -> LocalModel:
+        models = [m for m in self.get_models(name) if metric in m.training_metrics]
+        if not models:
+            raise KeyError(f'No version of {name} has the metric {metric}')
+        best = min if direction == 'min' else max
+        return best(models, key=lambda m: m.training_metrics[metric])
+
+    def create_model(self, name: str, metrics: dict = None, description: str = '', **kwargs) -> LocalModel:
+        versions = self._versions(name)
+        return LocalModel(name, versions[-1] + 1 if versions else 1, metrics, description)
+
+
+def get_model_registry():
+    """Connects to Hopsworks and returns a pointer to the model registry
+    (a `LocalModelRegistry` with `FEATURE_STORE_BACKEND = 'local'`)"""
+    if config.FEATURE_STORE_BACKEND == 'local':
+        return LocalModelRegistry()
+
+    import hopsworks
+
+    project = hopsworks.login(
+        project=config.HOPSWORKS_PROJECT_NAME,
+        api_key_value=config.HOPSWORKS_API_KEY
+    )
+    return project.get_model_registry()
+
+
+def get_production_version(model_registry, name: str = config.MODEL_NAME) -> int:
+    """
+    Latest version of `name` promoted to production (tagged `PRODUCTION_TAG`
+    by `register_model`), or `config.MODEL_VERSION` if none was promoted yet.
+    """
+    # las versiones de distintos reentrenamientos no se evalúan sobre el mismo
+    # holdout: su `test_mae` no es comparable, así que manda la última promovida
+    promoted = [
+        model.version for model in model_registry.get_models(name=name)
+        if model.get_tags().get(PRODUCTION_TAG)
+    ]
+    return max(promoted) if promoted else config.MODEL_VERSION
+
+
+def load_production_model(
+    name: str = config.MODEL_NAME,
+    version: Optional[int] = None,
+):
+    """
+    Downloads the model `name` from the model registry and loads it.
+
+    Args:
+        name (str): name of the model in the registry
+        version (int, optional): version to load. If `None`, the production
+            version (see `get_production_version`).
+
+    Returns:
+        Tuple: fitted model and its registry version
+    """
+    model_registry = get_model_registry()
+
+    if version is None:
+        version = get_production_version(model_registry, name)
+    model = model_registry.get_model(name=name, version=version)
+
+    model_dir = model.download()
+    return joblib.load(Path(model_dir) / MODEL_FILE), model.version
+
+
+def register_model(
+    model,
+    X_sample: pd.DataFrame,
+    y_sample: pd.Series,
+    metrics: dict,
+    description: str,
+    name: str = config.MODEL_NAME,
+    promote: bool = True,
+):
+    """
+    Saves `model` locally and registers it as a new version of `name` in the
+    model registry, with the input/output schema inferred from the samples.
+    With `promote`, the new version becomes the production one (the next
+    `load_production_model` loads it).
+
+    Returns:
+        the registered model version
+    """
+    model_dir = Path(MODELS_DIR) / name
+    model_dir.mkdir(parents=True, exist_ok=True)
+    joblib.dump(model, model_dir / MODEL_FILE)
+
+    model_schema = None
+    if config.FEATURE_STORE_BACKEND != 'local':
+        from hsml.schema import Schema
+        from hsml.model_schema import ModelSchema
+
+        model_schema = ModelSchema(
+            input_schema=Schema(X_sample),
+            output_schema=Schema(y_sample),
+        )
+
+    model_registry = get_model_registry()
+    registered_model = model_registry.sklearn.create_model(
+        name=name,
+        metrics=metrics,
+        description=description,
+        input_example=X_sample.sample(),
+        model_schema=model_schema,
+    )
+    registered_model.save(str(model_dir))
+    if promote:
+        registered_model.set_tag(PRODUCTION_TAG, True)
+
+    return registered_model.version
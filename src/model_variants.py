@@ -0,0 +1,219 @@
+import copy
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import lightgbm as lgb
+from sklearn.base import clone
+from sklearn.pipeline import Pipeline
+from sklearn.metrics import mean_absolute_error
+
+# tamaños de lote al servir: una zona, y todas las zonas de una hora
+SERVING_BATCH_SIZES = (1, 265)
+
+
+def _final_estimator(model) -> lgb.LGBMRegressor:
+    estimator = model.steps[-1][1] if isinstance(model, Pipeline) else model
+    if not isinstance(estimator, lgb.LGBMRegressor):
+        raise ValueError(f'Model variants require a LightGBM model, got {type(estimator).__name__}')
+    return estimator
+
+
+def _refit(model, X_train: pd.DataFrame, y_train: pd.Series, **params):
+    """Clone of `model` with `params` on its LightGBM step, fitted from scratch"""
+    new_model = clone(model)
+    if isinstance(model, Pipeline):
+        step_name = model.steps[-1][0]
+        params = {f'{step_name}__{key}': value for key, value in params.items()}
+    new_model.set_params(**params)
+    # copiamos X porque `average_rides_last_4_weeks` modifica el frame in place
+    new_model.fit(X_train.copy(), y_train)
+    return new_model
+
+
+def _truncate(model, n_trees: int):
+    """
+    Copy of `model` that only uses its first `n_trees` trees: LightGBM
+    predicts with `best_iteration` trees when it is set, so there is no
+    retraining.
+    """
+    new_model = copy.deepcopy(model)
+    _final_estimator(new_model).booster_.best_iteration = n_trees
+    return new_model
+
+
+def n_trees_used(model) -> int:
+    booster = _final_estimator(model).booster_
+    return booster.best_iteration if booster.best_iteration > 0 else booster.current_iteration()
+
+
+def make_variants(
+    model,
+    X_train: Optional[pd.DataFrame] = None,
+    y_train: Optional[pd.Series] = None,
+    tree_fractions: Iterable[float] = (0.25, 0.5, 0.75),
+    max_num_leaves: Iterable[int] = (7, 15),
+) -> Dict[str, object]:
+    """
+    Family of cheaper variants of a fitted LightGBM model (or `get_pipeline`
+    pipeline):
+
+    - `truncated_{n}`: the same model using only its first n trees
+    - `trees_{n}`: refit with n trees and the learning rate scaled by the
+      fraction of trees removed, so the model takes steps of similar size
+    - `leaves_{n}`: refit with `num_leaves` capped at n
+
+    Refits need `X_train` and `y_train`; without them only the truncated
+    variants are built. The original model is included as `original`. With
+    `X_train`, `original` is also refit on it (same hyper-parameters), so no
+    variant has seen data after `X_train` (e.g. the validation window the
+    production model may have been trained on), and they compare fairly.
+    """
+    if X_train is not None and y_train is not None:
+        model = _refit(model, X_train, y_train)
+    estimator = _final_estimator(model)
+    n_trees = n_trees_used(model)
+    fractions = sorted({f for f in tree_fractions if 0 < f < 1})
+
+    variants = {'original': model}
+    for fraction in fractions:
+        n = max(1, int(round(fraction * n_trees)))
+        variants[f'truncated_{n}'] = _truncate(model, n)
+
+    if X_train is None or y_train is None:
+        return variants
+
+    learning_rate = estimator.get_params()['learning_rate']
+    for fraction in fractions:
+        n = max(1, int(round(fraction * n_trees)))
+        variants[f'trees_{n}'] = _refit(
+            model, X_train, y_train,
+            n_estimators=n, learning_rate=min(learning_rate * n_trees / n, 1.0),
+        )
+
+    num_leaves = estimator.get_params()['num_leaves']
+    for leaves in sorted(set(max_num_leaves)):
+        if leaves < num_leaves:
+            variants[f'leaves_{leaves}'] = _refit(model, X_train, y_train, num_leaves=leaves)
+
+    return variants
+
+
+def measure_latency(
+    model,
+    X: pd.DataFrame,
+    batch_sizes: Iterable[int] = SERVING_BATCH_SIZES,
+    n_repeats: int = 200,
+    seed: int = 42,
+) -> Dict[str, float]:
+    """
+    p50 and p99 wall time in ms of `model.predict` on batches of random rows
+    of `X`, `n_repeats` times per batch size, after one warm-up call.
+
+    Returns:
+        Dict: `p50_ms_{batch_size}` and `p99_ms_{batch_size}` of every size
+    """
+    rng = np.random.default_rng(seed)
+    latency = {}
+    for batch_size in batch_sizes:
+        rows = rng.integers(0, len(X), size=batch_size)
+        # una copia por llamada, fuera del tiempo medido: el pipeline modifica X in place
+        batches = [X.iloc[rows].copy() for _ in range(n_repeats + 1)]
+        model.predict(batches.pop())
+
+        timings = []
+        for batch in batches:
+            start = time.perf_counter()
+            model.predict(batch)
+            timings.append(time.perf_counter() - start)
+
+        latency[f'p50_ms_{batch_size}'] = 1000 * float(np.percentile(timings, 50))
+        latency[f'p99_ms_{batch_size}'] = 1000 * float(np.percentile(timings, 99))
+    return latency
+
+
+def evaluate_variants(
+    variants: Dict[str, object],
+    X_val: pd.DataFrame,
+    y_val: pd.Series,
+    batch_sizes: Iterable[int] = SERVING_BATCH_SIZES,
+    n_repeats: int = 200,
+) -> pd.DataFrame:
+    """
+    Validation MAE and predict latency (see `measure_latency`) of every variant.
+
+    Returns:
+        pd.DataFrame: one row per variant, sorted by MAE
+    """
+    rows = []
+    for name, model in variants.items():
+        estimator = _final_estimator(model)
+        rows.append({
+            'variant': name,
+            'n_trees': n_trees_used(model),
+            'num_leaves': estimator.get_params()['num_leaves'],
+            'mae': mean_absolute_error(y_val, model.predict(X_val.copy())),
+            **measure_latency(model, X_val, batch_sizes, n_repeats),
+        })
+    return pd.DataFrame(rows).sort_values('mae').reset_index(drop=True)
+
+
+def pareto_frontier(results: pd.DataFrame, latency_column: str) -> pd.DataFrame:
+    """
+    Variants not dominated by another one, i.e. no other variant is at least
+    as fast and at least as accurate (and strictly better in one of them).
+    Sorted from fastest to most accurate.
+    """
+    frontier = []
+    best_mae = np.inf
+    for _, row in results.sort_values([latency_column, 'mae']).iterrows():
+        if row['mae'] < best_mae:
+            frontier.append(row)
+            best_mae = row['mae']
+    return pd.DataFrame(frontier).reset_index(drop=True)
+
+
+def select_variant(
+    results: pd.DataFrame,
+    latency_budget_ms: float,
+    latency_column: str,
+) -> Optional[pd.Series]:
+    """Most accurate variant whose latency fits the budget, `None` if no variant fits"""
+    within_budget = results[results[latency_column] <= latency_budget_ms]
+    if within_budget.empty:
+        return None
+    return within_budget.sort_values(['mae', latency_column]).iloc[0]
+
+
+def select_model_variant(
+    model,
+    X_train: pd.DataFrame,
+    y_train: pd.Series,
+    X_val: pd.DataFrame,
+    y_val: pd.Series,
+    latency_budget_ms: float,
+    batch_sizes: Iterable[int] = SERVING_BATCH_SIZES,
+    n_repeats: int = 200,
+) -> Tuple[Optional[object], Optional[pd.Series], pd.DataFrame, pd.DataFrame]:
+    """
+    Builds the variants of `model`, evaluates them and picks the most
+    accurate one within `latency_budget_ms` of p99 latency at the largest
+    serving batch size.
+
+    Returns:
+        Tuple: selected model and its row of results (both `None` if no
+        variant fits the budget), results of every variant and their
+        Pareto frontier
+    """
+    batch_sizes = list(batch_sizes)
+    latency_column = f'p99_ms_{max(batch_sizes)}'
+
+    variants = make_variants(model, X_train, y_train)
+    results = evaluate_variants(variants, X_val, y_val, batch_sizes, n_repeats)
+    frontier = pareto_frontier(results, latency_column)
+
+    selected = select_variant(results, latency_budget_ms, latency_column)
+    if selected is None:
+        return None, None, results, frontier
+    return variants[selected['variant']], selected, results, frontier
@@ -0,0 +1,252 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+import sys
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.paths import DATA_CACHE_DIR
+
+DEFAULT_STATE_PATH = Path(DATA_CACHE_DIR) / 'monitoring_state.npz'
+
+# los ids de zona van de 1 a 265: indexamos directamente por id
+N_LOCATIONS = 266
+N_HOURS = 24
+
+# cuánto pueden retrasarse los datos reales de una hora respecto a la más
+# reciente ya procesada
+DEFAULT_LATENESS = timedelta(hours=48)
+HOUR_NS = 3600 * 10**9
+
+
+class ErrorAccumulator:
+    """
+    Running error statistics of the production model, per
+    (pickup_location_id, hour of day).
+
+    Only counts, sums of errors and sums of absolute errors are kept, so
+    adding a new hour of predictions is O(1) per prediction and the state is
+    a few hundred KB no matter how much history it summarizes. MAE and bias
+    per location, per hour of day or overall are derived from the sums.
+
+    `watermark` is the last `pickup_hour` already added. Actual rides may
+    arrive late, so the (pickup_hour, location) pairs already added within
+    `lateness` of the watermark are remembered: a late pair is added once, and
+    running an update twice does not count errors twice. Rows older than
+    `watermark - lateness` are too late and ignored.
+    """
+    def __init__(self, lateness: timedelta = DEFAULT_LATENESS):
+        self.count = np.zeros((N_LOCATIONS, N_HOURS), dtype=np.int64)
+        self.sum_error = np.zeros((N_LOCATIONS, N_HOURS), dtype=np.float64)
+        self.sum_abs_error = np.zeros((N_LOCATIONS, N_HOURS), dtype=np.float64)
+        self.watermark: Optional[pd.Timestamp] = None
+        self.lateness = lateness
+        # claves hora * N_LOCATIONS + zona de los pares ya sumados en la ventana
+        self.processed = np.zeros(0, dtype=np.int64)
+
+    @property
+    def window_start(self) -> Optional[pd.Timestamp]:
+        """Oldest `pickup_hour` an update still adds; `None` before the first one"""
+        return None if self.watermark is None else self.watermark - self.lateness + timedelta(hours=1)
+
+    # --- updates -----------------------------------------------------------
+
+    def update(self, monitoring_data: pd.DataFrame) -> dict:
+        """
+        Adds predictions joined with their actual rides.
+
+        Args:
+            monitoring_data (pd.DataFrame): columns `pickup_hour`,
+                `pickup_location_id`, `predicted_demand` and `rides`
+
+        Returns:
+            dict: number of new predictions, their MAE and bias, the new
+            watermark and the number of rows too late to be added
+        """
+        pickup_hour = pd.to_datetime(monitoring_data['pickup_hour'], utc=True)
+        location_ids = monitoring_data['pickup_location_id'].to_numpy().astype(np.int64)
+        # a UTC naive antes de pasar a numpy: convertir fechas con tz está obsoleto
+        hours_ns = pickup_hour.dt.tz_convert(None).to_numpy().astype('datetime64[ns]').astype(np.int64)
+        keys = hours_ns // HOUR_NS * N_LOCATIONS + location_ids
+
+        valid = monitoring_data['rides'].notna().to_numpy() \
+            & monitoring_data['predicted_demand'].notna().to_numpy()
+        too_late = np.zeros(len(monitoring_data), dtype=bool)
+        if self.watermark is not None:
+            too_late = valid & (pickup_hour < self.window_start).to_numpy()
+        new = valid & ~too_late & ~np.isin(keys, self.processed)
+        # una sola vez cada par, aunque venga repetido en `monitoring_data`
+        first = np.zeros(len(monitoring_data), dtype=bool)
+        first[np.unique(keys, return_index=True)[1]] = True
+        new &= first
+        if not new.any():
+            return {'n': 0, 'mae': None, 'bias': None, 'watermark': self.watermark,
+                    'n_too_late': int(too_late.sum())}
+
+        pickup_hour = pickup_hour[new]
+        location_ids = location_ids[new]
+        hours = pickup_hour.dt.hour.to_numpy()
+        errors = monitoring_data['predicted_demand'].to_numpy(dtype=np.float64)[new] \
+            - monitoring_data['rides'].to_numpy(dtype=np.float64)[new]
+
+        # índice plano (location, hour): bincount es una sola pasada
+        cells = location_ids * N_HOURS + hours
+        size = N_LOCATIONS * N_HOURS
+        self.count += np.bincount(cells, minlength=size).reshape(N_LOCATIONS, N_HOURS)
+        self.sum_error += np.bincount(cells, weights=errors, minlength=size).reshape(N_LOCATIONS, N_HOURS)
+        self.sum_abs_error += np.bincount(cells, weights=np.abs(errors), minlength=size).reshape(N_LOCATIONS, N_HOURS)
+        self.watermark = pickup_hour.max() if self.watermark is None else max(self.watermark, pickup_hour.max())
+
+        # solo se recuerdan los pares que aún pueden volver a llegar
+        processed = np.union1d(self.processed, keys[new])
+        self.processed = processed[processed // N_LOCATIONS >= self.window_start.value // HOUR_NS]
+
+        return {
+            'n': len(errors),
+            'mae': float(np.abs(errors).mean()),
+            'bias': float(errors.mean()),
+            'watermark': self.watermark,
+            'n_too_late': int(too_late.sum()),
+        }
+
+    # --- metrics -----------------------------------------------------------
+
+    @staticmethod
+    def _ratio(num: np.ndarray, den: np.ndarray) -> np.ndarray:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(den > 0, num / den, np.nan)
+
+    def mae(self) -> float:
+        return float(self._ratio(self.sum_abs_error.sum(), self.count.sum()))
+
+    def bias(self) -> float:
+        return float(self._ratio(self.sum_error.sum(), self.count.sum()))
+
+    def metrics_per_location(self) -> pd.DataFrame:
+        """count, MAE and bias (predicted - actual) of each location with predictions"""
+        count = self.count.sum(axis=1)
+        metrics = pd.DataFrame({
+            'pickup_location_id': np.arange(N_LOCATIONS),
+            'count': count,
+            'mae': self._ratio(self.sum_abs_error.sum(axis=1), count),
+            'bias': self._ratio(self.sum_error.sum(axis=1), count),
+        })
+        return metrics[metrics['count'] > 0].reset_index(drop=True)
+
+    def metrics_per_hour_of_day(self) -> pd.DataFrame:
+        """count, MAE and bias (predicted - actual) of each hour of the day"""
+        count = self.count.sum(axis=0)
+        return pd.DataFrame({
+            'hour': np.arange(N_HOURS),
+            'count': count,
+            'mae': self._ratio(self.sum_abs_error.sum(axis=0), count),
+            'bias': self._ratio(self.sum_error.sum(axis=0), count),
+        })
+
+    def check(self, max_mae: float, last_update: Optional[dict] = None) -> dict:
+        """
+        Flags the model when the running MAE, or the MAE of the last update,
+        is over `max_mae`, and lists the locations over it.
+        """
+        per_location = self.metrics_per_location()
+        last_mae = (last_update or {}).get('mae')
+        return {
+            'mae': self.mae(),
+            'last_mae': last_mae,
+            'alert': self.mae() > max_mae or (last_mae is not None and last_mae > max_mae),
+            'locations_over_max_mae': per_location.loc[per_location['mae'] > max_mae, 'pickup_location_id'].tolist(),
+        }
+
+    # --- persistence -------------------------------------------------------
+
+    def save(self, path: Path = DEFAULT_STATE_PATH):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        watermark = -1 if self.watermark is None else self.watermark.value
+        tmp_path = path.with_name(f'{path.name}.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                count=self.count,
+                sum_error=self.sum_error,
+                sum_abs_error=self.sum_abs_error,
+                watermark=np.int64(watermark),
+                processed=self.processed,
+            )
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path = DEFAULT_STATE_PATH, lateness: timedelta = DEFAULT_LATENESS) -> 'ErrorAccumulator':
+        """Loads the state saved in `path`, or returns an empty one if there is none."""
+        accumulator = cls(lateness)
+        path = Path(path)
+        if path.exists():
+            with np.load(path) as state:
+                accumulator.count = state['count']
+                accumulator.sum_error = state['sum_error']
+                accumulator.sum_abs_error = state['sum_abs_error']
+                watermark = int(state['watermark'])
+                if 'processed' in state:
+                    accumulator.processed = state['processed']
+            accumulator.watermark = None if watermark < 0 else pd.Timestamp(watermark, tz='UTC')
+        return accumulator
+
+
+def get_or_create_monitoring_feature_view():
+    """
+    Feature view that joins the predictions feature group with the actual
+    rides of the time-series feature group, on location and hour.
+    """
+    import src.config as config
+    from src.feature_store_api import get_feature_store
+
+    feature_store = get_feature_store()
+    try:
+        return feature_store.get_feature_view(
+            name=config.MONITORING_FV_NAME,
+            version=config.MONITORING_FV_VERSION,
+        )
+    except Exception:
+        predictions_fg = feature_store.get_feature_group(
+            name=config.FEATURE_GROUP_PREDICTIONS_METADATA.name,
+            version=config.FEATURE_GROUP_PREDICTIONS_METADATA.version,
+        )
+        actuals_fg = feature_store.get_feature_group(
+            name=config.FEATURE_GROUP_METADATA.name,
+            version=config.FEATURE_GROUP_METADATA.version,
+        )
+        query = predictions_fg.select_all().join(
+            actuals_fg.select(['pickup_location_id', 'pickup_ts', 'rides']),
+            on=['pickup_location_id', 'pickup_ts'],
+        )
+        feature_store.create_feature_view(
+            name=config.MONITORING_FV_NAME,
+            version=config.MONITORING_FV_VERSION,
+            query=query,
+        )
+        return feature_store.get_feature_view(
+            name=config.MONITORING_FV_NAME,
+            version=config.MONITORING_FV_VERSION,
+        )
+
+
+def load_monitoring_data(from_date: datetime, to_date: datetime) -> pd.DataFrame:
+    """
+    Predictions and actual rides with `from_date <= pickup_hour < to_date`.
+    Not cached locally: the actuals of the last hours may still be arriving.
+    """
+    monitoring_fv = get_or_create_monitoring_feature_view()
+    monitoring_data = monitoring_fv.get_batch_data(
+        start_time=from_date - timedelta(hours=1),
+        end_time=to_date + timedelta(hours=1),
+    )
+
+    monitoring_data['pickup_hour'] = pd.to_datetime(monitoring_data['pickup_hour'], utc=True)
+    from_date, to_date = pd.to_datetime(from_date, utc=True), pd.to_datetime(to_date, utc=True)
+    monitoring_data = monitoring_data[
+        (monitoring_data['pickup_hour'] >= from_date) & (monitoring_data['pickup_hour'] < to_date)
+    ]
+    return monitoring_data.sort_values(['pickup_hour', 'pickup_location_id'], ignore_index=True)
@@ -0,0 +1,156 @@
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import src.config as config
+from src.feature_store_api import get_or_create_feature_view
+
+# los ids de zona van de 1 a 265
+ALL_LOCATION_IDS = list(range(1, 266))
+
+
+def _online_feature_matrix(
+    current_date: datetime,
+    location_ids: List[int],
+    n_features: int,
+    feature_view=None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Feature matrix of `get_online_feature_matrix` and a boolean matrix of the cells found"""
+    feature_view = feature_view or get_or_create_feature_view(config.FEATURE_VIEW_METADATA)
+
+    current_date = pd.Timestamp(current_date)
+    current_date = current_date.tz_localize('UTC') if current_date.tzinfo is None else current_date
+    first_ts = (current_date - timedelta(hours=n_features)).value // 10**6
+    hour_ms = 3600 * 1000
+    pickup_ts = [first_ts + i * hour_ms for i in range(n_features)]
+
+    # una sola llamada con todas las claves (location, hora)
+    vectors = feature_view.get_feature_vectors(
+        entry=[
+            {'pickup_location_id': location_id, 'pickup_ts': ts}
+            for location_id in location_ids for ts in pickup_ts
+        ],
+        return_type='pandas',
+    )
+
+    x = np.zeros((len(location_ids), n_features), dtype=np.float32)
+    found = np.zeros((len(location_ids), n_features), dtype=bool)
+    if vectors is None or len(vectors) == 0:
+        return x, found
+
+    # cada fila devuelta va a su celda: fila = zona pedida, columna = hora
+    row_of_location = pd.Series(np.arange(len(location_ids)), index=location_ids)
+    rows = row_of_location.reindex(vectors['pickup_location_id'].to_numpy()).to_numpy()
+    columns = (vectors['pickup_ts'].to_numpy(dtype=np.int64) - first_ts) // hour_ms
+    valid = ~np.isnan(rows) & (columns >= 0) & (columns < n_features)
+    rows, columns = rows[valid].astype(np.int64), columns[valid]
+    x[rows, columns] = vectors['rides'].to_numpy(dtype=np.float32)[valid]
+    found[rows, columns] = True
+    return x, found
+
+
+def get_online_feature_matrix(
+    current_date: datetime,
+    location_ids: Optional[List[int]] = None,
+    n_features: int = config.N_FEATURES,
+    feature_view=None,
+) -> np.ndarray:
+    """
+    Reads the last `n_features` hourly rides before `current_date` of every
+    location in `location_ids` from the online store, in a single batched
+    `get_feature_vectors` call.
+
+    Args:
+        current_date (datetime): hour we want to predict
+        location_ids (List[int], optional): defaults to all the zones
+        n_features (int): hours of history per location
+        feature_view: defaults to `FEATURE_VIEW_METADATA`
+
+    Returns:
+        np.ndarray: float32 matrix (len(location_ids), n_features), rows in
+        the order of `location_ids` and columns from the oldest hour to the
+        most recent one, as `rides_previous_{n_features}_hour` ...
+        `rides_previous_1_hour`. Hours missing in the online store are 0.
+    """
+    location_ids = ALL_LOCATION_IDS if location_ids is None else list(location_ids)
+    x, _ = _online_feature_matrix(current_date, location_ids, n_features, feature_view)
+    return x
+
+
+def load_online_features(
+    current_date: datetime,
+    location_ids: Optional[List[int]] = None,
+    n_features: int = config.N_FEATURES,
+) -> pd.DataFrame:
+    """
+    Same output as `load_batch_of_features_from_store`, built from the
+    online store with one batched lookup. As the batch path, only the
+    locations with all their `n_features` hours in the store are returned
+    (the feature pipeline writes every hour of a location, 0 rides
+    included), sorted by `pickup_location_id`.
+    """
+    location_ids = ALL_LOCATION_IDS if location_ids is None else list(location_ids)
+    x, found = _online_feature_matrix(current_date, location_ids, n_features)
+
+    complete = found.all(axis=1)
+    order = np.argsort(np.asarray(location_ids)[complete], kind='stable')
+    features = pd.DataFrame(
+        x[complete][order],
+        columns=[f'rides_previous_{i+1}_hour' for i in reversed(range(n_features))]
+    )
+    features['pickup_hour'] = current_date
+    features['pickup_location_id'] = np.asarray(location_ids)[complete][order]
+    return features
+
+
+def benchmark_online_vs_offline(current_date: datetime, n_runs: int = 5) -> pd.DataFrame:
+    """
+    Latency of building the inference features of `current_date` with the
+    batched online lookup and with the offline `get_batch_data` path of
+    `fetch_batch_of_features_from_store` (without the Streamlit cache; the
+    local interval cache of `get_batch_data` is kept, as in production). Also checks both return the same values.
+
+    Returns:
+        pd.DataFrame: one row per path with the median and min latency in ms
+    """
+    from src.inference import fetch_batch_of_features_from_store
+
+    timings = {'online': [], 'offline': []}
+    for _ in range(n_runs):
+        start = time.perf_counter()
+        online = load_online_features(current_date)
+        timings['online'].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        offline = fetch_batch_of_features_from_store(current_date)
+        timings['offline'].append(time.perf_counter() - start)
+
+    # paridad: mismas zonas (solo las completas) y mismos valores
+    feature_columns = [c for c in offline.columns if c.startswith('rides_previous_')]
+    assert online['pickup_location_id'].tolist() == offline['pickup_location_id'].tolist(), \
+        'Online and offline paths return different locations'
+    max_abs_diff = float(np.abs(online[feature_columns].to_numpy() - offline[feature_columns].to_numpy()).max())
+    print(f'Diferencia máxima online vs offline: {max_abs_diff}')
+
+    return pd.DataFrame([
+        {'path': path, 'median_ms': 1000 * np.median(t), 'min_ms': 1000 * np.min(t)}
+        for path, t in timings.items()
+    ])
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark online vs offline inference features')
+    parser.add_argument('current_date', type=datetime.fromisoformat, help='YYYY-MM-DD HH:00')
+    parser.add_argument('--n-runs', type=int, default=5)
+    args = parser.parse_args()
+
+    print(benchmark_online_vs_offline(args.current_date, args.n_runs).to_string(index=False))
@@ -0,0 +1,318 @@
+"""
+Export of the `get_pipeline` model to a single ONNX graph, and a scorer on
+onnxruntime CPU that the frontends can use instead of unpickling the sklearn
+pipeline.
+
+The graph has the whole pipeline:
+
+    features (float32, N x k) ----------------------------+
+      -> Gather lags 168/336/504/672 -> ReduceSum -> x0.25 -+-> Concat -> LightGBM -> predictions
+    pickup_hour (int64 seconds, N x 1) -> hour, day_of_week -+
+
+`features` are the columns the pipeline receives except `pickup_hour`, in
+the same order; `pickup_hour` goes as seconds since the epoch of its wall
+clock time, so the hour and day of the week are those of `.dt.hour` and
+`.dt.dayofweek`.
+"""
+import json
+import subprocess
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+import sys
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.paths import MODELS_DIR, PARENT_DIR
+
+ONNX_MODEL_PATH = Path(MODELS_DIR) / 'model.onnx'
+
+# opset de la parte ONNX estándar del grafo (el conversor de LightGBM usa ai.onnx.ml)
+TARGET_OPSET = 15
+
+# columnas que añaden los pasos del pipeline, al final y en este orden
+ENGINEERED_COLUMNS = ['average_rides_last_4_weeks', 'hour', 'day_of_week']
+AVERAGE_LAGS = [f'rides_previous_{d * 7 * 24}_hour' for d in (1, 2, 3, 4)]
+
+
+def _check_pipeline(model):
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import FunctionTransformer
+    import lightgbm as lgb
+    from src.model import average_rides_last_4_weeks, TemporalFeaturesEngineer
+
+    steps = [step for _, step in model.steps] if isinstance(model, Pipeline) else []
+    if not (
+        len(steps) == 3
+        and isinstance(steps[0], FunctionTransformer) and steps[0].func is average_rides_last_4_weeks
+        and isinstance(steps[1], TemporalFeaturesEngineer)
+        and isinstance(steps[2], lgb.LGBMRegressor)
+    ):
+        raise ValueError('ONNX export supports the pipeline built by `get_pipeline` only')
+    return steps[2]
+
+
+def _preprocessing_graph(feature_columns: List[str], opset_imports):
+    """ONNX model with the two feature engineering steps of `get_pipeline`"""
+    from onnx import TensorProto, helper, numpy_helper
+
+    lag_indices = [feature_columns.index(c) for c in AVERAGE_LAGS]
+
+    def _const(name, values, dtype):
+        return numpy_helper.from_array(np.array(values, dtype=dtype), name)
+
+    nodes = [
+        # average_rides_last_4_weeks
+        helper.make_node('Gather', ['features', 'lag_indices'], ['lags'], axis=1),
+        helper.make_node('ReduceSum', ['lags', 'sum_axes'], ['lags_sum'], keepdims=1),
+        helper.make_node('Mul', ['lags_sum', 'quarter'], ['average_rides_last_4_weeks']),
+        # TemporalFeaturesEngineer: hora y día de la semana (1970-01-01 fue jueves, 3)
+        helper.make_node('Div', ['pickup_hour', 'seconds_per_hour'], ['hours']),
+        helper.make_node('Mod', ['hours', 'hours_per_day'], ['hour_int']),
+        helper.make_node('Cast', ['hour_int'], ['hour'], to=TensorProto.FLOAT),
+        helper.make_node('Div', ['pickup_hour', 'seconds_per_day'], ['days']),
+        helper.make_node('Add', ['days', 'thursday'], ['days_from_monday']),
+        helper.make_node('Mod', ['days_from_monday', 'days_per_week'], ['day_of_week_int']),
+        helper.make_node('Cast', ['day_of_week_int'], ['day_of_week'], to=TensorProto.FLOAT),
+        helper.make_node(
+            'Concat', ['features', 'average_rides_last_4_weeks', 'hour', 'day_of_week'],
+            ['lightgbm_input'], axis=1,
+        ),
+    ]
+    initializers = [
+        _const('lag_indices', lag_indices, np.int64),
+        _const('sum_axes', [1], np.int64),
+        _const('quarter', 0.25, np.float32),
+        _const('seconds_per_hour', 3600, np.int64),
+        _const('hours_per_day', 24, np.int64),
+        _const('seconds_per_day', 24 * 3600, np.int64),
+        _const('thursday', 3, np.int64),
+        _const('days_per_week', 7, np.int64),
+    ]
+    graph = helper.make_graph(
+        nodes,
+        'preprocessing',
+        inputs=[
+            helper.make_tensor_value_info('features', TensorProto.FLOAT, [None, len(feature_columns)]),
+            helper.make_tensor_value_info('pickup_hour', TensorProto.INT64, [None, 1]),
+        ],
+        outputs=[
+            helper.make_tensor_value_info(
+                'lightgbm_input', TensorProto.FLOAT, [None, len(feature_columns) + len(ENGINEERED_COLUMNS)]
+            ),
+        ],
+        initializer=initializers,
+    )
+    return helper.make_model(graph, opset_imports=opset_imports)
+
+
+def export_to_onnx(model, path: Path = ONNX_MODEL_PATH) -> Path:
+    """
+    Converts a fitted `get_pipeline` model into one ONNX graph (see the module
+    docstring) and saves it to `path`. The input columns are stored in the
+    model metadata, so the scorer can build its inputs from a DataFrame.
+
+    Returns:
+        Path: path of the ONNX model
+    """
+    import onnx
+    from onnx import compose, version_converter
+    from onnxmltools import convert_lightgbm
+    from onnxmltools.convert.common.data_types import FloatTensorType
+
+    regressor = _check_pipeline(model)
+    lightgbm_columns = list(regressor.feature_name_)
+    if lightgbm_columns[-len(ENGINEERED_COLUMNS):] != ENGINEERED_COLUMNS:
+        raise ValueError(f'Unexpected LightGBM features {lightgbm_columns[-len(ENGINEERED_COLUMNS):]}')
+    feature_columns = lightgbm_columns[:-len(ENGINEERED_COLUMNS)]
+
+    lightgbm_onnx = convert_lightgbm(
+        regressor.booster_,
+        initial_types=[('lightgbm_input', FloatTensorType([None, len(lightgbm_columns)]))],
+        target_opset=TARGET_OPSET,
+    )
+    # el conversor solo declara el opset mínimo que necesita; los dos grafos
+    # deben usar el mismo para poder unirlos
+    if {o.domain: o.version for o in lightgbm_onnx.opset_import}.get('', 0) < TARGET_OPSET:
+        lightgbm_onnx = version_converter.convert_version(lightgbm_onnx, TARGET_OPSET)
+    preprocessing_onnx = _preprocessing_graph(feature_columns, lightgbm_onnx.opset_import)
+    preprocessing_onnx.ir_version = lightgbm_onnx.ir_version
+
+    merged = compose.merge_models(
+        preprocessing_onnx, lightgbm_onnx, io_map=[('lightgbm_input', 'lightgbm_input')]
+    )
+    onnx.helper.set_model_props(merged, {'feature_columns': json.dumps(feature_columns)})
+    onnx.checker.check_model(merged)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    onnx.save(merged, str(path))
+    return path
+
+
+class OnnxDemandModel:
+    """
+    `get_pipeline` model exported with `export_to_onnx`, scored with
+    onnxruntime on CPU. `predict` takes the same DataFrame as the pipeline.
+    """
+    def __init__(self, path: Path = ONNX_MODEL_PATH):
+        import onnxruntime as ort
+
+        self.session = ort.InferenceSession(str(path), providers=['CPUExecutionProvider'])
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.feature_columns = json.loads(metadata['feature_columns'])
+        self.output_name = self.session.get_outputs()[0].name
+
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        pickup_hour = pd.to_datetime(X['pickup_hour'])
+        if pickup_hour.dt.tz is not None:
+            # hora local, como `.dt.hour` de pandas
+            pickup_hour = pickup_hour.dt.tz_localize(None)
+        inputs = {
+            'features': np.ascontiguousarray(X[self.feature_columns].to_numpy(dtype=np.float32)),
+            'pickup_hour': (pickup_hour.to_numpy(dtype='datetime64[s]').astype(np.int64)).reshape(-1, 1),
+        }
+        return self.session.run([self.output_name], inputs)[0].ravel()
+
+
+def get_onnx_model_predictions(model: OnnxDemandModel, features: pd.DataFrame) -> pd.DataFrame:
+    """
+    Same output as `src.inference.get_model_predictions`, scored with the
+    ONNX model. `pickup_hour` is kept: the graph computes the temporal
+    features from it.
+    """
+    predictions = model.predict(features)
+
+    results = pd.DataFrame()
+    results['pickup_location_id'] = features['pickup_location_id'].values
+    results['predicted_demand'] = predictions.round(0)
+    return results
+
+
+# ---------------------------------------------------
+# Paridad y benchmarks
+# ---------------------------------------------------
+
+def check_parity(model, onnx_model: OnnxDemandModel, X: pd.DataFrame, rtol: float = 1e-4) -> dict:
+    """
+    Compares the predictions of the sklearn pipeline and the ONNX model. The
+    graph runs in float32, so they agree up to float32 rounding.
+
+    Raises:
+        AssertionError: if they differ by more than `rtol` (relative to the
+        scale of the predictions)
+
+    Returns:
+        dict: max absolute difference and share of equal rounded predictions
+    """
+    expected = model.predict(X.copy())
+    actual = onnx_model.predict(X)
+    max_abs_diff = float(np.abs(expected - actual).max())
+    scale = max(1.0, float(np.abs(expected).max()))
+    assert max_abs_diff <= rtol * scale, f'ONNX predictions differ by up to {max_abs_diff}'
+    return {
+        'max_abs_diff': max_abs_diff,
+        'rounded_equal': float((expected.round(0) == actual.round(0)).mean()),
+    }
+
+
+_COLD_START_SCRIPT = '''
+import time
+start = time.perf_counter()
+import sys, json
+sys.path.insert(0, {parent_dir!r})
+import pandas as pd
+X = pd.read_parquet({data_path!r})
+data_loaded = time.perf_counter()
+{load}
+model_loaded = time.perf_counter()
+model.predict(X)
+print(json.dumps({{
+    'load_s': model_loaded - data_loaded,
+    'first_predict_s': time.perf_counter() - model_loaded,
+}}))
+'''
+
+_LOADERS = {
+    'joblib': 'import joblib\nmodel = joblib.load({model_path!r})',
+    'onnx': 'from src.onnx_export import OnnxDemandModel\nmodel = OnnxDemandModel({model_path!r})',
+}
+
+
+def benchmark_cold_start(pickle_path: Path, onnx_path: Path, X: pd.DataFrame, n_runs: int = 3) -> pd.DataFrame:
+    """
+    Time to import and load the model and to run the first prediction on
+    `X`, in a fresh interpreter (what a frontend pays on start), for the
+    pickled pipeline and the ONNX model. Best of `n_runs`.
+    """
+    import tempfile
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_path = str(Path(tmp_dir) / 'X.parquet')
+        X.to_parquet(data_path, index=False)
+
+        for name, model_path in (('joblib', pickle_path), ('onnx', onnx_path)):
+            script = _COLD_START_SCRIPT.format(
+                parent_dir=str(PARENT_DIR),
+                data_path=data_path,
+                load=_LOADERS[name].format(model_path=str(model_path)),
+            )
+            runs = []
+            for _ in range(n_runs):
+                completed = subprocess.run(
+                    [sys.executable, '-c', script], capture_output=True, text=True, check=True
+                )
+                runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+            best = min(runs, key=lambda r: r['load_s'] + r['first_predict_s'])
+            rows.append({'model': name, **best})
+    return pd.DataFrame(rows)
+
+
+def benchmark_predict(model, onnx_model: OnnxDemandModel, X: pd.DataFrame, n_repeats: int = 200) -> pd.DataFrame:
+    """p50/p99 predict latency at the serving batch sizes, pipeline vs ONNX"""
+    from src.model_variants import measure_latency
+
+    return pd.DataFrame([
+        {'model': 'sklearn', **measure_latency(model, X, n_repeats=n_repeats)},
+        {'model': 'onnx', **measure_latency(onnx_model, X, n_repeats=n_repeats)},
+    ])
+
+
+if __name__ == '__main__':
+    import argparse
+    import joblib
+    from src.paths import PIPELINE_TABULAR_DATA_PATH
+
+    parser = argparse.ArgumentParser(description='Export the model to ONNX, check parity and benchmark it')
+    parser.add_argument('--model-path', type=Path, default=None,
+                        help='Pipeline en .pkl. Por defecto, el modelo en producción del registry')
+    parser.add_argument('--data', type=Path, default=PIPELINE_TABULAR_DATA_PATH,
+                        help='Datos tabulares con los lags de 4 semanas, para la paridad y los benchmarks')
+    parser.add_argument('--output', type=Path, default=ONNX_MODEL_PATH)
+    parser.add_argument('--n-rows', type=int, default=265 * 24)
+    args = parser.parse_args()
+
+    if args.model_path:
+        model_path = args.model_path
+    else:
+        from src.model_registry import load_production_model
+        model, version = load_production_model()
+        model_path = Path(MODELS_DIR) / f'production_v{version}.pkl'
+        joblib.dump(model, model_path)
+    model = joblib.load(model_path)
+
+    start = time.perf_counter()
+    export_to_onnx(model, args.output)
+    print(f'[ONNX] Modelo exportado en {args.output} ({time.perf_counter() - start:.2f} s)')
+
+    X = pd.read_parquet(args.data).drop(columns=['target'], errors='ignore').tail(args.n_rows)
+    X = X.reset_index(drop=True)
+    onnx_model = OnnxDemandModel(args.output)
+
+    print(f'[ONNX] Paridad: {check_parity(model, onnx_model, X)}')
+    print(f'[ONNX] Arranque en frío:\n{benchmark_cold_start(model_path, args.output, X).to_string(index=False)}')
+    print(f'[ONNX] Latencia de predict:\n{benchmark_predict(model, onnx_model, X).to_string(index=False)}')
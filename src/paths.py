@@ -1,5 +1,4 @@
 from pathlib import Path
-import os
 
 PARENT_DIR = Path(__file__).parent.resolve().parent
 DATA_DIR = PARENT_DIR / 'data'
@@ -10,17 +9,15 @@ DATA_CACHE_DIR = PARENT_DIR / 'data' / 'cache'
 
 MODELS_DIR = PARENT_DIR / 'models'
 
-if not Path(DATA_DIR).exists():
-    os.mkdir(DATA_DIR)
+# datos tabulares con los lags de 4 semanas que necesitan los modelos de `get_pipeline`
+PIPELINE_TABULAR_DATA_PATH = TRANSFORMED_DATA_DIR / 'tabular_data_4weeks_lags.parquet'
 
-if not Path(RAW_DATA_DIR).exists():
-    os.mkdir(RAW_DATA_DIR)
 
-if not Path(TRANSFORMED_DATA_DIR).exists():
-    os.mkdir(TRANSFORMED_DATA_DIR)
-
-if not Path(MODELS_DIR).exists():
-    os.mkdir(MODELS_DIR)
-
-if not Path(DATA_CACHE_DIR).exists():
-    os.mkdir(DATA_CACHE_DIR)
\ No newline at end of file
+def ensure_data_dirs():
+    """
+    Creates the data and models directories if they do not exist yet.
+    Called by the code that writes into them, instead of on import.
+    """
+    for directory in (DATA_DIR, RAW_DATA_DIR, TRANSFORMED_DATA_DIR, PROCESSED_DATA_DIR,
+                      MODELS_DIR, DATA_CACHE_DIR):
+        directory.mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,136 @@
+import argparse
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+
+import pandas as pd
+
+import sys
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
+
+from src.dag import Stage, run_dag
+from src.paths import (
+    RAW_DATA_DIR, TRANSFORMED_DATA_DIR, PROCESSED_DATA_DIR, MODELS_DIR, PIPELINE_TABULAR_DATA_PATH,
+)
+
+SRC_DIR = Path(__file__).resolve().parent.parent
+PIPELINES_DIR = SRC_DIR / 'pipelines'
+
+
+def _run_feature(year_month: str):
+    from src.pipelines.feature_pipeline import main
+    main(year_month)
+
+
+def _run_training():
+    from src.pipelines.training_pipeline import main
+    main()
+
+
+def _run_cv(n_folds: int, val_hours: int):
+    from src.pipelines.training_pipeline import main_cv
+    main_cv(n_folds, val_hours)
+
+
+def _run_inference():
+    from src.pipelines.inference_pipeline import main
+    main()
+
+
+def _raw_files(from_date: datetime, to_date: datetime) -> List[Path]:
+    """Raw monthly files with rides in [from_date, to_date)"""
+    months = pd.date_range(pd.Timestamp(from_date).replace(day=1), to_date, freq='MS', inclusive='left')
+    return [RAW_DATA_DIR / f'rides_{m.year}_{m.month:02}.parquet' for m in months]
+
+
+def build_stages(year_month: str, n_folds: int = 0, val_hours: int = 7 * 24) -> List[Stage]:
+    """
+    Stages of the local pipeline (feature -> training -> inference), with the
+    source files they run as inputs, so editing them re-runs the stage.
+
+    With `n_folds > 0` a cross-validation stage is added; it only depends on
+    the feature stage, so it runs at the same time as training (its fold
+    workers come from a `forkserver`, never forked from this process while
+    LightGBM is training).
+    """
+    from src.pipelines.feature_pipeline import N_LAGS_PIPELINE
+
+    year, month = year_month.split('_')
+    month_start = datetime(int(year), int(month), 1)
+    tabular_data = TRANSFORMED_DATA_DIR / 'tabular_data.parquet'
+    X = PROCESSED_DATA_DIR / 'X.parquet'
+    y = PROCESSED_DATA_DIR / 'y.parquet'
+    model = MODELS_DIR / 'linear_regression.pkl'
+
+    stages = [
+        Stage(
+            name='feature',
+            fn=_run_feature,
+            params={'year_month': year_month},
+            # también los meses anteriores de los que salen los lags de 4
+            # semanas: si llegan más tarde, la etapa se vuelve a ejecutar
+            inputs=_raw_files(month_start - timedelta(hours=N_LAGS_PIPELINE), month_start) + [
+                RAW_DATA_DIR / f'rides_{year}_{int(month):02}.parquet',
+                SRC_DIR / 'data.py',
+                SRC_DIR / 'data_validation.py',
+                SRC_DIR / 'hourly_cache.py',
+                SRC_DIR / 'sparse_ts.py',
+                PIPELINES_DIR / 'feature_pipeline.py',
+            ],
+            outputs=[tabular_data, X, y, PIPELINE_TABULAR_DATA_PATH],
+        ),
+        Stage(
+            name='training',
+            fn=_run_training,
+            inputs=[X, y, SRC_DIR / 'model.py', PIPELINES_DIR / 'training_pipeline.py'],
+            outputs=[model],
+        ),
+        Stage(
+            name='inference',
+            fn=_run_inference,
+            inputs=[X, model, PIPELINES_DIR / 'inference_pipeline.py'],
+            outputs=[PROCESSED_DATA_DIR / 'predictions.parquet'],
+        ),
+    ]
+
+    if n_folds > 0:
+        stages.append(Stage(
+            name='cv',
+            fn=_run_cv,
+            params={'n_folds': n_folds, 'val_hours': val_hours},
+            inputs=[
+                tabular_data,
+                SRC_DIR / 'model.py',
+                SRC_DIR / 'cross_validation.py',
+                PIPELINES_DIR / 'training_pipeline.py',
+            ],
+            outputs=[
+                MODELS_DIR / 'cv_metrics_per_fold.csv',
+                MODELS_DIR / 'cv_metrics_per_location.csv',
+            ],
+        ))
+
+    return stages
+
+
+def main(year_month: str, n_folds: int = 0, force: bool = False, max_workers: int = 4) -> dict:
+    manifest = run_dag(build_stages(year_month, n_folds), max_workers=max_workers, force=force)
+
+    for name, result in manifest['stages'].items():
+        print(f"[DAG] {name:<10} {result['status']:<8} {result['seconds']:>8.2f} s")
+
+    if any(r['status'] in ('failed', 'not_run') for r in manifest['stages'].values()):
+        sys.exit(1)
+    return manifest
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run feature, training and inference, skipping unchanged stages')
+    parser.add_argument('year_month', help='YYYY_MM')
+    parser.add_argument('--n-folds', type=int, default=0,
+                        help='Añade una etapa de validación cruzada con este número de folds')
+    parser.add_argument('--force', action='store_true', help='Ejecuta todas las etapas')
+    parser.add_argument('--max-workers', type=int, default=4)
+    args = parser.parse_args()
+
+    main(args.year_month, args.n_folds, args.force, args.max_workers)
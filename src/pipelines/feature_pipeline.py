@@ -1,8 +1,48 @@
+import argparse
 import sys
-from src.data import load_raw_data_v2, transform_to_time_series, transform_to_features_and_target
-from src.paths import TRANSFORMED_DATA_DIR, PROCESSED_DATA_DIR
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+from src.data import transform_to_features_and_target
+from src.hourly_cache import load_hourly_time_series, load_hourly_sparse_series
+from src.feature_matrix import FEATURE_FORMATS, save_features
+from src.paths import TRANSFORMED_DATA_DIR, PROCESSED_DATA_DIR, PIPELINE_TABULAR_DATA_PATH
 
-def main(year_month: str):
+# lags que necesitan los modelos de `get_pipeline`: la media de las últimas
+# 4 semanas usa `rides_previous_672_hour`
+N_LAGS_PIPELINE = 4 * 7 * 24
+
+
+def pipeline_tabular_data(
+    month_start: datetime,
+    month_end: datetime,
+    n_lags: int = N_LAGS_PIPELINE,
+) -> pd.DataFrame:
+    """
+    Tabular data for the `get_pipeline` models: the `n_lags` previous hours of
+    every location and hour of the month, taken from the previous month when
+    it is available, plus `pickup_hour`, `pickup_location_id` and `target`.
+    Hours without their whole lag window are dropped instead of padded with 0.
+    """
+    # serie dispersa directamente de los agregados mensuales, sin rellenar
+    # antes con ceros los dos meses
+    series = load_hourly_sparse_series(month_start - timedelta(hours=n_lags), month_end)
+    if series is None:
+        return pd.DataFrame()
+
+    first_hour = max(pd.Timestamp(month_start), series.start + timedelta(hours=n_lags))
+    pickup_hours = pd.date_range(first_hour, series.start + timedelta(hours=series.n_hours - 1), freq='H')
+    if pickup_hours.empty:
+        return pd.DataFrame()
+
+    # lags por localización sobre la serie dispersa: nunca se mezclan zonas,
+    # y solo se densifica la ventana pedida (float32 es exacto para conteos)
+    location_ids = np.unique(series.location_id)
+    return series.lag_features(location_ids, pickup_hours, n_lags=n_lags, dtype=np.float32)
+
+
+def main(year_month: str, format: str = 'parquet'):
     # Parsea argumento YYYY_MM
     try:
         year_str, month_str = year_month.split('_')
@@ -10,14 +50,15 @@ def main(year_month: str):
     except ValueError:
         raise ValueError("El argumento debe tener formato YYYY_MM, e.g. 2025_04")
 
-    # Carga y validación de datos crudos
-    df_raw = load_raw_data_v2(year, month)
-    if df_raw.empty:
+    # Serie temporal horaria a partir de los agregados cacheados por mes
+    # (solo se vuelven a agregar los datos crudos si el fichero ha cambiado)
+    month_start = datetime(year, month, 1)
+    month_end = month_start + relativedelta(months=1)
+    ts = load_hourly_time_series(month_start, month_end)
+    if ts.empty:
         print(f"[FEATURE] No hay datos disponibles para {year_month}. Saliendo sin acciones.")
         sys.exit(0)
 
-    # Transformación a serie temporal
-    ts = transform_to_time_series(df_raw)
     # Generación de features y target
     X, y, df_full = transform_to_features_and_target(ts, location_id=None, n_lags=24)
 
@@ -27,13 +68,23 @@ def main(year_month: str):
 
     # Guarda outputs
     df_full.to_parquet(TRANSFORMED_DATA_DIR / "tabular_data.parquet", index=False)
-    X.to_parquet(PROCESSED_DATA_DIR / "X.parquet", index=False)
-    y.to_frame(name='target').to_parquet(PROCESSED_DATA_DIR / "y.parquet", index=False)
+    # X e y en el formato de intercambio elegido (parquet o matriz npy para mmap)
+    save_features(X, y, PROCESSED_DATA_DIR, format)
+
+    # Datos con los lags de 4 semanas para tuning, reentrenamiento incremental,
+    # variantes y ONNX, que usan modelos de `get_pipeline`
+    # (se escribe siempre, aunque esté vacío, para no dejar el de otro mes)
+    df_pipeline = pipeline_tabular_data(month_start, month_end)
+    if df_pipeline.empty:
+        print(f"[FEATURE] No hay {N_LAGS_PIPELINE} horas de histórico para los datos de `get_pipeline`")
+    df_pipeline.to_parquet(PIPELINE_TABULAR_DATA_PATH, index=False)
 
     print(f"[FEATURE] Pipeline completado para {year_month}")
 
 if __name__ == '__main__':
-    if len(sys.argv) != 2:
-        print("Uso: python feature_pipeline.py YYYY_MM")
-        sys.exit(1)
-    main(sys.argv[1])
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument('year_month', help='YYYY_MM, e.g. 2025_04')
+    parser.add_argument('--format', choices=FEATURE_FORMATS, default='parquet',
+                        help='Formato de X e y para los pipelines de entrenamiento e inferencia')
+    args = parser.parse_args()
+    main(args.year_month, args.format)
@@ -0,0 +1,37 @@
+import argparse
+import pandas as pd
+from datetime import datetime, timedelta, timezone
+
+
+def main(current_date: datetime = None, days: int = 28):
+    from src.data import fetch_batch_raw_data, transform_to_time_series
+    from src.config import FEATURE_GROUP_METADATA
+    from src.feature_store_api import get_or_create_feature_group
+
+    # UTC naive, como los datos crudos
+    current_date = pd.Timestamp(current_date or datetime.now(timezone.utc).replace(tzinfo=None)).floor('H')
+    print(f"[FEATURE] {current_date=}")
+
+    # Datos crudos de los últimos `days` días, para añadir redundancia
+    rides = fetch_batch_raw_data(from_date=current_date - timedelta(days=days), to_date=current_date)
+    if rides.empty:
+        print("[FEATURE] No hay datos disponibles. Saliendo sin acciones.")
+        return
+
+    # Serie temporal horaria, con el event time del feature group en milisegundos
+    ts_data = transform_to_time_series(rides)
+    ts_data['pickup_hour'] = pd.to_datetime(ts_data['pickup_hour'], utc=True)
+    ts_data['pickup_ts'] = ts_data['pickup_hour'].astype('int64') // 10**6
+
+    feature_group = get_or_create_feature_group(FEATURE_GROUP_METADATA)
+    feature_group.insert(ts_data, write_options={"wait_for_job": True})
+    print(f"[FEATURE] {len(ts_data)} filas insertadas en {FEATURE_GROUP_METADATA.name}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--current-date', type=datetime.fromisoformat, default=None,
+                        help='Hora actual simulada (por defecto, la hora UTC actual)')
+    parser.add_argument('--days', type=int, default=28)
+    args = parser.parse_args()
+    main(args.current_date, args.days)
@@ -1,16 +1,17 @@
+import argparse
 import joblib
-import pandas as pd
 from pathlib import Path
+from src.feature_matrix import FEATURE_FORMATS, load_features
 from src.paths import PROCESSED_DATA_DIR, MODELS_DIR
 
 
-def main():
+def main(format: str = 'parquet'):
     PROCESSED = Path(PROCESSED_DATA_DIR)
     MODELS = Path(MODELS_DIR)
 
     # Carga modelo y features procesados
     model = joblib.load(MODELS / 'linear_regression.pkl')
-    X = pd.read_parquet(PROCESSED / 'X.parquet')
+    X = load_features(PROCESSED, format)
 
     # Genera predicciones
     preds = model.predict(X)
@@ -22,7 +23,37 @@ def main():
     print(f"[INFER] Predicciones guardadas en {PROCESSED / 'predictions.parquet'}")
 
 
+def main_streaming(format: str = 'parquet', n_workers: int = None, batch_size: int = 65_536):
+    from src.batch_inference import predict_streaming
+
+    # Por lotes, en varios procesos y escribiendo según terminan: la memoria
+    # no crece con el tamaño de X
+    PROCESSED = Path(PROCESSED_DATA_DIR)
+    n_rows = predict_streaming(
+        Path(MODELS_DIR) / 'linear_regression.pkl',
+        PROCESSED,
+        PROCESSED / 'predictions.parquet',
+        format=format,
+        n_workers=n_workers,
+        batch_size=batch_size,
+    )
+    print(f"[INFER] {n_rows} predicciones guardadas en {PROCESSED / 'predictions.parquet'}")
+
+
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--format', choices=FEATURE_FORMATS, default='parquet',
+                        help='Formato de X escrito por el feature pipeline')
+    parser.add_argument('--streaming', action='store_true',
+                        help='Predice por lotes en varios procesos con memoria acotada')
+    parser.add_argument('--n-workers', type=int, default=None,
+                        help='Procesos en paralelo (por defecto, núcleos disponibles)')
+    parser.add_argument('--batch-size', type=int, default=65_536)
+    args = parser.parse_args()
+
+    if args.streaming:
+        main_streaming(args.format, args.n_workers, args.batch_size)
+    else:
+        main(args.format)
 
 
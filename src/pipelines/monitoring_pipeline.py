@@ -0,0 +1,46 @@
+import argparse
+import time
+import pandas as pd
+from datetime import datetime, timedelta, timezone
+from src.monitoring import ErrorAccumulator, load_monitoring_data, DEFAULT_STATE_PATH
+
+
+def main(max_mae: float, initial_days: int = 7, current_date: datetime = None):
+    # Estado acumulado de ejecuciones anteriores (vacío la primera vez)
+    accumulator = ErrorAccumulator.load(DEFAULT_STATE_PATH)
+
+    # Desde el inicio de la ventana de retraso: las horas ya procesadas se
+    # releen por si han llegado datos reales tarde (cada par se suma una vez)
+    current_date = pd.Timestamp(current_date or datetime.now(timezone.utc)).floor('H')
+    current_date = current_date.tz_localize('UTC') if current_date.tzinfo is None else current_date
+    from_date = accumulator.window_start if accumulator.watermark is not None \
+        else current_date - timedelta(days=initial_days)
+    monitoring_data = load_monitoring_data(from_date, current_date)
+
+    start = time.perf_counter()
+    last_update = accumulator.update(monitoring_data)
+    accumulator.save(DEFAULT_STATE_PATH)
+    elapsed_ms = 1000 * (time.perf_counter() - start)
+    print(f"[MONITOR] {last_update['n']} predicciones nuevas hasta {last_update['watermark']} "
+          f"(actualización en {elapsed_ms:.1f} ms)")
+    if last_update['n_too_late']:
+        print(f"[MONITOR] {last_update['n_too_late']} predicciones con datos reales fuera de la ventana de retraso")
+
+    result = accumulator.check(max_mae, last_update)
+    print(f"[MONITOR] MAE acumulado: {result['mae']:.2f}, MAE última actualización: {result['last_mae']}")
+    if result['alert']:
+        print(f"[MONITOR] ⚠️ MAE por encima de {max_mae}. "
+              f"Zonas por encima del umbral: {result['locations_over_max_mae']}")
+
+    return result
+
+
+if __name__ == '__main__':
+    import src.config as config
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--max-mae', type=float, default=config.MAX_MAE)
+    parser.add_argument('--initial-days', type=int, default=7,
+                        help='Días de historia a cargar si no hay estado previo')
+    args = parser.parse_args()
+    main(args.max_mae, args.initial_days)
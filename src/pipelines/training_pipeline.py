@@ -1,24 +1,28 @@
+import argparse
 import joblib
+import numpy as np
 import pandas as pd
 from pathlib import Path
-from sklearn.model_selection import train_test_split
-from src.paths import PROCESSED_DATA_DIR, MODELS_DIR
+from src.feature_matrix import FEATURE_FORMATS, load_features, load_target
+from src.paths import PROCESSED_DATA_DIR, TRANSFORMED_DATA_DIR, MODELS_DIR, PIPELINE_TABULAR_DATA_PATH
 from src.model import train_lightgbm, eval_model
 
 
-def main():
-    # Carga de datos procesados
+def main(format: str = 'parquet'):
+    # Carga de datos procesados (con `npy`, vistas de la matriz en mmap)
     PROCESSED = Path(PROCESSED_DATA_DIR)
     MODELS = Path(MODELS_DIR)
     MODELS.mkdir(parents=True, exist_ok=True)
 
-    X = pd.read_parquet(PROCESSED / 'X.parquet')
-    y = pd.read_parquet(PROCESSED / 'y.parquet')['target']
+    X = load_features(PROCESSED, format)
+    y = load_target(PROCESSED, format)
 
-    # Split train/val (manteniendo orden temporal)
-    X_train, X_val, y_train, y_val = train_test_split(
-        X, y, test_size=0.2, shuffle=False, random_state=42
-    )
+    # Split train/val (manteniendo orden temporal): las mismas filas que
+    # train_test_split(test_size=0.2, shuffle=False), pero con slices, que
+    # son vistas y no copian la matriz
+    n_train = len(X) - int(np.ceil(0.2 * len(X)))
+    X_train, X_val = X.iloc[:n_train], X.iloc[n_train:]
+    y_train, y_val = y.iloc[:n_train], y.iloc[n_train:]
 
     # Entrenamiento y evaluación
     model = train_lightgbm(X_train, y_train)
@@ -29,5 +33,99 @@ def main():
     joblib.dump(model, MODELS / 'linear_regression.pkl')
     print(f"[TRAIN] Modelo guardado en {MODELS/'linear_regression.pkl'}")
 
+
+def main_cv(n_folds: int, val_hours: int, n_workers: int = None):
+    from src.cross_validation import cross_validate_rolling_origin
+
+    # Los datos tabulares conservan `pickup_hour` y `pickup_location_id`,
+    # necesarios para construir los folds y agregar métricas por localización
+    df = pd.read_parquet(Path(TRANSFORMED_DATA_DIR) / 'tabular_data.parquet')
+
+    metrics_per_fold, metrics_per_location = cross_validate_rolling_origin(
+        df, n_folds=n_folds, val_hours=val_hours, n_workers=n_workers
+    )
+    print(f"[TRAIN] Métricas por fold:\n{metrics_per_fold.to_string(index=False)}")
+    print(f"[TRAIN] MAE medio: {metrics_per_fold['mae'].mean():.4f}")
+    print(f"[TRAIN] Localizaciones con mayor MAE:\n{metrics_per_location.head(10).to_string(index=False)}")
+
+    metrics_per_fold.to_csv(Path(MODELS_DIR) / 'cv_metrics_per_fold.csv', index=False)
+    metrics_per_location.to_csv(Path(MODELS_DIR) / 'cv_metrics_per_location.csv', index=False)
+
+    return metrics_per_fold, metrics_per_location
+
+
+def main_incremental(
+    holdout_days: int = 7,
+    num_boost_round: int = 100,
+    history_path: str = None,
+    data_path: str = None,
+):
+    from datetime import timedelta
+    from src.data_split import train_test_split as temporal_train_test_split
+    from src.incremental_training import incremental_retrain
+    from src.model_registry import load_production_model, register_model
+
+    # El mes recién llegado: parte para seguir entrenando, parte como holdout.
+    # El modelo en producción es de `get_pipeline`: necesita los lags de 4 semanas
+    df_new = pd.read_parquet(data_path or PIPELINE_TABULAR_DATA_PATH)
+    cutoff_date = df_new['pickup_hour'].max() - timedelta(days=holdout_days)
+    X_new, y_new, X_holdout, y_holdout = temporal_train_test_split(
+        df_new, cutoff_date, target_column_name='target'
+    )
+
+    # Histórico completo (opcional), solo para comparar coste con un refit completo
+    X_history, y_history = None, None
+    if history_path:
+        df_history = pd.read_parquet(history_path)
+        X_history, y_history = df_history.drop(columns=['target']), df_history['target']
+
+    model, version = load_production_model()
+    print(f"[TRAIN] Modelo en producción: v{version}")
+
+    result = incremental_retrain(
+        model, X_new, y_new, X_holdout, y_holdout,
+        num_boost_round=num_boost_round,
+        X_history=X_history, y_history=y_history,
+    )
+    print(f"[TRAIN] MAE holdout: actual={result['old_mae']:.4f} | incremental={result['new_mae']:.4f}")
+    print(f"[TRAIN] Coste de reentrenamiento:\n{result['cost'].to_string(index=False)}")
+
+    if not result['is_better']:
+        print("[TRAIN] El modelo incremental no mejora al actual. No se registra.")
+        return result
+
+    new_version = register_model(
+        result['model'], X_new, y_new,
+        metrics={'test_mae': result['new_mae']},
+        description=f'Warm-started from v{version} on data up to {df_new["pickup_hour"].max()}',
+    )
+    print(f"[TRAIN] Registrada la versión v{new_version}")
+    return result
+
+
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--n-folds', type=int, default=0,
+                        help='Número de folds rolling-origin. 0 = un único split 80/20')
+    parser.add_argument('--val-hours', type=int, default=7 * 24,
+                        help='Horas de validación por fold')
+    parser.add_argument('--n-workers', type=int, default=None,
+                        help='Procesos en paralelo (por defecto min(n_folds, núcleos))')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Continúa entrenando el modelo en producción solo con el mes nuevo')
+    parser.add_argument('--holdout-days', type=int, default=7)
+    parser.add_argument('--num-boost-round', type=int, default=100)
+    parser.add_argument('--history', default=None,
+                        help='Parquet con el histórico completo (con los lags de 4 semanas), para comparar con un refit completo')
+    parser.add_argument('--data', default=None,
+                        help=f'Parquet con el mes nuevo (--incremental). Por defecto, {PIPELINE_TABULAR_DATA_PATH.name}')
+    parser.add_argument('--format', choices=FEATURE_FORMATS, default='parquet',
+                        help='Formato de X e y escritos por el feature pipeline')
+    args = parser.parse_args()
+
+    if args.incremental:
+        main_incremental(args.holdout_days, args.num_boost_round, args.history, args.data)
+    elif args.n_folds > 0:
+        main_cv(args.n_folds, args.val_hours, args.n_workers)
+    else:
+        main(args.format)
@@ -0,0 +1,46 @@
+import argparse
+import json
+import pandas as pd
+from pathlib import Path
+from datetime import timedelta
+from src.paths import PIPELINE_TABULAR_DATA_PATH, MODELS_DIR, DATA_CACHE_DIR
+from src.data_split import train_test_split
+from src.hyperparameter_tuning import tune_hyperparameters
+
+
+def main(n_trials: int, n_workers: int = None, val_days: int = 7, data_path: str = None):
+    # Datos tabulares con `pickup_hour` y los lags de 4 semanas, que `get_pipeline` necesita
+    df = pd.read_parquet(data_path or PIPELINE_TABULAR_DATA_PATH)
+
+    # Validamos sobre los últimos `val_days` días
+    cutoff_date = df['pickup_hour'].max() - timedelta(days=val_days)
+    X_train, y_train, X_val, y_val = train_test_split(df, cutoff_date, target_column_name='target')
+
+    best_params = tune_hyperparameters(
+        X_train, y_train, X_val, y_val,
+        n_trials=n_trials,
+        study_dir=Path(DATA_CACHE_DIR) / 'optuna',
+        n_workers=n_workers,
+    )
+    print(f"[TUNE] Mejores hiperparámetros: {best_params}")
+
+    # Guarda los hiperparámetros para `get_pipeline(**best_params)`
+    output_path = Path(MODELS_DIR) / 'best_hyperparams.json'
+    output_path.write_text(json.dumps(best_params, indent=2))
+    print(f"[TUNE] Hiperparámetros guardados en {output_path}")
+
+    return best_params
+
+
+if __name__ == '__main__':
+    import src.config as config
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--n-trials', type=int, default=config.N_HYPERPARAMETER_SEARCH_TRIALS)
+    parser.add_argument('--n-workers', type=int, default=None)
+    parser.add_argument('--val-days', type=int, default=7)
+    parser.add_argument('--data', default=None,
+                        help=f'Parquet con datos tabulares. Por defecto, {PIPELINE_TABULAR_DATA_PATH.name}')
+    args = parser.parse_args()
+
+    main(args.n_trials, args.n_workers, args.val_days, args.data)
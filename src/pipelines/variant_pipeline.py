@@ -0,0 +1,78 @@
+import argparse
+import joblib
+import pandas as pd
+from datetime import timedelta
+import src.config as config
+from src.paths import PIPELINE_TABULAR_DATA_PATH
+from src.data_split import train_test_split
+from src.model_variants import SERVING_BATCH_SIZES, select_model_variant
+
+
+def main(
+    latency_budget_ms: float = config.LATENCY_BUDGET_MS,
+    val_days: int = 7,
+    model_path: str = None,
+    data_path: str = None,
+    n_repeats: int = 200,
+    register: bool = True,
+):
+    from src.model_registry import load_production_model, register_model
+
+    # Datos tabulares con `pickup_hour` y los lags de 4 semanas, que `get_pipeline` necesita
+    df = pd.read_parquet(data_path or PIPELINE_TABULAR_DATA_PATH)
+    cutoff_date = df['pickup_hour'].max() - timedelta(days=val_days)
+    X_train, y_train, X_val, y_val = train_test_split(df, cutoff_date, target_column_name='target')
+
+    if model_path:
+        model, version = joblib.load(model_path), None
+    else:
+        model, version = load_production_model()
+        print(f"[VARIANTS] Modelo en producción: v{version}")
+
+    selected, best, results, frontier = select_model_variant(
+        model, X_train, y_train, X_val, y_val,
+        latency_budget_ms=latency_budget_ms,
+        n_repeats=n_repeats,
+    )
+    latency_column = f'p99_ms_{max(SERVING_BATCH_SIZES)}'
+    print(f"[VARIANTS] Variantes:\n{results.to_string(index=False)}")
+    print(f"[VARIANTS] Frontera de Pareto (MAE vs {latency_column}):\n{frontier.to_string(index=False)}")
+
+    if selected is None:
+        print(f"[VARIANTS] Ninguna variante cumple el presupuesto de {latency_budget_ms} ms. No se registra.")
+        return results, frontier
+
+    print(f"[VARIANTS] Seleccionada {best['variant']}: MAE={best['mae']:.4f}, "
+          f"{latency_column}={best[latency_column]:.2f} ms (presupuesto {latency_budget_ms} ms)")
+
+    # `original` es el modelo en producción reentrenado con X_train: si gana,
+    # se mantiene la versión en producción
+    if register and best['variant'] != 'original':
+        new_version = register_model(
+            selected, X_val, y_val,
+            metrics={'test_mae': float(best['mae']), latency_column: float(best[latency_column])},
+            description=(
+                f"Variant {best['variant']} of v{version} within a p99 latency budget of "
+                f"{latency_budget_ms} ms at batch size {max(SERVING_BATCH_SIZES)}"
+            ),
+        )
+        print(f"[VARIANTS] Registrada y promovida a producción la versión v{new_version}")
+
+    return results, frontier
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--latency-budget-ms', type=float, default=config.LATENCY_BUDGET_MS,
+                        help=f'p99 de predict con un lote de {max(SERVING_BATCH_SIZES)} filas')
+    parser.add_argument('--val-days', type=int, default=7)
+    parser.add_argument('--model-path', default=None,
+                        help='Modelo en .pkl. Por defecto, el modelo en producción del registry')
+    parser.add_argument('--data', default=None,
+                        help=f'Parquet con datos tabulares. Por defecto, {PIPELINE_TABULAR_DATA_PATH.name}')
+    parser.add_argument('--n-repeats', type=int, default=200)
+    parser.add_argument('--no-register', action='store_true')
+    args = parser.parse_args()
+
+    main(args.latency_budget_ms, args.val_days, args.model_path, args.data, args.n_repeats,
+         register=not args.no_register)
@@ -1,8 +1,10 @@
-from typing import Optional, List
+from typing import Optional, List, Sequence
 from datetime import timedelta
 
+import numpy as np
 import pandas as pd
 import plotly.express as px 
+import plotly.graph_objects as go
 
 def plot_one_sample(
     example_id: int,
@@ -51,21 +53,137 @@ def plot_one_sample(
     return fig
 
 
+def downsample_minmax(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Indices of a min/max downsampling of `y` to about `n_out` points: the
+    series is split into `n_out // 2` buckets and the min and max of each one
+    are kept, in their original order. Peaks are never lost.
+    """
+    n = len(y)
+    if n <= n_out:
+        return np.arange(n)
+
+    n_buckets = max(1, n_out // 2)
+    edges = np.linspace(0, n, n_buckets + 1).astype(np.int64)
+    starts, lengths = edges[:-1], np.diff(edges)
+
+    # argmin/argmax por bucket, vectorizado con una matriz (buckets x longitud máx)
+    offsets = np.arange(lengths.max())
+    idx = np.minimum(starts[:, None] + offsets[None, :], n - 1)
+    valid = offsets[None, :] < lengths[:, None]
+    values = y[idx]
+    i_min = idx[np.arange(n_buckets), np.where(valid, values, np.inf).argmin(axis=1)]
+    i_max = idx[np.arange(n_buckets), np.where(valid, values, -np.inf).argmax(axis=1)]
+
+    return np.unique(np.concatenate([i_min, i_max]))
+
+
+def downsample_lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Indices of a Largest-Triangle-Three-Buckets downsampling of (x, y) to
+    `n_out` points. Keeps the visual shape of the series better than min/max
+    for smooth data. `x` must be numeric (e.g. datetimes as int64).
+    """
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # media del bucket siguiente (o el último punto)
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+
+        areas = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(areas.argmax())
+        selected[i + 1] = a
+
+    return selected
+
+
+def _scatter(use_webgl: bool, **kwargs):
+    return go.Scattergl(**kwargs) if use_webgl else go.Scatter(**kwargs)
+
+
+def plot_samples(
+    example_ids: Sequence[int],
+    features: pd.DataFrame,
+    predictions: Optional[pd.Series] = None,
+    max_points_per_sample: int = 500,
+    use_webgl: bool = True,
+):
+    """
+    Plots several samples in a single figure with a shared date axis: one
+    line per sample with its past values, plus its prediction if passed.
+
+    The dates of every sample are computed at once from its `pickup_hour`,
+    and long windows are downsampled to `max_points_per_sample`, so the cost
+    does not depend on how many lags the features have.
+    """
+    ts_columns = [c for c in features.columns if c.startswith('rides_previous_')]
+    rows = features.iloc[list(example_ids)]
+    values = rows[ts_columns].to_numpy()
+
+    # fechas de todas las muestras: pickup_hour - n_lags ... pickup_hour - 1
+    offsets = pd.to_timedelta(np.arange(-len(ts_columns), 0), unit='h')
+    pickup_hours = pd.DatetimeIndex(rows['pickup_hour'])
+
+    fig = go.Figure(layout=dict(template='plotly_dark'))
+    for i, example_id in enumerate(example_ids):
+        dates = pickup_hours[i] + offsets
+        idx = downsample_minmax(dates.asi8, values[i], max_points_per_sample)
+        name = f'location_id={rows["pickup_location_id"].iloc[i]}'
+        fig.add_trace(_scatter(use_webgl, x=dates[idx], y=values[i][idx],
+                               mode='lines+markers', name=name, legendgroup=name))
+
+        if predictions is not None:
+            fig.add_trace(_scatter(use_webgl, x=[pickup_hours[i]], y=[predictions.iloc[example_id]],
+                                   mode='markers', marker_symbol='x', marker_size=15,
+                                   name='prediction', legendgroup=name, showlegend=False))
+    return fig
+
+
 def plot_ts(
     ts_data: pd.DataFrame,
-    locations: Optional[List[int]] = None
+    locations: Optional[List[int]] = None,
+    max_points: int = 2000,
+    method: str = 'minmax',
+    use_webgl: bool = True,
+    show: bool = True,
     ):
     """
     Plot time-series data
+
+    Each location is downsampled to about `max_points` points (`minmax` or
+    `lttb`), so the figure stays light regardless of the history length.
+    Pass `max_points=None` to plot every point.
     """
     ts_data_to_plot = ts_data[ts_data.pickup_location_id.isin(locations)] if locations else ts_data
+    downsample = {'minmax': downsample_minmax, 'lttb': downsample_lttb}[method]
 
-    fig = px.line(
-        ts_data_to_plot,
-        x="pickup_hour",
-        y="rides",
-        color='pickup_location_id',
-        template='none',
-    )
+    fig = go.Figure(layout=dict(template='none'))
+    for location_id, ts_one_location in ts_data_to_plot.groupby('pickup_location_id', sort=True):
+        ts_one_location = ts_one_location.sort_values('pickup_hour')
+        x = pd.DatetimeIndex(ts_one_location['pickup_hour'])
+        y = ts_one_location['rides'].to_numpy()
+        if max_points is not None:
+            idx = downsample(x.asi8, y, max_points)
+            x, y = x[idx], y[idx]
+        fig.add_trace(_scatter(use_webgl, x=x, y=y, mode='lines', name=str(location_id)))
 
-    fig.show()
\ No newline at end of file
+    fig.update_layout(xaxis_title='pickup_hour', yaxis_title='rides',
+                      legend_title='pickup_location_id')
+
+    if show:
+        fig.show()
+    else:
+        return fig
@@ -0,0 +1,165 @@
+import threading
+import traceback
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+# features, predicciones y segundos de cada paso del cálculo
+FeaturesAndPredictions = Tuple[pd.DataFrame, pd.DataFrame, Dict[str, float]]
+
+
+class HourlyPrefetcher:
+    """
+    Background worker that computes the features and predictions of each hour
+    as soon as the data they need is in the feature store, and publishes them
+    into an in-memory cache shared by every caller (e.g. all Streamlit
+    sessions, when created through `st.cache_resource`).
+
+    The features of hour H end at hour H-1, which the feature pipeline inserts
+    some minutes after H starts. An entry computed before `is_ready(H)` is
+    provisional: it is served as is while the data is missing. Only the
+    background thread polls `is_ready`, every `poll_interval` from the start
+    of each hour, and replaces the provisional entry once the data landed, so
+    serving a page never touches the feature store.
+
+    Publishing swaps the whole cache dict at once, so readers never see a
+    half-written entry and do not need a lock.
+
+    Args:
+        compute_fn: `current_date -> (features, predictions, timings)`, with
+            `timings` the seconds of each step of the computation
+        is_ready: `current_date -> bool`, whether the data the features of
+            `current_date` need is already in the store. Defaults to always
+            ready
+        clock: returns the current date of the app (rounded or not to the
+            hour). Defaults to the current UTC time
+        poll_interval (timedelta): how often `is_ready` is checked while the
+            current hour is not ready
+        keep_hours (int): number of most recent hours kept in memory
+    """
+    def __init__(
+        self,
+        compute_fn: Callable[[pd.Timestamp], FeaturesAndPredictions],
+        is_ready: Optional[Callable[[pd.Timestamp], bool]] = None,
+        clock: Optional[Callable[[], pd.Timestamp]] = None,
+        poll_interval: timedelta = timedelta(minutes=1),
+        keep_hours: int = 3,
+    ):
+        self.compute_fn = compute_fn
+        self.is_ready = is_ready or (lambda current_date: True)
+        self.clock = clock or (lambda: pd.Timestamp(datetime.now(timezone.utc).replace(tzinfo=None)))
+        self.poll_interval = poll_interval
+        self.keep_hours = keep_hours
+
+        # current_date -> (features, predictions, timings, complete)
+        self._cache = {}
+        self._compute_locks = {}
+        self._locks_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # --- cache -------------------------------------------------------------
+
+    def _ready(self, current_date: pd.Timestamp) -> bool:
+        try:
+            return bool(self.is_ready(current_date))
+        except Exception:
+            print(f'Readiness check for {current_date} failed:\n{traceback.format_exc()}')
+            return False
+
+    def get(self, current_date: pd.Timestamp) -> Optional[FeaturesAndPredictions]:
+        """
+        Returns the published features, predictions and timings for
+        `current_date`, if any, provisional or not. Only reads memory.
+        """
+        entry = self._cache.get(pd.Timestamp(current_date))
+        return None if entry is None else entry[:-1]
+
+    def publish(
+        self,
+        current_date: pd.Timestamp,
+        features: pd.DataFrame,
+        predictions: pd.DataFrame,
+        timings: Optional[Dict[str, float]] = None,
+        complete: bool = True,
+    ):
+        """Atomically adds one hour to the cache, dropping the oldest ones."""
+        current_date = pd.Timestamp(current_date)
+        cache = {**self._cache, current_date: (features, predictions, timings or {}, complete)}
+        for old_date in sorted(cache)[:-self.keep_hours]:
+            del cache[old_date]
+        self._cache = cache
+
+    def get_or_compute(self, current_date: pd.Timestamp) -> FeaturesAndPredictions:
+        """
+        Returns the cached entry for `current_date`, computing and publishing
+        it first if there is none. Concurrent callers for the same hour wait
+        for a single computation instead of repeating it.
+        """
+        current_date = pd.Timestamp(current_date)
+        entry = self.get(current_date)
+        if entry is not None:
+            return entry
+        return self._compute(current_date, replace_provisional=False)
+
+    def _compute(self, current_date: pd.Timestamp, replace_provisional: bool) -> FeaturesAndPredictions:
+        with self._locks_lock:
+            lock = self._compute_locks.setdefault(current_date, threading.Lock())
+        with lock:
+            entry = self._cache.get(current_date)
+            # una entrada provisional solo se recalcula si sus datos ya llegaron
+            if entry is None or (replace_provisional and not entry[-1]):
+                # se comprueba antes de calcular: si los datos llegan durante
+                # el cálculo, la entrada queda provisional y se recalcula
+                complete = self._ready(current_date)
+                if entry is None or complete:
+                    features, predictions, timings = self.compute_fn(current_date)
+                    self.publish(current_date, features, predictions, timings, complete)
+                    entry = (features, predictions, timings, complete)
+        with self._locks_lock:
+            self._compute_locks.pop(current_date, None)
+        return entry[:-1]
+
+    # --- background thread -------------------------------------------------
+
+    def start(self) -> 'HourlyPrefetcher':
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='hourly-prefetcher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _seconds_until_next_hour(self) -> float:
+        now = datetime.now(timezone.utc)
+        next_hour = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        return (next_hour - now).total_seconds()
+
+    def _prefetch(self, current_date: pd.Timestamp):
+        try:
+            self._compute(current_date, replace_provisional=True)
+        except Exception:
+            # el siguiente sondeo (o la próxima visita) lo reintentará
+            print(f'Prefetch for {current_date} failed:\n{traceback.format_exc()}')
+
+    def _is_complete(self, current_date: pd.Timestamp) -> bool:
+        entry = self._cache.get(current_date)
+        return entry is not None and entry[-1]
+
+    def _run(self):
+        while not self._stop.is_set():
+            # la hora actual, en cuanto sus datos están en el store; mientras
+            # tanto las visitas reciben la entrada provisional
+            current_date = self.clock().floor('H')
+            if not self._is_complete(current_date):
+                self._prefetch(current_date)
+            if self._is_complete(current_date):
+                wait = self._seconds_until_next_hour()
+            else:
+                wait = self.poll_interval.total_seconds()
+            self._stop.wait(wait)
@@ -0,0 +1,42 @@
+import time
+import threading
+from typing import Callable, Tuple
+
+import psutil
+
+
+def measure(fn: Callable, *args, interval: float = 0.01, **kwargs) -> Tuple[object, float, float]:
+    """
+    Runs `fn(*args, **kwargs)` and measures its wall time and peak memory.
+
+    Peak memory is the maximum resident set size (RSS) of the process while
+    `fn` runs, minus the RSS right before it starts. It is sampled from a
+    background thread every `interval` seconds, so it also accounts for
+    native allocations (LightGBM, pyarrow, numpy) that `tracemalloc` misses.
+
+    Returns:
+        Tuple: result of `fn`, elapsed seconds, peak memory increase in MB
+    """
+    process = psutil.Process()
+    baseline = process.memory_info().rss
+    peak = baseline
+    done = threading.Event()
+
+    def _sample():
+        nonlocal peak
+        while not done.is_set():
+            peak = max(peak, process.memory_info().rss)
+            done.wait(interval)
+
+    sampler = threading.Thread(target=_sample, daemon=True)
+    sampler.start()
+    start = time.perf_counter()
+    try:
+        result = fn(*args, **kwargs)
+    finally:
+        elapsed = time.perf_counter() - start
+        done.set()
+        sampler.join()
+    peak = max(peak, process.memory_info().rss)
+
+    return result, elapsed, (peak - baseline) / 2**20
@@ -0,0 +1,189 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+# ventanas en horas
+WINDOWS = {'24h': 24, '7d': 7 * 24, '28d': 28 * 24}
+STATS = ('sum', 'mean', 'max')
+
+
+def _column_name(stat: str, window: str) -> str:
+    return f'rides_{stat}_{window}'
+
+
+class RollingStats:
+    """
+    Incremental sum / mean / max of the hourly rides of each location over
+    several trailing windows (24h, 7d and 28d by default).
+
+    All locations advance one hour at a time. The state is a few numpy
+    arrays of shape (n_locations, ...):
+
+    - a ring buffer with the last `max(windows)` hours
+    - the running sum of each window: adding an hour adds the new value and
+      subtracts the one leaving the window, O(1) per location
+    - for the max, a van Herk/Gil-Werman decomposition: time is split in
+      blocks of the window size, and the max of a window is the max of the
+      suffix of the previous block and the prefix of the current one. The
+      suffix maxima are computed once per block, so the max is also O(1)
+      amortized per location and hour
+
+    Results are exact. Windows with fewer hours than their size are NaN, as
+    in `pandas.Series.rolling(window)`.
+
+    Args:
+        location_ids: locations tracked; rides of other locations are ignored
+        windows: name -> size in hours
+    """
+    def __init__(self, location_ids: Iterable[int], windows: Dict[str, int] = WINDOWS):
+        self.location_ids = np.asarray(list(location_ids))
+        self.windows = dict(windows)
+        self._row = pd.Series(np.arange(len(self.location_ids)), index=self.location_ids)
+
+        n = len(self.location_ids)
+        self.capacity = max(self.windows.values())
+        self.buffer = np.zeros((n, self.capacity), dtype=np.float64)
+        self.n_hours = 0
+        self.last_hour: Optional[pd.Timestamp] = None
+
+        self.sums = {name: np.zeros(n) for name in self.windows}
+        self.prefix_max = {name: np.full(n, -np.inf) for name in self.windows}
+        self.suffix_max = {name: np.full((n, size), -np.inf) for name, size in self.windows.items()}
+        self.max = {name: np.full(n, -np.inf) for name in self.windows}
+
+    # --- updates -----------------------------------------------------------
+
+    def push(self, rides: np.ndarray):
+        """Adds the next hour; `rides` has one value per tracked location, in order."""
+        rides = np.asarray(rides, dtype=np.float64)
+        t = self.n_hours
+
+        for name, size in self.windows.items():
+            if t >= size:
+                self.sums[name] -= self.buffer[:, (t - size) % self.capacity]
+            self.sums[name] += rides
+
+        self.buffer[:, t % self.capacity] = rides
+        self.n_hours = t + 1
+
+        for name, size in self.windows.items():
+            position = t % size
+            if position == 0:
+                self.prefix_max[name] = rides.copy()
+            else:
+                np.maximum(self.prefix_max[name], rides, out=self.prefix_max[name])
+
+            if position == size - 1:
+                # bloque completo: la ventana es exactamente el bloque, y sus
+                # máximos por sufijo sirven para las ventanas de las próximas `size` horas
+                self.max[name] = self.prefix_max[name].copy()
+                block = self.buffer[:, (np.arange(t - size + 1, t + 1)) % self.capacity]
+                self.suffix_max[name] = np.maximum.accumulate(block[:, ::-1], axis=1)[:, ::-1]
+            else:
+                self.max[name] = np.maximum(self.suffix_max[name][:, position + 1], self.prefix_max[name])
+
+    def update(self, pickup_hour: datetime, location_ids: Iterable[int], rides: Iterable[float]):
+        """
+        Adds the rides of `pickup_hour`. Locations without a value get 0 rides,
+        and hours skipped since the last update are added as 0 rides, as in
+        `add_missing_slots`.
+        """
+        pickup_hour = pd.Timestamp(pickup_hour)
+        if self.last_hour is not None:
+            n_missing = int((pickup_hour - self.last_hour) / timedelta(hours=1)) - 1
+            if n_missing < 0:
+                raise ValueError(f'{pickup_hour} is not after the last hour added ({self.last_hour})')
+            for _ in range(n_missing):
+                self.push(np.zeros(len(self.location_ids)))
+
+        values = np.zeros(len(self.location_ids))
+        rows = self._row.reindex(np.asarray(list(location_ids))).to_numpy()
+        known = ~np.isnan(rows)
+        values[rows[known].astype(np.int64)] = np.asarray(list(rides), dtype=np.float64)[known]
+        self.push(values)
+        self.last_hour = pickup_hour
+
+    # --- results -----------------------------------------------------------
+
+    def stats(self, stats: Iterable[str] = STATS) -> pd.DataFrame:
+        """Current statistics of every location, one column per (stat, window)."""
+        result = pd.DataFrame({'pickup_location_id': self.location_ids})
+        for name, size in self.windows.items():
+            complete = self.n_hours >= size
+            for stat in stats:
+                if not complete:
+                    values = np.full(len(self.location_ids), np.nan)
+                elif stat == 'sum':
+                    values = self.sums[name].copy()
+                elif stat == 'mean':
+                    values = self.sums[name] / size
+                else:
+                    values = self.max[name].copy()
+                result[_column_name(stat, name)] = values
+        return result
+
+    @classmethod
+    def from_history(cls, ts_data: pd.DataFrame, windows: Dict[str, int] = WINDOWS) -> 'RollingStats':
+        """
+        Builds the state from hourly time-series data (columns `pickup_hour`,
+        `pickup_location_id`, `rides`).
+
+        Only the last `2 * max(windows)` hours are replayed: positions in the
+        ring buffer and in the max blocks depend only on the absolute hour
+        index, and those hours cover the current and the previous block of
+        every window, so the state is the same as replaying all the history.
+        """
+        wide = _to_wide(ts_data, 'pickup_hour')
+        rolling = cls(wide.columns, windows)
+        n_replay = min(len(wide), 2 * rolling.capacity)
+        rolling.n_hours = len(wide) - n_replay
+        for values in wide.to_numpy(dtype=np.float64)[-n_replay:]:
+            rolling.push(values)
+        rolling.last_hour = wide.index[-1]
+        return rolling
+
+
+def _full_range(pickup_hours: pd.Series) -> pd.DatetimeIndex:
+    return pd.date_range(pickup_hours.min(), pickup_hours.max(), freq='H')
+
+
+def _to_wide(ts_data: pd.DataFrame, time_column: str) -> pd.DataFrame:
+    """hours x locations matrix of rides, with missing hours filled with 0"""
+    wide = ts_data.pivot_table(
+        index=time_column, columns='pickup_location_id', values='rides', aggfunc='sum', fill_value=0
+    )
+    return wide.reindex(_full_range(ts_data[time_column]), fill_value=0)
+
+
+def rolling_features_batch(
+    ts_data: pd.DataFrame,
+    windows: Dict[str, int] = WINDOWS,
+    stats: Iterable[str] = STATS,
+    time_column: str = 'pickup_hour',
+) -> pd.DataFrame:
+    """
+    Same statistics as `RollingStats`, for every row of historical hourly
+    data, computed per location with vectorized rolling windows over an
+    hours x locations matrix. The window of each row includes its own hour.
+
+    Args:
+        ts_data (pd.DataFrame): columns `time_column`, `pickup_location_id`
+            and `rides`, in any order. Missing hours count as 0 rides
+
+    Returns:
+        pd.DataFrame: one column per (stat, window), aligned with the rows
+        (and index) of `ts_data`
+    """
+    wide = _to_wide(ts_data, time_column).astype(np.float64)
+    hour_index = wide.index.get_indexer(ts_data[time_column])
+    location_index = wide.columns.get_indexer(ts_data['pickup_location_id'])
+
+    result = pd.DataFrame(index=ts_data.index)
+    for name, size in windows.items():
+        rolling = wide.rolling(size)
+        for stat in stats:
+            values = getattr(rolling, stat)().to_numpy()
+            result[_column_name(stat, name)] = values[hour_index, location_index]
+    return result
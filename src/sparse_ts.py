@@ -0,0 +1,273 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+import sys
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+HOUR = pd.Timedelta(hours=1)
+
+
+@dataclass
+class SparseTimeSeries:
+    """
+    Hourly rides per location stored only where there were rides, as COO
+    arrays sorted by (hour_offset, location_id):
+
+    - `hour_offset`: hours since `start` (int32)
+    - `location_id`: pickup location (int32)
+    - `rides`: rides of that location and hour, always > 0 (int32)
+
+    The series covers the hours `start` ... `start + (n_hours - 1)h`, every
+    missing (location, hour) is 0 rides. Memory is proportional to the
+    non-zero pairs instead of locations x hours as the output of
+    `add_missing_slots`; dense matrices are only built for the locations
+    and hours a window asks for.
+    """
+    start: pd.Timestamp
+    n_hours: int
+    hour_offset: np.ndarray
+    location_id: np.ndarray
+    rides: np.ndarray
+
+    # --- construcción ------------------------------------------------------
+
+    @classmethod
+    def _from_pairs(cls, start, n_hours, hour_offset, location_id, rides) -> 'SparseTimeSeries':
+        """Sums the rides of repeated pairs, drops zeros and sorts"""
+        keys = hour_offset.astype(np.int64) << 32 | location_id.astype(np.int64)
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        sums = np.bincount(inverse, weights=rides, minlength=len(unique_keys)).astype(np.int64)
+        non_zero = sums != 0
+        unique_keys = unique_keys[non_zero]
+        return cls(
+            start=pd.Timestamp(start),
+            n_hours=int(n_hours),
+            hour_offset=(unique_keys >> 32).astype(np.int32),
+            location_id=(unique_keys & 0xFFFFFFFF).astype(np.int32),
+            rides=sums[non_zero].astype(np.int32),
+        )
+
+    @classmethod
+    def from_rides(cls, rides: pd.DataFrame) -> 'SparseTimeSeries':
+        """
+        Aggregates raw rides (`pickup_datetime`, `pickup_location_id`) straight
+        into the sparse form, as `transform_to_time_series` without the filler.
+        """
+        rides = rides.dropna(subset=['pickup_datetime', 'pickup_location_id'])
+        if len(rides) == 0:
+            # sin ninguna hora no hay `start` con el que fijar el eje de horas
+            raise ValueError('Cannot build a SparseTimeSeries from empty rides')
+        pickup_hour = rides['pickup_datetime'].dt.floor('H')
+        start, end = pickup_hour.min(), pickup_hour.max()
+        hour_offset = ((pickup_hour - start) // HOUR).to_numpy()
+        return cls._from_pairs(
+            start, (end - start) // HOUR + 1,
+            hour_offset, rides['pickup_location_id'].to_numpy(), np.ones(len(rides)),
+        )
+
+    @classmethod
+    def from_time_series(cls, ts_data: pd.DataFrame) -> 'SparseTimeSeries':
+        """From long-format hourly data (`pickup_hour`, `pickup_location_id`, `rides`), dense or not"""
+        if len(ts_data) == 0:
+            raise ValueError('Cannot build a SparseTimeSeries from empty time series data')
+        start, end = ts_data['pickup_hour'].min(), ts_data['pickup_hour'].max()
+        hour_offset = ((ts_data['pickup_hour'] - start) // HOUR).to_numpy()
+        return cls._from_pairs(
+            start, (end - start) // HOUR + 1,
+            hour_offset, ts_data['pickup_location_id'].to_numpy(), ts_data['rides'].to_numpy(),
+        )
+
+    # --- agregación --------------------------------------------------------
+
+    @classmethod
+    def concat(cls, series: List['SparseTimeSeries']) -> 'SparseTimeSeries':
+        """
+        Joins several series (e.g. one per month) on a common hour axis.
+        Overlapping (location, hour) pairs are added up.
+        """
+        start = min(s.start for s in series)
+        end = max(s.start + (s.n_hours - 1) * HOUR for s in series)
+        return cls._from_pairs(
+            start, (end - start) // HOUR + 1,
+            np.concatenate([s.hour_offset + (s.start - start) // HOUR for s in series]),
+            np.concatenate([s.location_id for s in series]),
+            np.concatenate([s.rides for s in series]),
+        )
+
+    def slice_hours(self, from_hour: pd.Timestamp, to_hour: pd.Timestamp) -> 'SparseTimeSeries':
+        """Hours in [from_hour, to_hour), still sparse; two binary searches"""
+        first, last = self._offset(from_hour), self._offset(to_hour)
+        i, j = np.searchsorted(self.hour_offset, [max(first, 0), max(last, 0)])
+        return SparseTimeSeries(
+            start=pd.Timestamp(from_hour),
+            n_hours=last - first,
+            hour_offset=self.hour_offset[i:j] - first,
+            location_id=self.location_id[i:j],
+            rides=self.rides[i:j],
+        )
+
+    def resample(self, hours: int) -> 'SparseTimeSeries':
+        """Rides per location in buckets of `hours` hours, starting at `start`"""
+        return SparseTimeSeries._from_pairs(
+            self.start, -(-self.n_hours // hours),
+            self.hour_offset // hours, self.location_id, self.rides,
+        )
+
+    def rides_per_location(self) -> pd.Series:
+        """Total rides of every location with at least one ride"""
+        location_ids, inverse = np.unique(self.location_id, return_inverse=True)
+        totals = np.bincount(inverse, weights=self.rides).astype(np.int64)
+        return pd.Series(totals, index=pd.Index(location_ids, name='pickup_location_id'), name='rides')
+
+    # --- ventanas densas bajo demanda ----------------------------------------
+
+    def _offset(self, hour: pd.Timestamp) -> int:
+        return int((pd.Timestamp(hour) - self.start) // HOUR)
+
+    def window(
+        self,
+        location_ids: Iterable[int],
+        from_hour: pd.Timestamp,
+        to_hour: pd.Timestamp,
+    ) -> np.ndarray:
+        """
+        Dense rides of `location_ids` (rows, in that order) for the hours in
+        [from_hour, to_hour) (columns, oldest first). Hours outside the
+        series are 0. Only the non-zero entries of those hours are read.
+        `location_ids` must not contain duplicates.
+        """
+        location_ids = np.asarray(list(location_ids))
+        unique_ids, counts = np.unique(location_ids, return_counts=True)
+        if (counts > 1).any():
+            raise ValueError(f'Duplicated location_ids: {unique_ids[counts > 1].tolist()}')
+        first, last = self._offset(from_hour), self._offset(to_hour)
+        window = np.zeros((len(location_ids), max(last - first, 0)), dtype=np.int32)
+
+        i, j = np.searchsorted(self.hour_offset, [max(first, 0), max(last, 0)])
+        row_of_location = pd.Series(np.arange(len(location_ids)), index=location_ids)
+        rows = row_of_location.reindex(self.location_id[i:j]).to_numpy()
+        known = ~np.isnan(rows)
+        window[rows[known].astype(np.int64), self.hour_offset[i:j][known] - first] = self.rides[i:j][known]
+        return window
+
+    def lag_features(
+        self,
+        location_ids: Iterable[int],
+        pickup_hours: Iterable[pd.Timestamp],
+        n_lags: int = 24,
+        dtype: np.dtype = np.float64,
+    ) -> pd.DataFrame:
+        """
+        Features of every (location, pickup hour): the rides of the `n_lags`
+        previous hours of the same location, and its rides at that hour as
+        `target`. Only the window between the first lag and the last pickup
+        hour is densified. `dtype` is the dtype of the lag columns; float32
+        halves the memory of long lag windows and is exact for ride counts.
+
+        Returns:
+            pd.DataFrame: columns `rides_previous_{n_lags}_hour` ...
+            `rides_previous_1_hour`, `pickup_hour`, `pickup_location_id` and
+            `target`, one row per (pickup hour, location), sorted that way
+        """
+        location_ids = np.asarray(list(location_ids))
+        pickup_hours = pd.DatetimeIndex(sorted(set(pd.to_datetime(list(pickup_hours)))))
+        from_hour = pickup_hours[0] - n_lags * HOUR
+        window = self.window(location_ids, from_hour, pickup_hours[-1] + HOUR)
+
+        # columnas de la ventana de cada hora pedida: sus n_lags horas previas + ella misma
+        ends = ((pickup_hours - from_hour) // HOUR).to_numpy()
+        columns = ends[:, None] + np.arange(-n_lags, 1)
+        values = window[:, columns]                       # (locations, hours, n_lags + 1)
+        values = values.transpose(1, 0, 2).reshape(-1, n_lags + 1)
+
+        features = pd.DataFrame(
+            values[:, :-1].astype(dtype),
+            columns=[f'rides_previous_{i}_hour' for i in range(n_lags, 0, -1)],
+        )
+        features['pickup_hour'] = np.repeat(pickup_hours.to_numpy(), len(location_ids))
+        features['pickup_location_id'] = np.tile(location_ids, len(pickup_hours))
+        features['target'] = values[:, -1].astype(np.int64)
+        return features
+
+    def to_time_series(self) -> pd.DataFrame:
+        """
+        Dense long format, the same frame `transform_to_time_series` returns:
+        every location with rides, every hour, locations in order of their
+        first ride and hours ascending.
+        """
+        location_ids, first_index = np.unique(self.location_id, return_index=True)
+        location_ids = location_ids[np.argsort(first_index, kind='stable')]
+        window = self.window(location_ids, self.start, self.start + self.n_hours * HOUR)
+        return pd.DataFrame({
+            'pickup_hour': np.tile(pd.date_range(self.start, periods=self.n_hours, freq='H').to_numpy(),
+                                   len(location_ids)),
+            'pickup_location_id': np.repeat(location_ids, self.n_hours),
+            'rides': window.ravel().astype(np.int64),
+        })
+
+    # --- almacenamiento ----------------------------------------------------
+
+    @property
+    def nbytes(self) -> int:
+        return self.hour_offset.nbytes + self.location_id.nbytes + self.rides.nbytes
+
+    @property
+    def density(self) -> float:
+        """Non-zero pairs over locations-with-rides x hours"""
+        n_locations = len(np.unique(self.location_id))
+        return len(self.rides) / max(1, n_locations * self.n_hours)
+
+    def save(self, path: Path):
+        np.savez_compressed(
+            path,
+            start=np.int64(self.start.value),
+            # `value` es UTC: sin la zona horaria, `start` volvería naive
+            tz=str(self.start.tz or ''),
+            n_hours=np.int64(self.n_hours),
+            hour_offset=self.hour_offset,
+            location_id=self.location_id,
+            rides=self.rides,
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> 'SparseTimeSeries':
+        with np.load(path) as data:
+            tz = str(data['tz']) if 'tz' in data else ''
+            start = pd.Timestamp(int(data['start']))
+            return cls(
+                start=start.tz_localize('UTC').tz_convert(tz) if tz else start,
+                n_hours=int(data['n_hours']),
+                hour_offset=data['hour_offset'],
+                location_id=data['location_id'],
+                rides=data['rides'],
+            )
+
+
+def memory_report(ts: SparseTimeSeries, dense: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Memory of the sparse series against the dense long frame of
+    `add_missing_slots` (built with `to_time_series` if not given).
+    """
+    dense = ts.to_time_series() if dense is None else dense
+    return pd.DataFrame([
+        {'format': 'dense', 'rows': len(dense), 'mb': dense.memory_usage(deep=True).sum() / 2**20},
+        {'format': 'sparse', 'rows': len(ts.rides), 'mb': ts.nbytes / 2**20},
+    ])
+
+
+if __name__ == '__main__':
+    import argparse
+    from src.hourly_cache import load_hourly_aggregates
+
+    parser = argparse.ArgumentParser(description='Memory of the sparse hourly series of one month vs the dense one')
+    parser.add_argument('year', type=int)
+    parser.add_argument('month', type=int)
+    args = parser.parse_args()
+
+    ts = SparseTimeSeries.from_time_series(load_hourly_aggregates(args.year, args.month))
+    print(f'Densidad: {ts.density:.1%}')
+    print(memory_report(ts).to_string(index=False))
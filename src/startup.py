@@ -0,0 +1,44 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+def run_concurrently(
+    tasks: Dict[str, Callable[[], Any]],
+    on_done: Optional[Callable[[str, float], None]] = None,
+    initializer: Optional[Callable[[], None]] = None,
+) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """
+    Runs independent (typically network-bound) tasks in parallel threads, so
+    the total time is bounded by the slowest task instead of their sum.
+
+    `on_done(name, seconds)` is called from the calling thread as each task
+    finishes, so it can safely update a UI (e.g. a Streamlit progress bar).
+
+    Args:
+        tasks (dict): task name -> function without arguments
+        on_done (callable, optional): progress callback
+        initializer (callable, optional): run at the start of every worker
+            thread (e.g. to attach the Streamlit script context)
+
+    Returns:
+        Tuple: results and duration in seconds of each task, by name
+    """
+    def _timed(fn):
+        start = time.perf_counter()
+        result = fn()
+        return result, time.perf_counter() - start
+
+    results, timings = {}, {}
+    if not tasks:
+        return results, timings
+
+    with ThreadPoolExecutor(max_workers=len(tasks), initializer=initializer) as executor:
+        futures = {executor.submit(_timed, fn): name for name, fn in tasks.items()}
+        for future in as_completed(futures):
+            name = futures[future]
+            results[name], timings[name] = future.result()
+            if on_done is not None:
+                on_done(name, timings[name])
+
+    return results, timings
@@ -0,0 +1,108 @@
+import zipfile
+from pathlib import Path
+
+import sys
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+# requests y geopandas se importan al usarlos
+from src.paths import DATA_DIR, ensure_data_dirs
+
+TAXI_ZONES_URL = 'https://d37ci6vzurychx.cloudfront.net/misc/taxi_zones.zip'
+
+# zonas ya reproyectadas y simplificadas, listas para el mapa del frontend
+TAXI_ZONES_FILE = Path(DATA_DIR) / 'taxi_zones_simplified.parquet'
+
+# tolerancia de simplificación, en unidades del CRS original (EPSG:2263, pies)
+DEFAULT_TOLERANCE = 100.0
+
+
+def download_taxi_zones() -> Path:
+    """
+    Downloads and unzips the NYC taxi zones shapefile, only if it is not
+    already in `DATA_DIR`.
+
+    Returns:
+        Path: path to `taxi_zones.shp`
+    """
+    shp_path = Path(DATA_DIR) / 'taxi_zones' / 'taxi_zones.shp'
+    if shp_path.exists():
+        return shp_path
+
+    import requests
+
+    ensure_data_dirs()
+    zip_path = Path(DATA_DIR) / 'taxi_zones.zip'
+    if not zip_path.exists():
+        response = requests.get(TAXI_ZONES_URL)
+        if response.status_code != 200:
+            raise Exception(f'{TAXI_ZONES_URL} is not available')
+        zip_path.write_bytes(response.content)
+
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        zip_ref.extractall(Path(DATA_DIR) / 'taxi_zones')
+
+    return shp_path
+
+
+def preprocess_taxi_zones(
+    tolerance: float = DEFAULT_TOLERANCE,
+    output_path: Path = TAXI_ZONES_FILE,
+) -> Path:
+    """
+    One-time preprocessing of the taxi zones for the frontend map:
+
+    - keeps only the columns the map uses
+    - simplifies the polygons in the original projected CRS, so `tolerance`
+      is a distance in feet. Shared borders between zones are simplified
+      once (coverage simplification), so neighbouring zones still fit
+      together without gaps or overlaps
+    - reprojects to EPSG:4326 and rounds coordinates to ~1 m
+    - stores the result as GeoParquet
+
+    Returns:
+        Path: path to the GeoParquet file
+    """
+    import shapely
+    import geopandas as gpd
+
+    zones = gpd.read_file(download_taxi_zones())[['LocationID', 'zone', 'borough', 'geometry']]
+
+    if hasattr(shapely, 'coverage_simplify'):
+        zones['geometry'] = shapely.coverage_simplify(zones.geometry.values, tolerance)
+    else:
+        # shapely < 2.1: cada polígono sigue siendo válido, pero los bordes
+        # compartidos se simplifican por separado
+        zones['geometry'] = zones.geometry.simplify(tolerance, preserve_topology=True)
+
+    zones = zones.to_crs('epsg:4326')
+    zones['geometry'] = shapely.set_precision(zones.geometry.values, grid_size=1e-5)
+
+    output_path = Path(output_path)
+    zones.to_parquet(output_path)
+    print(f'{len(zones)} zones saved to {output_path} ({output_path.stat().st_size / 1024:.0f} KB)')
+
+    return output_path
+
+
+def load_taxi_zones(path: Path = TAXI_ZONES_FILE) -> 'gpd.GeoDataFrame':
+    """
+    Loads the preprocessed taxi zones, running `preprocess_taxi_zones` first
+    if they are not available yet.
+    """
+    import geopandas as gpd
+
+    path = Path(path)
+    if not path.exists():
+        preprocess_taxi_zones(output_path=path)
+    return gpd.read_parquet(path)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Preprocess the taxi zones for the frontend map')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Simplification tolerance, in feet')
+    args = parser.parse_args()
+
+    preprocess_taxi_zones(args.tolerance)
@@ -11,6 +11,12 @@ from feast.types import Int64  # Importa Int64 para dtype
 from datetime import timedelta
 import pandas as pd
 
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from src.rolling_features import rolling_features_batch
+
 
 # 1) Define la entidad (clave primaria)
 pickup_loc = Entity(
@@ -39,8 +45,16 @@ rides_fv = FeatureView(
 
 # 4) Calcula manualmente la característica bajo demanda
 def avg_last_24h(inputs: pd.DataFrame) -> pd.DataFrame:
-    df = pd.DataFrame()
-    df["rides_last_24h_avg"] = inputs["rides"].rolling(24).mean().fillna(0).astype(int)
+    # media de las últimas 24 horas de cada zona, en orden temporal
+    # (las horas sin viajes cuentan como 0)
+    stats = rolling_features_batch(
+        inputs,
+        windows={'24h': 24},
+        stats=('mean',),
+        time_column='pickup_datetime',
+    )
+    df = pd.DataFrame(index=inputs.index)
+    df["rides_last_24h_avg"] = stats['rides_mean_24h'].fillna(0).astype(int)
     return df
 
 # 5) Agrupa tus FV’s en un FeatureService
@@ -0,0 +1,75 @@
+"""Backfill of a feature group against the `InMemoryFeatureGroup` stand-in"""
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from types import SimpleNamespace
+
+import pandas as pd
+
+from src.backfill import (
+    BackfillCheckpoint,
+    InMemoryFeatureGroup,
+    backfill_feature_group,
+    default_checkpoint,
+)
+
+FROM_DATE = pd.Timestamp('2024-01-15')
+TO_DATE = pd.Timestamp('2024-03-10')
+N_LOCATIONS = 3
+
+
+def synthetic_chunk(chunk_start, chunk_end) -> pd.DataFrame:
+    # a nivel de módulo: los workers (spawn) la importan
+    hours = pd.date_range(chunk_start, chunk_end, freq='H', inclusive='left', tz='UTC')
+    return pd.DataFrame({
+        'pickup_hour': hours.repeat(N_LOCATIONS),
+        'pickup_location_id': list(range(1, N_LOCATIONS + 1)) * len(hours),
+        'rides': 1,
+    })
+
+
+def _backfill(feature_group, checkpoint=None):
+    return backfill_feature_group(
+        FROM_DATE, TO_DATE,
+        feature_group=feature_group,
+        checkpoint=checkpoint,
+        compute_fn=synthetic_chunk,
+        n_workers=2,
+        batch_size=1_000,
+    )
+
+
+def test_backfill_in_memory(tmp_path):
+    feature_group = InMemoryFeatureGroup(primary_key=['pickup_hour', 'pickup_location_id'])
+    checkpoint = BackfillCheckpoint(tmp_path / 'checkpoint.json')
+
+    inserted = _backfill(feature_group, checkpoint)
+
+    assert [start.month for start, _ in inserted] == [1, 2, 3]
+    data = feature_group.read()
+    n_hours = (TO_DATE - FROM_DATE) // pd.Timedelta(hours=1)
+    assert len(data) == n_hours * N_LOCATIONS
+    assert data['pickup_hour'].min() == FROM_DATE.tz_localize('UTC')
+    # lotes de como mucho 1.000 filas
+    assert feature_group.n_inserts > len(inserted)
+
+    # una segunda ejecución con el mismo checkpoint no inserta nada
+    n_inserts = feature_group.n_inserts
+    assert _backfill(feature_group, BackfillCheckpoint(tmp_path / 'checkpoint.json')) == []
+    assert feature_group.n_inserts == n_inserts
+
+
+def test_in_memory_checkpoint_is_not_persisted():
+    for _ in range(2):
+        feature_group = InMemoryFeatureGroup(primary_key=['pickup_hour', 'pickup_location_id'])
+        assert len(_backfill(feature_group)) == 3
+        assert not feature_group.read().empty
+
+
+def test_default_checkpoint_per_feature_group():
+    v1 = SimpleNamespace(name='time_series_hourly_feature_group', version=1)
+    v2 = SimpleNamespace(name='time_series_hourly_feature_group', version=2)
+
+    assert default_checkpoint(v1).path != default_checkpoint(v2).path
+    assert default_checkpoint(InMemoryFeatureGroup(primary_key=['pickup_hour'])).path is None
@@ -0,0 +1,90 @@
+"""Parity of the polars engine of `src/data.py` with the pandas one"""
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('polars')
+
+from src.data import (
+    add_missing_slots,
+    create_lag_features,
+    transform_to_features_and_target,
+    transform_to_time_series,
+)
+from src.data_polars import check_parity, make_synthetic_rides
+
+N_LAGS = 24
+
+
+@pytest.fixture(params=['ns', 'us'])
+def rides(request) -> pd.DataFrame:
+    # los parquet de TLC se leen con resolución us
+    return make_synthetic_rides(5_000, n_locations=20, n_days=3, unit=request.param)
+
+
+@pytest.fixture
+def ts_data(rides) -> pd.DataFrame:
+    return transform_to_time_series(rides.copy())
+
+
+def test_transform_to_time_series(rides):
+    expected = transform_to_time_series(rides.copy())
+    result = transform_to_time_series(rides.copy(), engine='polars')
+
+    assert expected['pickup_hour'].dtype == 'datetime64[ns]'
+    pd.testing.assert_frame_equal(expected, result)
+
+
+def test_add_missing_slots(ts_data):
+    agg_rides = ts_data[ts_data['rides'] > 0].reset_index(drop=True)
+    agg_rides['pickup_hour'] = agg_rides['pickup_hour'].astype('datetime64[us]')
+
+    pd.testing.assert_frame_equal(
+        add_missing_slots(agg_rides), add_missing_slots(agg_rides, engine='polars')
+    )
+
+
+def test_add_missing_slots_tz_aware(ts_data):
+    agg_rides = ts_data[ts_data['rides'] > 0].reset_index(drop=True)
+    agg_rides['pickup_hour'] = agg_rides['pickup_hour'].dt.tz_localize('UTC')
+
+    pd.testing.assert_frame_equal(
+        add_missing_slots(agg_rides), add_missing_slots(agg_rides, engine='polars')
+    )
+
+
+@pytest.mark.parametrize('unit', ['ns', 'us'])
+def test_create_lag_features(ts_data, unit):
+    ts_data = ts_data.astype({'pickup_hour': f'datetime64[{unit}]'})
+
+    pd.testing.assert_frame_equal(
+        create_lag_features(ts_data, N_LAGS), create_lag_features(ts_data, N_LAGS, engine='polars')
+    )
+
+
+def test_create_lag_features_float_rides(ts_data):
+    ts_data = ts_data.astype({'rides': np.float32})
+
+    pd.testing.assert_frame_equal(
+        create_lag_features(ts_data, N_LAGS), create_lag_features(ts_data, N_LAGS, engine='polars')
+    )
+
+
+@pytest.mark.parametrize('all_locations', [True, False])
+def test_transform_to_features_and_target(ts_data, all_locations):
+    location_id = None if all_locations else int(ts_data['pickup_location_id'].iloc[0])
+    X_a, y_a, df_a = transform_to_features_and_target(ts_data, location_id, N_LAGS)
+    X_b, y_b, df_b = transform_to_features_and_target(ts_data, location_id, N_LAGS, engine='polars')
+
+    pd.testing.assert_frame_equal(X_a, X_b)
+    pd.testing.assert_series_equal(y_a, y_b)
+    pd.testing.assert_frame_equal(df_a, df_b)
+
+
+def test_check_parity():
+    checked = check_parity(sizes=[2_000])
+    assert set(checked['unit']) == {'ns', 'us'}
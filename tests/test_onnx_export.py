@@ -0,0 +1,65 @@
+"""Parity of the ONNX export with the `get_pipeline` model it comes from"""
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('onnx')
+pytest.importorskip('onnxmltools')
+pytest.importorskip('onnxruntime')
+
+from src.model import get_pipeline
+from src.onnx_export import OnnxDemandModel, check_parity, export_to_onnx
+
+N_LAGS = 4 * 7 * 24
+
+
+def _make_features(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(
+        rng.poisson(10, size=(n_rows, N_LAGS)).astype(np.float32),
+        columns=[f'rides_previous_{i}_hour' for i in range(N_LAGS, 0, -1)],
+    )
+    X['pickup_hour'] = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 24 * 60, n_rows), unit='h')
+    X['pickup_location_id'] = rng.integers(1, 266, n_rows).astype(np.int32)
+    return X
+
+
+@pytest.fixture(scope='module')
+def fitted_model():
+    X = _make_features(2_000)
+    y = X['rides_previous_168_hour'] + X['pickup_hour'].dt.hour
+    model = get_pipeline(n_estimators=20, num_leaves=15, verbose=-1)
+    model.fit(X.copy(), y)
+    return model
+
+
+@pytest.fixture(scope='module')
+def onnx_model(fitted_model, tmp_path_factory):
+    path = export_to_onnx(fitted_model, tmp_path_factory.mktemp('onnx') / 'model.onnx')
+    return OnnxDemandModel(path)
+
+
+@pytest.mark.parametrize('pickup_hour', [
+    lambda s: s,
+    lambda s: s.astype('datetime64[us]'),
+    lambda s: s.dt.tz_localize('America/New_York'),
+], ids=['ns', 'us', 'tz-aware'])
+def test_parity(fitted_model, onnx_model, pickup_hour):
+    X = _make_features(500, seed=1)
+    X['pickup_hour'] = pickup_hour(X['pickup_hour'])
+
+    # check_parity falla si difieren más que el redondeo de float32
+    result = check_parity(fitted_model, onnx_model, X)
+
+    assert result['max_abs_diff'] < 1e-3
+
+
+def test_rejects_other_models():
+    from sklearn.linear_model import LinearRegression
+
+    with pytest.raises(ValueError):
+        export_to_onnx(LinearRegression())
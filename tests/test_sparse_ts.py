@@ -0,0 +1,140 @@
+"""`SparseTimeSeries` against the dense pandas path, and its input validation"""
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data import transform_to_time_series
+from src.sparse_ts import SparseTimeSeries
+
+START = pd.Timestamp('2024-01-01')
+HOUR = pd.Timedelta(hours=1)
+
+
+@pytest.fixture
+def rides() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    n_rides = 3_000
+    return pd.DataFrame({
+        'pickup_datetime': START + pd.to_timedelta(rng.integers(0, 4 * 24 * 3600, n_rides), unit='s'),
+        'pickup_location_id': rng.integers(1, 30, n_rides),
+    })
+
+
+@pytest.fixture
+def sparse(rides) -> SparseTimeSeries:
+    return SparseTimeSeries.from_rides(rides)
+
+
+def test_to_time_series(rides, sparse):
+    expected = transform_to_time_series(rides.copy())
+    pd.testing.assert_frame_equal(sparse.to_time_series(), expected, check_dtype=False)
+
+
+def test_lag_features(rides, sparse):
+    n_lags = 6
+    location_ids = [3, 1, 17]
+    pickup_hours = pd.date_range(START + n_lags * HOUR, periods=20, freq='H')
+    features = sparse.lag_features(location_ids, pickup_hours, n_lags=n_lags)
+
+    # pivot denso: horas x localizaciones, y cada lag es un desplazamiento
+    dense = transform_to_time_series(rides.copy()) \
+        .pivot(index='pickup_hour', columns='pickup_location_id', values='rides')
+    for _, row in features.sample(10, random_state=0).iterrows():
+        column = dense[row['pickup_location_id']]
+        hour = row['pickup_hour']
+        assert row['target'] == column[hour]
+        for lag in range(1, n_lags + 1):
+            assert row[f'rides_previous_{lag}_hour'] == column[hour - lag * HOUR]
+    assert len(features) == len(location_ids) * len(pickup_hours)
+
+
+def test_concat_and_slice(rides, sparse):
+    middle = START + 2 * 24 * HOUR
+    first = SparseTimeSeries.from_rides(rides[rides['pickup_datetime'] < middle])
+    second = SparseTimeSeries.from_rides(rides[rides['pickup_datetime'] >= middle])
+    joined = SparseTimeSeries.concat([first, second])
+
+    assert (joined.start, joined.n_hours) == (sparse.start, sparse.n_hours)
+    np.testing.assert_array_equal(joined.hour_offset, sparse.hour_offset)
+    np.testing.assert_array_equal(joined.location_id, sparse.location_id)
+    np.testing.assert_array_equal(joined.rides, sparse.rides)
+
+    location_ids = np.unique(sparse.location_id)
+    sliced = sparse.slice_hours(middle, middle + 10 * HOUR)
+    np.testing.assert_array_equal(
+        sliced.window(location_ids, middle, middle + 10 * HOUR),
+        sparse.window(location_ids, middle, middle + 10 * HOUR),
+    )
+
+
+@pytest.mark.parametrize('tz', [None, 'UTC', 'America/New_York'])
+def test_save_load(tmp_path, sparse, tz):
+    series = SparseTimeSeries(
+        start=sparse.start if tz is None else sparse.start.tz_localize(tz),
+        n_hours=sparse.n_hours,
+        hour_offset=sparse.hour_offset,
+        location_id=sparse.location_id,
+        rides=sparse.rides,
+    )
+    series.save(tmp_path / 'series.npz')
+    loaded = SparseTimeSeries.load(tmp_path / 'series.npz')
+
+    assert loaded.start == series.start
+    assert str(loaded.start.tz) == str(series.start.tz)
+    location_ids = np.unique(series.location_id)
+    np.testing.assert_array_equal(
+        loaded.window(location_ids, series.start, series.start + 24 * HOUR),
+        series.window(location_ids, series.start, series.start + 24 * HOUR),
+    )
+    pickup_hours = [series.start + 30 * HOUR]
+    pd.testing.assert_frame_equal(
+        loaded.lag_features(location_ids, pickup_hours),
+        series.lag_features(location_ids, pickup_hours),
+    )
+
+
+@pytest.fixture
+def ts() -> SparseTimeSeries:
+    return SparseTimeSeries.from_time_series(pd.DataFrame({
+        'pickup_hour': [START, START + pd.Timedelta(hours=1), START + pd.Timedelta(hours=2)],
+        'pickup_location_id': [1, 2, 1],
+        'rides': [3, 4, 5],
+    }))
+
+
+def test_window(ts):
+    window = ts.window([2, 1, 7], START, START + pd.Timedelta(hours=3))
+    np.testing.assert_array_equal(window, [[0, 4, 0], [3, 0, 5], [0, 0, 0]])
+
+
+def test_window_duplicated_location_ids(ts):
+    with pytest.raises(ValueError, match='Duplicated location_ids'):
+        ts.window([1, 2, 1], START, START + pd.Timedelta(hours=3))
+
+
+def test_lag_features_duplicated_location_ids(ts):
+    with pytest.raises(ValueError, match='Duplicated location_ids'):
+        ts.lag_features([1, 1], [START + pd.Timedelta(hours=2)], n_lags=2)
+
+
+def test_from_rides_empty():
+    rides = pd.DataFrame({
+        'pickup_datetime': pd.Series([], dtype='datetime64[ns]'),
+        'pickup_location_id': pd.Series([], dtype='int64'),
+    })
+    with pytest.raises(ValueError, match='empty rides'):
+        SparseTimeSeries.from_rides(rides)
+
+
+def test_from_time_series_empty():
+    ts_data = pd.DataFrame({
+        'pickup_hour': pd.Series([], dtype='datetime64[ns]'),
+        'pickup_location_id': pd.Series([], dtype='int64'),
+        'rides': pd.Series([], dtype='int64'),
+    })
+    with pytest.raises(ValueError, match='empty time series'):
+        SparseTimeSeries.from_time_series(ts_data)